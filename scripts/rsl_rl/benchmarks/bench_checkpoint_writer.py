@@ -0,0 +1,146 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Measure the training-thread stall of the checkpoints, with and without the asynchronous checkpoint writer.
+
+The script saves the policy and optimizer of a PPO agent every few iterations with a local stand-in uploader (which
+copies the checkpoint to a separate directory after a fixed latency, like a remote upload). It reports the time the
+training thread spends in the saves, checks that the retention policy keeps the expected checkpoints, and checks that
+the asynchronous checkpoints hold the state at the time of the save even though training kept updating the
+parameters.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_checkpoint_writer.py --keep_last 2 --keep_every 20
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import shutil
+import sys
+import tempfile
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.algorithms import PPO  # noqa: E402
+from local_rsl_rl.modules import ActorCritic  # noqa: E402
+from local_rsl_rl.utils import CheckpointWriter  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the stall of the checkpoint writer.")
+parser.add_argument("--num_iterations", type=int, default=40, help="Number of training iterations.")
+parser.add_argument("--save_interval", type=int, default=5, help="Number of iterations between checkpoints.")
+parser.add_argument("--keep_last", type=int, default=2, help="Number of most recent checkpoints to keep.")
+parser.add_argument("--keep_every", type=int, default=20, help="Keep the checkpoints of multiples of this iteration.")
+parser.add_argument("--upload_latency_ms", type=float, default=200.0, help="Latency of the stand-in uploader.")
+parser.add_argument("--iteration_ms", type=float, default=100.0, help="Duration of the work of an iteration.")
+parser.add_argument("--device", type=str, default="cpu", help="Device of the policy.")
+args_cli = parser.parse_args()
+
+POLICY_CFG = dict(
+    init_noise_std=1.0,
+    actor_hidden_dims=[256],
+    critic_hidden_dims=[256],
+    activation="elu",
+    activation_out="elu",
+    leg_control_head_hidden_dims=[256, 128],
+    arm_control_head_hidden_dims=[256, 128],
+    critic_leg_control_head_hidden_dims=[256, 128, 64],
+    critic_arm_control_head_hidden_dims=[256, 128, 64],
+    priv_encoder_dims=[32, 18],
+    num_leg_actions=12,
+    num_arm_actions=6,
+)
+
+
+class StandInUploader:
+    """Uploader that copies the checkpoints to a local directory after a fixed latency."""
+
+    def __init__(self, directory: str, latency: float):
+        self.directory = directory
+        self.latency = latency
+        os.makedirs(directory, exist_ok=True)
+
+    def save_model(self, model_path, iter):
+        time.sleep(self.latency)
+        shutil.copy(model_path, os.path.join(self.directory, os.path.basename(model_path)))
+
+
+def make_algorithm() -> PPO:
+    torch.manual_seed(0)
+    with contextlib.redirect_stdout(io.StringIO()):
+        policy = ActorCritic(70, 70, 27, 18, 10, **POLICY_CFG).to(args_cli.device)
+    return PPO(policy, device=args_cli.device, learning_rate=1e-3, dagger_update_freq=20, eps=1e-5)
+
+
+def train(writer: CheckpointWriter, log_dir: str, uploader: StandInUploader):
+    """Run the iterations and return the stall of the saves and the parameters saved at each checkpoint."""
+    alg = make_algorithm()
+    stall = 0.0
+    expected = {}
+    for it in range(args_cli.num_iterations):
+        # work of the iteration: an update of the parameters
+        time.sleep(args_cli.iteration_ms * 1e-3)
+        with torch.no_grad():
+            for param in alg.policy.parameters():
+                param.add_(torch.randn_like(param), alpha=1e-3)
+        if it % args_cli.save_interval == 0:
+            path = os.path.join(log_dir, f"model_{it}.pt")
+            saved_dict = {
+                "model_state_dict": alg.policy.state_dict(),
+                "optimizer_state_dict": alg.optimizer.state_dict(),
+                "iter": it,
+                "infos": None,
+            }
+            expected[path] = {key: value.clone() for key, value in alg.policy.state_dict().items()}
+            start = time.perf_counter()
+            writer.save(saved_dict, path, it, upload=uploader.save_model)
+            stall += time.perf_counter() - start
+    start = time.perf_counter()
+    writer.flush()
+    return stall, time.perf_counter() - start, expected
+
+
+def main():
+    print(f"iterations: {args_cli.num_iterations}, save interval: {args_cli.save_interval}")
+    print(f"upload latency: {args_cli.upload_latency_ms:.0f} ms, work per iteration: {args_cli.iteration_ms:.0f} ms")
+    print(f"{'writer':>12} {'stall [ms/save]':>16} {'final flush [ms]':>17} {'kept checkpoints'}")
+    num_saves = len(range(0, args_cli.num_iterations, args_cli.save_interval))
+    for asynchronous in [False, True]:
+        with tempfile.TemporaryDirectory() as root:
+            log_dir = os.path.join(root, "logs")
+            os.makedirs(log_dir)
+            uploader = StandInUploader(os.path.join(root, "uploads"), args_cli.upload_latency_ms * 1e-3)
+            writer = CheckpointWriter(asynchronous, keep_last=args_cli.keep_last, keep_every=args_cli.keep_every)
+            stall, flush_time, expected = train(writer, log_dir, uploader)
+
+            # retention: the most recent checkpoints and the milestones
+            iterations = list(range(0, args_cli.num_iterations, args_cli.save_interval))
+            kept = set(iterations[-args_cli.keep_last :])
+            kept |= {it for it in iterations if it % args_cli.keep_every == 0}
+            files = sorted(os.listdir(log_dir), key=lambda name: int(name[6:-3]))
+            if files != [f"model_{it}.pt" for it in sorted(kept)]:
+                raise RuntimeError(f"Unexpected checkpoints after pruning: {files}")
+            if len(os.listdir(uploader.directory)) != len(iterations):
+                raise RuntimeError("Not all the checkpoints were uploaded.")
+
+            # the checkpoints hold the parameters at the time of the save
+            for name in files:
+                path = os.path.join(log_dir, name)
+                loaded = torch.load(path, map_location=args_cli.device, weights_only=False)["model_state_dict"]
+                if not all(torch.equal(loaded[key], value) for key, value in expected[path].items()):
+                    raise RuntimeError(f"The checkpoint {name} does not match the state at the time of the save.")
+
+            name = "asynchronous" if asynchronous else "synchronous"
+            print(f"{name:>12} {stall / num_saves * 1e3:>16.2f} {flush_time * 1e3:>17.1f} {', '.join(files)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Compare the eager and the compiled (``compile_update``) PPO update.
+
+The script collects a rollout on the synthetic environment with the default Go2Arm policy and algorithm configuration,
+then times :meth:`PPO.update` on it with the eager and the compiled mini-batch loss. The first update (which compiles
+the loss) is reported separately: with ``--cache_dir``, a second run of the script loads the compiled graphs from the
+cache instead.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_compiled_update.py --num_envs 1024 --cache_dir /tmp/ppo_compile_cache
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.env import SyntheticVecEnv  # noqa: E402
+from local_rsl_rl.runners import OnPolicyRunner  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the compiled PPO update.")
+parser.add_argument("--num_envs", type=int, default=1024, help="Number of environments.")
+parser.add_argument("--num_steps", type=int, default=24, help="Number of steps per environment.")
+parser.add_argument("--num_mini_batches", type=int, default=4, help="Number of mini-batches.")
+parser.add_argument("--num_learning_epochs", type=int, default=5, help="Number of learning epochs.")
+parser.add_argument("--num_updates", type=int, default=5, help="Number of timed updates.")
+parser.add_argument("--cache_dir", type=str, default=None, help="Directory of the compilation caches.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the environment and of the policy.")
+args_cli = parser.parse_args()
+
+
+def make_cfg(compile_update: bool) -> dict:
+    return dict(
+        num_steps_per_env=args_cli.num_steps,
+        save_interval=1000,
+        empirical_normalization=False,
+        logger="tensorboard",
+        policy=dict(
+            class_name="ActorCritic",
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+        ),
+        algorithm=dict(
+            class_name="PPO",
+            value_loss_coef=1.0,
+            use_clipped_value_loss=True,
+            clip_param=0.2,
+            entropy_coef=0.005,
+            num_learning_epochs=args_cli.num_learning_epochs,
+            num_mini_batches=args_cli.num_mini_batches,
+            learning_rate=1e-3,
+            schedule="adaptive",
+            gamma=0.99,
+            lam=0.95,
+            desired_kl=0.01,
+            max_grad_norm=1.0,
+            dagger_update_freq=20,
+            priv_reg_coef_schedual=[0, 0.1, 1500, 5000],
+            mixing_schedule=[1.0, 0, 4000],
+            eps=1e-5,
+            compile_update=compile_update,
+            compile_cache_dir=args_cli.cache_dir,
+        ),
+    )
+
+
+def main():
+    print(f"num_envs: {args_cli.num_envs}, steps: {args_cli.num_steps}, mini-batches: {args_cli.num_mini_batches}")
+    print(f"{'mode':>10} {'first [s]':>10} {'update [ms]':>12} {'speedup':>8}")
+    reference = None
+    for compile_update in [False, True]:
+        torch.manual_seed(args_cli.seed)
+        env = SyntheticVecEnv(args_cli.num_envs, seed=args_cli.seed)
+        with tempfile.TemporaryDirectory() as log_dir, contextlib.redirect_stdout(io.StringIO()):
+            runner = OnPolicyRunner(env, make_cfg(compile_update), log_dir=log_dir)
+            # one iteration to fill the storage (the storage keeps the last rollout after the update)
+            runner.learn(1)
+            alg = runner.alg
+            start = time.perf_counter()
+            alg.update()
+            first = time.perf_counter() - start
+            start = time.perf_counter()
+            for _ in range(args_cli.num_updates):
+                alg.update()
+            elapsed = (time.perf_counter() - start) / args_cli.num_updates
+        reference = elapsed if reference is None else reference
+        name = "compiled" if compile_update else "eager"
+        print(f"{name:>10} {first:>10.2f} {elapsed * 1e3:>12.1f} {reference / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
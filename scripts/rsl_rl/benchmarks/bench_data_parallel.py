@@ -0,0 +1,174 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Scaling of the data-parallel training of :class:`OnPolicyRunner` on the synthetic environment.
+
+For every number of processes, the script launches ``torchrun`` on this host. Each process trains on its own
+:class:`SyntheticVecEnv` (seeded with its global rank), on the CPU with gloo or on its GPU with NCCL. The throughput
+(environment steps per second of all the processes) is computed from the collection and update times logged by the
+first process after the warm-up iterations.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_data_parallel.py --world_sizes 1 2 4 --num_envs 256
+
+A single run can also be launched directly with ``torchrun``, e.g. on two CPU hosts:
+
+.. code-block:: bash
+
+    torchrun --nnodes 2 --nproc_per_node 4 --rdzv_backend c10d --rdzv_endpoint <host>:29400 \\
+        scripts/rsl_rl/benchmarks/bench_data_parallel.py --worker --num_envs 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.env import SyntheticVecEnv  # noqa: E402
+from local_rsl_rl.runners import OnPolicyRunner  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the data-parallel training of the runner.")
+parser.add_argument("--world_sizes", type=int, nargs="+", default=[1, 2, 4], help="Numbers of processes.")
+parser.add_argument("--num_envs", type=int, default=256, help="Number of environments per process.")
+parser.add_argument("--num_steps", type=int, default=24, help="Number of steps per environment.")
+parser.add_argument("--num_iterations", type=int, default=5, help="Number of measured learning iterations.")
+parser.add_argument("--warmup_iterations", type=int, default=1, help="Number of learning iterations before measuring.")
+parser.add_argument("--device", type=str, default="cpu", help="'cpu' (gloo) or 'cuda' (NCCL, one GPU per process).")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the environments and of the policy.")
+parser.add_argument("--worker", action="store_true", default=False, help="Run as a process of a torchrun job.")
+args_cli = parser.parse_args()
+
+
+def make_cfg() -> dict:
+    return dict(
+        num_steps_per_env=args_cli.num_steps,
+        save_interval=100000,
+        empirical_normalization=False,
+        logger="jsonl",
+        policy=dict(
+            class_name="ActorCritic",
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+        ),
+        algorithm=dict(
+            class_name="PPO",
+            value_loss_coef=1.0,
+            use_clipped_value_loss=True,
+            clip_param=0.2,
+            entropy_coef=0.005,
+            num_learning_epochs=5,
+            num_mini_batches=4,
+            learning_rate=1e-3,
+            schedule="adaptive",
+            gamma=0.99,
+            lam=0.95,
+            desired_kl=0.01,
+            max_grad_norm=1.0,
+            dagger_update_freq=20,
+            priv_reg_coef_schedual=[0, 0.1, 1500, 5000],
+            mixing_schedule=[1.0, 0, 4000],
+            eps=1e-5,
+        ),
+    )
+
+
+def run_worker():
+    """Train in one process of the torchrun job; the first process prints the measurements."""
+    rank, world_size = int(os.getenv("RANK", "0")), int(os.getenv("WORLD_SIZE", "1"))
+    device = f"cuda:{os.getenv('LOCAL_RANK', '0')}" if args_cli.device == "cuda" else "cpu"
+    torch.manual_seed(args_cli.seed + rank)
+    env = SyntheticVecEnv(
+        args_cli.num_envs, max_episode_length=1000, min_episode_length=500, seed=args_cli.seed + rank, device=device
+    )
+    with tempfile.TemporaryDirectory() as log_dir, contextlib.redirect_stdout(io.StringIO()):
+        runner = OnPolicyRunner(env, make_cfg(), log_dir=log_dir, device=device)
+        runner.learn(args_cli.warmup_iterations + args_cli.num_iterations)
+        if rank != 0:
+            return
+        runner.writer.flush()
+        times = {}
+        with open(os.path.join(log_dir, "metrics.jsonl")) as f:
+            for line in f:
+                record = json.loads(line)
+                if record["tag"].startswith("Perf/") and record["step"] >= args_cli.warmup_iterations:
+                    times.setdefault(record["tag"], []).append(record["value"])
+    collection_time = sum(times["Perf/collection time"]) / len(times["Perf/collection time"])
+    update_time = sum(times["Perf/learning_time"]) / len(times["Perf/learning_time"])
+    print(
+        json.dumps(
+            dict(
+                world_size=world_size,
+                backend=torch.distributed.get_backend() if torch.distributed.is_initialized() else None,
+                env_steps_per_s=world_size * args_cli.num_envs * args_cli.num_steps / (collection_time + update_time),
+                collection_time_s=collection_time,
+                update_time_s=update_time,
+            )
+        )
+    )
+
+
+def main():
+    if args_cli.worker:
+        run_worker()
+        return
+
+    print(f"num_envs per process: {args_cli.num_envs}, device: {args_cli.device}")
+    print(f"{'processes':>9} {'backend':>8} {'collection [s]':>15} {'update [s]':>11} {'steps/s':>9} {'speedup':>8}")
+    reference = None
+    for world_size in args_cli.world_sizes:
+        argv = [
+            f"--num_envs={args_cli.num_envs}",
+            f"--num_steps={args_cli.num_steps}",
+            f"--num_iterations={args_cli.num_iterations}",
+            f"--warmup_iterations={args_cli.warmup_iterations}",
+            f"--device={args_cli.device}",
+            f"--seed={args_cli.seed}",
+            "--worker",
+        ]
+        output = subprocess.run(
+            [
+                sys.executable,
+                "-m",
+                "torch.distributed.run",
+                "--standalone",
+                f"--nproc_per_node={world_size}",
+                os.path.abspath(__file__),
+                *argv,
+            ],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        result = json.loads(output.strip().splitlines()[-1])
+        reference = result["env_steps_per_s"] if reference is None else reference
+        print(
+            f"{world_size:>9} {result['backend'] or '-':>8} {result['collection_time_s']:>15.2f}"
+            f" {result['update_time_s']:>11.2f} {result['env_steps_per_s']:>9.0f}"
+            f" {result['env_steps_per_s'] / reference:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Elastic data-parallel training of :class:`OnPolicyRunner` with a worker that leaves and rejoins.
+
+The script starts a coordinator and ``--num_workers`` workers on this host (on the CPU, with gloo), each training on
+its own :class:`SyntheticVecEnv`. The first worker is killed at iteration ``--kill_at`` of the coordinator and a new
+worker is started at iteration ``--restart_at``: it joins the training in the next iteration and receives the training
+state from the coordinator (including the statistics of the empirical normalization, unless
+``--no_normalization``). The world size and the time of each iteration are reported, and the parameters of all the
+processes at the end of the training are compared.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_elastic.py --num_workers 2 --num_iterations 20 --kill_at 5 --restart_at 10
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.env import SyntheticVecEnv  # noqa: E402
+from local_rsl_rl.runners import OnPolicyRunner  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the elastic data-parallel training of the runner.")
+parser.add_argument("--num_workers", type=int, default=2, help="Number of workers besides the coordinator.")
+parser.add_argument("--num_envs", type=int, default=128, help="Number of environments per process.")
+parser.add_argument("--num_steps", type=int, default=24, help="Number of steps per environment.")
+parser.add_argument("--num_iterations", type=int, default=20, help="Number of learning iterations.")
+parser.add_argument("--kill_at", type=int, default=5, help="Iteration at which the first worker is killed.")
+parser.add_argument("--restart_at", type=int, default=10, help="Iteration at which a new worker is started.")
+parser.add_argument("--timeout", type=float, default=5.0, help="Timeout of the collectives in seconds.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the environments and of the policy.")
+parser.add_argument(
+    "--no_normalization", action="store_true", default=False, help="Train without the empirical normalization."
+)
+# single process of the training (internal)
+parser.add_argument("--rank", type=int, default=None, help=argparse.SUPPRESS)
+args_cli = parser.parse_args()
+
+
+def make_cfg() -> dict:
+    return dict(
+        num_steps_per_env=args_cli.num_steps,
+        save_interval=100000,
+        empirical_normalization=not args_cli.no_normalization,
+        logger="jsonl",
+        elastic_training=True,
+        elastic_timeout=args_cli.timeout,
+        policy=dict(
+            class_name="ActorCritic",
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+        ),
+        algorithm=dict(
+            class_name="PPO",
+            value_loss_coef=1.0,
+            use_clipped_value_loss=True,
+            clip_param=0.2,
+            entropy_coef=0.005,
+            num_learning_epochs=5,
+            num_mini_batches=4,
+            learning_rate=1e-3,
+            schedule="adaptive",
+            gamma=0.99,
+            lam=0.95,
+            desired_kl=0.01,
+            max_grad_norm=1.0,
+            dagger_update_freq=20,
+            priv_reg_coef_schedual=[0, 0.1, 1500, 5000],
+            mixing_schedule=[1.0, 0, 4000],
+            eps=1e-5,
+        ),
+    )
+
+
+class ProgressRunner(OnPolicyRunner):
+    """Runner that reports the world size and the time of each iteration instead of the training logs."""
+
+    def log(self, locs: dict, width: int = 80, pad: int = 35):
+        iteration_time = locs["collection_time"] + locs["learn_time"]
+        print(json.dumps(dict(iteration=locs["it"], world_size=self.gpu_world_size, time_s=iteration_time)), flush=True)
+
+
+def run_process():
+    """Train in one process and print the checksum of the final parameters."""
+    torch.set_num_threads(1)
+    torch.manual_seed(args_cli.seed + args_cli.rank)
+    env = SyntheticVecEnv(args_cli.num_envs, seed=args_cli.seed + args_cli.rank)
+    with tempfile.TemporaryDirectory() as log_dir:
+        with contextlib.redirect_stdout(io.StringIO()):
+            runner = ProgressRunner(env, make_cfg(), log_dir=log_dir)
+        runner.learn(args_cli.num_iterations)
+    parameters = torch.cat([param.detach().reshape(-1) for param in runner.alg.policy.parameters()])
+    print(
+        json.dumps(
+            dict(
+                final=True,
+                rank=runner.gpu_global_rank,
+                iteration=runner.current_learning_iteration,
+                checksum=parameters.double().sum().item(),
+            )
+        ),
+        flush=True,
+    )
+
+
+def main():
+    if args_cli.rank is not None:
+        run_process()
+        return
+
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        port = sock.getsockname()[1]
+
+    def start(rank: int) -> subprocess.Popen:
+        env = dict(os.environ, MASTER_ADDR="127.0.0.1", MASTER_PORT=str(port), RANK=str(rank), WORLD_SIZE="1")
+        argv = [
+            f"--num_envs={args_cli.num_envs}",
+            f"--num_steps={args_cli.num_steps}",
+            f"--num_iterations={args_cli.num_iterations}",
+            f"--timeout={args_cli.timeout}",
+            f"--seed={args_cli.seed}",
+            f"--rank={rank}",
+        ]
+        if args_cli.no_normalization:
+            argv.append("--no_normalization")
+        return subprocess.Popen(
+            [sys.executable, os.path.abspath(__file__), *argv], env=env, stdout=subprocess.PIPE, text=True
+        )
+
+    coordinator = start(0)
+    # the coordinator hosts the store of the training, so it starts first
+    time.sleep(2.0)
+    workers = [start(rank) for rank in range(1, args_cli.num_workers + 1)]
+
+    print(
+        f"coordinator and {args_cli.num_workers} workers, num_envs per process: {args_cli.num_envs},"
+        f" empirical normalization: {not args_cli.no_normalization}"
+    )
+    print(f"{'iteration':>9} {'processes':>9} {'time [s]':>9}  event")
+    results = []
+    for line in coordinator.stdout:
+        if not line.startswith("{"):
+            continue
+        record = json.loads(line)
+        if record.get("final"):
+            results.append(record)
+            break
+        event = ""
+        if record["iteration"] == args_cli.kill_at:
+            workers[0].send_signal(signal.SIGKILL)
+            workers[0].wait()
+            event = "worker 1 killed"
+        elif record["iteration"] == args_cli.restart_at:
+            workers.append(start(args_cli.num_workers + 1))
+            event = f"worker {args_cli.num_workers + 1} started"
+        print(f"{record['iteration']:>9} {record['world_size']:>9} {record['time_s']:>9.2f}  {event}")
+    coordinator.wait()
+
+    for worker in workers[1:]:
+        output = worker.communicate()[0]
+        results += [json.loads(line) for line in output.splitlines() if line.startswith("{")]
+    if any(process.returncode != 0 for process in [coordinator, *workers[1:]]):
+        raise RuntimeError("A process of the elastic training failed.")
+    for result in sorted(results, key=lambda result: result["rank"]):
+        print(f"rank {result['rank']}: last iteration {result['iteration']}, parameter checksum {result['checksum']:.9f}")
+    in_sync = len({result["checksum"] for result in results}) == 1
+    print(f"parameters in sync: {in_sync}")
+
+
+if __name__ == "__main__":
+    main()
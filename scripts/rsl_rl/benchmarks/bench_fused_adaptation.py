@@ -0,0 +1,130 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Compare the separate DAgger updates with the fused adaptation update (``fused_adaptation_update``).
+
+By default, every ``dagger_update_freq``-th rollout only trains the history encoder (:meth:`PPO.update_dagger`). With
+the fused update, every rollout trains both the policy and the history encoder. The script trains on the synthetic
+environment in both modes and reports the number of collected transitions that trained the policy and the history
+encoder, and the rates of these transitions per second of training.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_fused_adaptation.py --num_envs 256 --num_iterations 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.env import SyntheticVecEnv  # noqa: E402
+from local_rsl_rl.runners import OnPolicyRunner  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the fused adaptation update.")
+parser.add_argument("--num_envs", type=int, default=256, help="Number of environments.")
+parser.add_argument("--num_iterations", type=int, default=40, help="Number of learning iterations.")
+parser.add_argument("--num_steps", type=int, default=24, help="Number of steps per environment and iteration.")
+parser.add_argument("--dagger_update_freq", type=int, default=20, help="Period of the history-encoding rollouts.")
+parser.add_argument("--device", type=str, default="cpu", help="Device of the environment and of the learner.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the environment and of the policy.")
+args_cli = parser.parse_args()
+
+
+def make_cfg(fused_adaptation_update: bool) -> dict:
+    return dict(
+        num_steps_per_env=args_cli.num_steps,
+        save_interval=100000,
+        empirical_normalization=False,
+        logger="tensorboard",
+        policy=dict(
+            class_name="ActorCritic",
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+        ),
+        algorithm=dict(
+            class_name="PPO",
+            value_loss_coef=1.0,
+            use_clipped_value_loss=True,
+            clip_param=0.2,
+            entropy_coef=0.005,
+            num_learning_epochs=5,
+            num_mini_batches=4,
+            learning_rate=1e-3,
+            schedule="adaptive",
+            gamma=0.99,
+            lam=0.95,
+            desired_kl=0.01,
+            max_grad_norm=1.0,
+            dagger_update_freq=args_cli.dagger_update_freq,
+            priv_reg_coef_schedual=[0, 0.1, 1500, 5000],
+            mixing_schedule=[1.0, 0, 4000],
+            eps=1e-5,
+            fused_adaptation_update=fused_adaptation_update,
+        ),
+    )
+
+
+def count_calls(obj, name: str, counts: dict):
+    """Count the calls of a method of an object."""
+    method = getattr(obj, name)
+
+    def wrapper(*args, **kwargs):
+        counts[name] += 1
+        return method(*args, **kwargs)
+
+    setattr(obj, name, wrapper)
+
+
+def main():
+    rollout_size = args_cli.num_envs * args_cli.num_steps
+    print(f"num_envs: {args_cli.num_envs}, iterations: {args_cli.num_iterations}, device: {args_cli.device}")
+    print(
+        f"{'mode':>8} {'time [s]':>9} {'policy samples':>15} {'encoder samples':>16} {'policy samples/s':>17}"
+        f" {'encoder samples/s':>18}"
+    )
+    for fused_adaptation_update in [False, True]:
+        torch.manual_seed(args_cli.seed)
+        env = SyntheticVecEnv(
+            args_cli.num_envs, max_episode_length=1000, min_episode_length=500, seed=args_cli.seed, device=args_cli.device
+        )
+        counts = {"update": 0, "update_dagger": 0}
+        with tempfile.TemporaryDirectory() as log_dir, contextlib.redirect_stdout(io.StringIO()):
+            runner = OnPolicyRunner(env, make_cfg(fused_adaptation_update), log_dir=log_dir, device=args_cli.device)
+            count_calls(runner.alg, "update", counts)
+            count_calls(runner.alg, "update_dagger", counts)
+            start = time.perf_counter()
+            runner.learn(args_cli.num_iterations)
+            elapsed = time.perf_counter() - start
+        policy_samples = counts["update"] * rollout_size
+        # the fused update trains the history encoder on every rollout
+        encoder_samples = (counts["update"] if fused_adaptation_update else counts["update_dagger"]) * rollout_size
+        name = "fused" if fused_adaptation_update else "dagger"
+        print(
+            f"{name:>8} {elapsed:>9.2f} {policy_samples:>15} {encoder_samples:>16} {policy_samples / elapsed:>17.0f}"
+            f" {encoder_samples / elapsed:>18.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Benchmark the advantage estimation of :class:`RolloutStorage` against the reference Python loop.
+
+The script checks that both implementations agree numerically and reports the speedup for different rollout
+lengths and numbers of environments.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_gae.py --num_envs 4096 16384 65536
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.storage import RolloutStorage  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the GAE computation of the rollout storage.")
+parser.add_argument("--num_steps", type=int, nargs="+", default=[24, 48, 96], help="Rollout lengths to benchmark.")
+parser.add_argument("--num_envs", type=int, nargs="+", default=[4096, 16384, 65536], help="Numbers of environments.")
+parser.add_argument("--repeats", type=int, default=10, help="Number of timed repetitions.")
+parser.add_argument("--device", type=str, default="cpu", help="Device to run the benchmark on.")
+args_cli = parser.parse_args()
+
+
+def reference_compute_returns(storage: RolloutStorage, last_values, gamma, lam):
+    """Python loop used by the storage before the vectorized implementation."""
+    advantage = 0
+    returns = torch.zeros_like(storage.returns)
+    for step in reversed(range(storage.num_transitions_per_env)):
+        if step == storage.num_transitions_per_env - 1:
+            next_values = last_values
+        else:
+            next_values = storage.values[step + 1]
+        next_is_not_terminal = 1.0 - storage.dones[step].float()
+        delta = storage.rewards[step] + next_is_not_terminal * gamma * next_values - storage.values[step]
+        advantage = delta + next_is_not_terminal * gamma * lam * advantage
+        returns[step] = advantage + storage.values[step]
+    advantages = returns - storage.values
+    advantages = (advantages - advantages.mean()) / (advantages.std() + 1e-8)
+    return returns, advantages
+
+
+def timed(fn, repeats):
+    fn()
+    if args_cli.device.startswith("cuda"):
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for _ in range(repeats):
+        fn()
+    if args_cli.device.startswith("cuda"):
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) / repeats
+
+
+def main():
+    gamma, lam = 0.99, 0.95
+    print(f"{'T':>4} {'N':>7} {'loop [ms]':>10} {'engine [ms]':>12} {'speedup':>8} {'max abs err':>12}")
+    for num_steps in args_cli.num_steps:
+        for num_envs in args_cli.num_envs:
+            storage = RolloutStorage("rl", num_envs, num_steps, [1], None, [1], device=args_cli.device)
+            storage.rewards.normal_()
+            storage.values.normal_()
+            storage.dones.copy_(torch.rand_like(storage.dones, dtype=torch.float) < 0.02)
+            last_values = torch.randn(num_envs, 2, device=args_cli.device)
+
+            ref_returns, ref_advantages = reference_compute_returns(storage, last_values, gamma, lam)
+            storage.compute_returns(last_values, gamma, lam)
+            err = max(
+                (storage.returns - ref_returns).abs().max().item(),
+                (storage.advantages - ref_advantages).abs().max().item(),
+            )
+            if not torch.allclose(storage.returns, ref_returns, atol=1e-4, rtol=1e-5):
+                raise RuntimeError(f"Returns mismatch for T={num_steps}, N={num_envs} (max abs err: {err}).")
+
+            t_loop = timed(lambda: reference_compute_returns(storage, last_values, gamma, lam), args_cli.repeats)
+            t_engine = timed(lambda: storage.compute_returns(last_values, gamma, lam), args_cli.repeats)
+            print(
+                f"{num_steps:>4} {num_envs:>7} {t_loop * 1e3:>10.2f} {t_engine * 1e3:>12.2f}"
+                f" {t_loop / t_engine:>7.2f}x {err:>12.2e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,184 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Time the multi-process PPO update with the flat and the bucketed gradient all-reduce.
+
+The script starts ``world_size`` processes on the CPU that communicate with gloo. Each process collects a rollout on
+the synthetic environment (with its own seed) and times :meth:`PPO.update` on it, with the parameters broadcast from the
+first process. With ``flat``, the gradients form a single bucket, which is reduced after the backward pass (like a
+single all-reduce of all the gradients). With ``bucketed``, the buckets of ``--bucket_cap_mb`` are reduced during the
+backward pass. The time per mini-batch step and the time spent waiting for the reductions are reported for each world
+size.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_gradient_reduce.py --world_sizes 1 2 4 --num_envs 256
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.algorithms import PPO  # noqa: E402
+from local_rsl_rl.env import SyntheticVecEnv  # noqa: E402
+from local_rsl_rl.runners import OnPolicyRunner  # noqa: E402
+from local_rsl_rl.utils import PhaseTimer  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the gradient all-reduce of the multi-process PPO update.")
+parser.add_argument("--world_sizes", type=int, nargs="+", default=[1, 2, 4], help="Numbers of processes.")
+parser.add_argument("--num_envs", type=int, default=256, help="Number of environments per process.")
+parser.add_argument("--num_steps", type=int, default=24, help="Number of steps per environment.")
+parser.add_argument("--num_mini_batches", type=int, default=4, help="Number of mini-batches.")
+parser.add_argument("--num_updates", type=int, default=3, help="Number of timed updates.")
+parser.add_argument("--bucket_cap_mb", type=float, default=0.5, help="Size of the gradient buckets.")
+parser.add_argument("--num_threads", type=int, default=1, help="Number of intra-op threads per process.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the environment and of the policy.")
+# single process of a run (internal)
+parser.add_argument("--rank", type=int, default=None, help=argparse.SUPPRESS)
+parser.add_argument("--world_size", type=int, default=None, help=argparse.SUPPRESS)
+parser.add_argument("--init_file", type=str, default=None, help=argparse.SUPPRESS)
+parser.add_argument("--mode", type=str, default=None, help=argparse.SUPPRESS)
+args_cli = parser.parse_args()
+
+
+def make_cfg() -> dict:
+    return dict(
+        num_steps_per_env=args_cli.num_steps,
+        save_interval=100000,
+        empirical_normalization=False,
+        logger="tensorboard",
+        policy=dict(
+            class_name="ActorCritic",
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+        ),
+        algorithm=dict(
+            class_name="PPO",
+            value_loss_coef=1.0,
+            use_clipped_value_loss=True,
+            clip_param=0.2,
+            entropy_coef=0.005,
+            num_learning_epochs=5,
+            num_mini_batches=args_cli.num_mini_batches,
+            learning_rate=1e-3,
+            schedule="adaptive",
+            gamma=0.99,
+            lam=0.95,
+            desired_kl=0.01,
+            max_grad_norm=1.0,
+            dagger_update_freq=20,
+            priv_reg_coef_schedual=[0, 0.1, 1500, 5000],
+            mixing_schedule=[1.0, 0, 4000],
+            eps=1e-5,
+        ),
+    )
+
+
+def run_process() -> dict:
+    """Time the update in one process of a run."""
+    torch.set_num_threads(args_cli.num_threads)
+    torch.distributed.init_process_group(
+        "gloo", init_method=f"file://{args_cli.init_file}", rank=args_cli.rank, world_size=args_cli.world_size
+    )
+    # collect a rollout with a single-process runner (the storage keeps the last rollout after the update)
+    torch.manual_seed(args_cli.seed)
+    env = SyntheticVecEnv(args_cli.num_envs, seed=args_cli.seed + args_cli.rank)
+    with tempfile.TemporaryDirectory() as log_dir, contextlib.redirect_stdout(io.StringIO()):
+        runner = OnPolicyRunner(env, make_cfg(), log_dir=log_dir)
+        runner.learn(1)
+
+    # multi-process algorithm on the same policy and rollout
+    alg_cfg = make_cfg()["algorithm"]
+    del alg_cfg["class_name"]
+    multi_gpu_cfg = {"global_rank": args_cli.rank, "local_rank": args_cli.rank, "world_size": args_cli.world_size}
+    bucket_cap_mb = float("inf") if args_cli.mode == "flat" else args_cli.bucket_cap_mb
+    alg = PPO(runner.alg.policy, multi_gpu_cfg=multi_gpu_cfg, grad_bucket_cap_mb=bucket_cap_mb, **alg_cfg)
+    alg.storage = runner.alg.storage
+    alg.broadcast_parameters()
+    alg.timer = PhaseTimer(alg.device, enabled=True)
+
+    alg.update()
+    alg.timer.end_iteration(0)
+    torch.distributed.barrier()
+    reduce_time = 0.0
+    start = time.perf_counter()
+    for it in range(args_cli.num_updates):
+        alg.update()
+        reduce_time += alg.timer.end_iteration(it + 1).get("all_reduce", 0.0)
+    elapsed = time.perf_counter() - start
+    torch.distributed.destroy_process_group()
+    num_steps = args_cli.num_updates * alg.num_learning_epochs * alg.num_mini_batches
+    return dict(
+        num_buckets=len(alg.grad_reducer.buckets),
+        step_time_ms=elapsed / num_steps * 1e3,
+        reduce_wait_ms=reduce_time / num_steps,
+    )
+
+
+def main():
+    if args_cli.rank is not None:
+        result = run_process()
+        if args_cli.rank == 0:
+            print(json.dumps(result))
+        return
+
+    print(f"num_envs per process: {args_cli.num_envs}, bucket size: {args_cli.bucket_cap_mb} MB")
+    print(f"{'processes':>9} {'mode':>9} {'buckets':>8} {'step [ms]':>10} {'reduce wait [ms]':>17}")
+    for world_size in args_cli.world_sizes:
+        for mode in ["flat", "bucketed"]:
+            with tempfile.TemporaryDirectory() as tmp_dir:
+                argv = [
+                    f"--num_envs={args_cli.num_envs}",
+                    f"--num_steps={args_cli.num_steps}",
+                    f"--num_mini_batches={args_cli.num_mini_batches}",
+                    f"--num_updates={args_cli.num_updates}",
+                    f"--bucket_cap_mb={args_cli.bucket_cap_mb}",
+                    f"--num_threads={args_cli.num_threads}",
+                    f"--seed={args_cli.seed}",
+                    f"--world_size={world_size}",
+                    f"--init_file={os.path.join(tmp_dir, 'init')}",
+                    f"--mode={mode}",
+                ]
+                processes = [
+                    subprocess.Popen(
+                        [sys.executable, os.path.abspath(__file__), f"--rank={rank}", *argv],
+                        stdout=subprocess.PIPE,
+                        text=True,
+                    )
+                    for rank in range(world_size)
+                ]
+                outputs = [process.communicate()[0] for process in processes]
+                if any(process.returncode != 0 for process in processes):
+                    raise RuntimeError(f"A process of the run with {world_size} processes failed.")
+            result = json.loads(outputs[0].strip().splitlines()[-1])
+            print(
+                f"{world_size:>9} {mode:>9} {result['num_buckets']:>8} {result['step_time_ms']:>10.1f}"
+                f" {result['reduce_wait_ms']:>17.2f}"
+            )
+
+
+if __name__ == "__main__":
+    main()
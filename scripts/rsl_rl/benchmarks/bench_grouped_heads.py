@@ -0,0 +1,139 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Cost of the separate and of the grouped leg/arm control heads of :class:`ActorCritic`.
+
+The script builds the policy with the separate heads (two ``nn.Sequential`` per network) and with the grouped heads
+(:class:`GroupedMLP`, one matrix product per layer) from the same seed, checks that the actions, the values and the
+gradients are the same and reports:
+
+- the time of the forward pass of the actor and critic heads under inference mode (rollout batch sizes),
+- the time of the forward and backward passes of the actor and critic heads (mini-batch sizes of the update).
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_grouped_heads.py --batch_sizes 4096 24576 65536 --device cuda
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.modules import ActorCritic  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the grouped control heads of the actor-critic.")
+parser.add_argument("--batch_sizes", type=int, nargs="+", default=[4096, 24576, 65536], help="Batch sizes.")
+parser.add_argument("--num_repeats", type=int, default=10, help="Number of timed passes.")
+parser.add_argument("--device", type=str, default="cpu", help="Device of the policy.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the policy and of the inputs.")
+args_cli = parser.parse_args()
+
+
+def make_policy(grouped_heads: bool) -> ActorCritic:
+    torch.manual_seed(args_cli.seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        policy = ActorCritic(
+            70,
+            70,
+            27,
+            18,
+            10,
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+            grouped_heads=grouped_heads,
+        )
+    return policy.to(args_cli.device)
+
+
+def heads(policy: ActorCritic):
+    """Return the function that evaluates the actor and critic heads on the backbone outputs."""
+    if policy.grouped_heads:
+        return lambda actor_out, critic_out: (
+            policy.actor.control_heads(actor_out),
+            policy.critic.control_heads(critic_out),
+        )
+
+    def separate(actor_out, critic_out):
+        actions = torch.cat(
+            [policy.actor.actor_leg_control_head(actor_out), policy.actor.actor_arm_control_head(actor_out)], dim=-1
+        )
+        values = torch.cat(
+            [policy.critic.critic_leg_control_head(critic_out), policy.critic.critic_arm_control_head(critic_out)],
+            dim=-1,
+        )
+        return actions, values
+
+    return separate
+
+
+def synchronize():
+    if torch.device(args_cli.device).type == "cuda":
+        torch.cuda.synchronize()
+
+
+def time_pass(function) -> float:
+    function()
+    synchronize()
+    start = time.perf_counter()
+    for _ in range(args_cli.num_repeats):
+        function()
+    synchronize()
+    return (time.perf_counter() - start) / args_cli.num_repeats * 1e3
+
+
+def main():
+    policies = {"separate": make_policy(False), "grouped": make_policy(True)}
+    generator = torch.Generator(device=args_cli.device).manual_seed(args_cli.seed)
+
+    # same actions, values and gradients on the whole policy
+    obs = torch.randn(1024, 70 * 10 + 27, generator=generator, device=args_cli.device)
+    outputs, gradient_norms = {}, {}
+    for name, policy in policies.items():
+        actions, values = policy.act_inference(obs), policy.evaluate(obs)
+        (actions.square().sum() + values.square().sum()).backward()
+        outputs[name] = torch.cat([actions, values], dim=-1)
+        gradient_norms[name] = torch.nn.utils.clip_grad_norm_(policy.parameters(), float("inf")).item()
+    difference = (outputs["separate"] - outputs["grouped"]).abs().max().item()
+    print(f"device: {args_cli.device}, max output difference: {difference:.1e}")
+    print(f"gradient norms: separate {gradient_norms['separate']:.6f}, grouped {gradient_norms['grouped']:.6f}")
+
+    print(f"{'batch':>6} {'heads':>8} {'forward [ms]':>12} {'fwd+bwd [ms]':>12}")
+    for batch_size in args_cli.batch_sizes:
+        actor_out = torch.randn(batch_size, 256, generator=generator, device=args_cli.device)
+        critic_out = torch.randn(batch_size, 256, generator=generator, device=args_cli.device)
+        for name, policy in policies.items():
+            evaluate = heads(policy)
+
+            def forward():
+                with torch.inference_mode():
+                    evaluate(actor_out, critic_out)
+
+            def forward_backward():
+                actions, values = evaluate(actor_out, critic_out)
+                (actions.sum() + values.sum()).backward()
+
+            print(f"{batch_size:>6} {name:>8} {time_pass(forward):>12.3f} {time_pass(forward_backward):>12.3f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Measure the time the metrics writer blocks the training loop, with and without :class:`AsyncMetricsWriter`.
+
+The remote loggers (W&B, Neptune) can block on every ``add_scalar``. The script replaces them with a local stand-in
+writer that sleeps for a fixed latency per scalar and reports the time spent in the logging calls of the training
+thread for the synchronous writer and the asynchronous writer. It also checks that the asynchronous writer delivers
+every scalar once it is closed.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_metrics_writer.py --latency_ms 2
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.utils import AsyncMetricsWriter  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the blocking time of the metrics writer.")
+parser.add_argument("--num_iterations", type=int, default=50, help="Number of logged iterations.")
+parser.add_argument("--num_scalars", type=int, default=20, help="Number of scalars logged per iteration.")
+parser.add_argument("--latency_ms", type=float, default=2.0, help="Latency of the stand-in writer per scalar.")
+parser.add_argument("--iteration_ms", type=float, default=50.0, help="Duration of the work of an iteration.")
+args_cli = parser.parse_args()
+
+
+class LatencyWriter:
+    """Stand-in for a remote writer that blocks for a fixed time on every scalar."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.scalars = []
+
+    def add_scalar(self, tag, scalar_value, global_step=None, walltime=None, new_style=False):
+        time.sleep(self.latency)
+        self.scalars.append((tag, scalar_value, global_step))
+
+    def flush(self):
+        pass
+
+
+def train(writer, asynchronous: bool) -> float:
+    """Run the iterations and return the time spent in the logging calls."""
+    blocked = 0.0
+    for it in range(args_cli.num_iterations):
+        # work of the iteration (rollout and update)
+        time.sleep(args_cli.iteration_ms * 1e-3)
+        values = torch.randn(args_cli.num_scalars)
+        start = time.perf_counter()
+        for i in range(args_cli.num_scalars):
+            writer.add_scalar(f"Metric/{i}", values[i] if asynchronous else values[i].item(), it)
+        if asynchronous:
+            writer.print(lambda it=it: f"Learning iteration {it}")
+            writer.commit()
+        else:
+            print(f"Learning iteration {it}")
+        blocked += time.perf_counter() - start
+    return blocked
+
+
+def main():
+    latency = args_cli.latency_ms * 1e-3
+    num_scalars = args_cli.num_iterations * args_cli.num_scalars
+
+    sync_writer = LatencyWriter(latency)
+    with contextlib.redirect_stdout(io.StringIO()):
+        sync_blocked = train(sync_writer, asynchronous=False)
+
+    async_writer = AsyncMetricsWriter(LatencyWriter(latency))
+    with contextlib.redirect_stdout(io.StringIO()):
+        async_blocked = train(async_writer, asynchronous=True)
+        start = time.perf_counter()
+        async_writer.close()
+        close_time = time.perf_counter() - start
+
+    delivered = len(async_writer.writer.scalars)
+    if async_writer.num_dropped == 0 and delivered != num_scalars:
+        raise RuntimeError(f"The asynchronous writer delivered {delivered} of {num_scalars} scalars.")
+
+    print(f"iterations: {args_cli.num_iterations}, scalars per iteration: {args_cli.num_scalars}")
+    print(f"latency per scalar: {args_cli.latency_ms:.1f} ms, work per iteration: {args_cli.iteration_ms:.1f} ms")
+    print(f"{'writer':>12} {'blocked [ms/it]':>16} {'delivered':>10} {'dropped':>8}")
+    print(
+        f"{'synchronous':>12} {sync_blocked / args_cli.num_iterations * 1e3:>16.3f} {len(sync_writer.scalars):>10}"
+        f" {0:>8}"
+    )
+    print(
+        f"{'asynchronous':>12} {async_blocked / args_cli.num_iterations * 1e3:>16.3f} {delivered:>10}"
+        f" {async_writer.num_dropped:>8}"
+    )
+    print(f"final flush on close: {close_time * 1e3:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Benchmark the throughput of the feedforward mini-batch generators of :class:`RolloutStorage`.
+
+The default arguments correspond to the flat Go2Arm configuration (24 steps per environment, 5 learning epochs
+and 4 mini-batches). Each yielded mini-batch is consumed by a linear layer on the observations so that the cost of
+reading strided views is accounted for.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_mini_batches.py --num_envs 4096
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.storage import RolloutStorage  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the mini-batch generators of the rollout storage.")
+parser.add_argument("--num_envs", type=int, default=4096, help="Number of environments.")
+parser.add_argument("--num_steps", type=int, default=24, help="Number of steps per environment.")
+parser.add_argument("--num_epochs", type=int, default=5, help="Number of learning epochs.")
+parser.add_argument("--num_mini_batches", type=int, default=4, help="Number of mini-batches.")
+parser.add_argument("--num_obs", type=int, default=727, help="Dimension of the policy observations.")
+parser.add_argument("--num_actions", type=int, default=18, help="Dimension of the actions.")
+parser.add_argument("--repeats", type=int, default=5, help="Number of timed repetitions.")
+parser.add_argument("--device", type=str, default="cpu", help="Device to run the benchmark on.")
+args_cli = parser.parse_args()
+
+
+def run(storage: RolloutStorage, generator_name: str, layer: torch.nn.Module):
+    generator = getattr(storage, generator_name)(args_cli.num_mini_batches, args_cli.num_epochs)
+    for obs_batch, critic_obs_batch, actions_batch, *_ in generator:
+        layer(obs_batch)
+    if args_cli.device.startswith("cuda"):
+        torch.cuda.synchronize()
+
+
+def main():
+    storage = RolloutStorage(
+        "rl",
+        args_cli.num_envs,
+        args_cli.num_steps,
+        [args_cli.num_obs],
+        [args_cli.num_obs],
+        [args_cli.num_actions],
+        device=args_cli.device,
+    )
+    for name, value in vars(storage).items():
+        if isinstance(value, torch.Tensor) and value.is_floating_point():
+            value.normal_()
+    layer = torch.nn.Linear(args_cli.num_obs, 256, device=args_cli.device)
+    num_samples = args_cli.num_envs * args_cli.num_steps * args_cli.num_epochs
+
+    results = {}
+    with torch.inference_mode():
+        for generator_name in ["mini_batch_generator", "packed_mini_batch_generator"]:
+            run(storage, generator_name, layer)
+            start = time.perf_counter()
+            for _ in range(args_cli.repeats):
+                run(storage, generator_name, layer)
+            results[generator_name] = (time.perf_counter() - start) / args_cli.repeats
+
+    baseline = results["mini_batch_generator"]
+    for generator_name, elapsed in results.items():
+        print(
+            f"{generator_name:>30}: {elapsed * 1e3:8.2f} ms/update"
+            f" {num_samples / elapsed / 1e6:8.2f} M samples/s {baseline / elapsed:6.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
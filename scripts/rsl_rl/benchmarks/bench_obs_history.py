@@ -0,0 +1,171 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Observations and memory of the rollout storage with the history rebuilt by the runner.
+
+The script trains on :class:`SyntheticVecEnv` with the single-frame observations (``obs_history_length``), without
+and with the empirical normalization. For every rollout, it compares the observations rebuilt by the storage
+(:meth:`RolloutStorage.rollout_observations`) with the observations the policy acted on and reports the largest
+difference (the history windows must be the same, including the normalization of every slot) and the memory of the
+observation buffers of the storage.
+
+The checkpoint of the training with the normalization is then loaded by a runner on an environment that emits the
+history (like ``play.py``, which keeps the history of the observation manager), and the actions of both runners on the
+same observations are compared.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_obs_history.py --num_envs 4096 --device cuda
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.env import SyntheticVecEnv  # noqa: E402
+from local_rsl_rl.runners import OnPolicyRunner  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Check the observations rebuilt by the rollout storage.")
+parser.add_argument("--num_envs", type=int, default=256, help="Number of environments.")
+parser.add_argument("--num_steps", type=int, default=24, help="Number of steps per environment.")
+parser.add_argument("--num_history", type=int, default=10, help="Length of the history rebuilt by the runner.")
+parser.add_argument("--num_iterations", type=int, default=3, help="Number of training iterations.")
+parser.add_argument("--device", type=str, default="cpu", help="Device of the environment and of the policy.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the environment and of the policy.")
+args_cli = parser.parse_args()
+
+
+def make_cfg(empirical_normalization: bool) -> dict:
+    return dict(
+        num_steps_per_env=args_cli.num_steps,
+        save_interval=100000,
+        empirical_normalization=empirical_normalization,
+        obs_history_length=args_cli.num_history,
+        logger="tensorboard",
+        policy=dict(
+            class_name="ActorCritic",
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+        ),
+        algorithm=dict(
+            class_name="PPO",
+            value_loss_coef=1.0,
+            use_clipped_value_loss=True,
+            clip_param=0.2,
+            entropy_coef=0.005,
+            num_learning_epochs=1,
+            num_mini_batches=4,
+            learning_rate=1e-3,
+            schedule="adaptive",
+            gamma=0.99,
+            lam=0.95,
+            desired_kl=0.01,
+            max_grad_norm=1.0,
+            dagger_update_freq=2,
+            priv_reg_coef_schedual=[0, 0.1, 1500, 5000],
+            mixing_schedule=[1.0, 0, 4000],
+            eps=1e-5,
+        ),
+    )
+
+
+def run(empirical_normalization: bool) -> tuple[OnPolicyRunner, list[float], float]:
+    torch.manual_seed(args_cli.seed)
+    # short episodes, so the windows of the rollouts cross resets
+    env = SyntheticVecEnv(
+        args_cli.num_envs,
+        num_history=args_cli.num_history,
+        min_episode_length=5,
+        max_episode_length=30,
+        single_frame=True,
+        seed=args_cli.seed,
+        device=args_cli.device,
+    )
+    with tempfile.TemporaryDirectory() as log_dir, contextlib.redirect_stdout(io.StringIO()):
+        runner = OnPolicyRunner(env, make_cfg(empirical_normalization), log_dir=log_dir, device=args_cli.device)
+    alg = runner.alg
+    acted_obs, differences = [], []
+
+    # record the observations of the policy and compare them with the storage before every update
+    def recorded_act(obs, critic_obs, hist_encoding=False, act=alg.act):
+        acted_obs.append(obs.clone())
+        return act(obs, critic_obs, hist_encoding)
+
+    def checked_update(update):
+        def wrapper(*args, **kwargs):
+            rebuilt = alg.storage.rollout_observations()
+            differences.append((rebuilt - torch.stack(acted_obs)).abs().max().item())
+            acted_obs.clear()
+            return update(*args, **kwargs)
+
+        return wrapper
+
+    alg.act = recorded_act
+    alg.update = checked_update(alg.update)
+    alg.update_dagger = checked_update(alg.update_dagger)
+    with contextlib.redirect_stdout(io.StringIO()):
+        runner.learn(args_cli.num_iterations)
+
+    storage = alg.storage
+    buffers = [storage.observations, storage.history_prefix, storage.history_mean, storage.history_denominator]
+    memory = sum(buffer.numel() * buffer.element_size() for buffer in buffers if buffer is not None) / 2**20
+    return runner, differences, memory
+
+
+def round_trip(runner: OnPolicyRunner) -> tuple[int, float]:
+    """Load the checkpoint of a single-frame training in a runner on an environment that emits the history."""
+    env = SyntheticVecEnv(
+        args_cli.num_envs, num_history=args_cli.num_history, seed=args_cli.seed + 1, device=args_cli.device
+    )
+    with tempfile.TemporaryDirectory() as log_dir, contextlib.redirect_stdout(io.StringIO()):
+        path = os.path.join(log_dir, "model.pt")
+        runner.save(path)
+        loaded_runner = OnPolicyRunner(env, make_cfg(True), log_dir=None, device=args_cli.device)
+        loaded_runner.load(path)
+    runner.eval_mode()
+    loaded_runner.eval_mode()
+
+    # the frames of the history of the environment, reordered and normalized by each runner
+    obs = env.get_observations()[0]
+    with torch.inference_mode():
+        loaded_actions = loaded_runner.alg.policy.act_inference(loaded_runner.process_obs(obs), hist_encoding=True)
+        frames = loaded_runner.obs_reorder.indices[: args_cli.num_history * env.num_prop]
+        extra = obs[:, args_cli.num_history * env.num_prop :]
+        actions = runner.alg.policy.act_inference(
+            runner.obs_normalizer(torch.cat([obs[:, frames], extra], dim=-1)), hist_encoding=True
+        )
+    return loaded_runner.obs_normalizer._mean.shape[-1], (loaded_actions - actions).abs().max().item()
+
+
+def main():
+    print(f"envs: {args_cli.num_envs}, steps: {args_cli.num_steps}, history: {args_cli.num_history}")
+    print(f"{'normalization':>13} {'observations [MiB]':>18}  max |rebuilt - acted| per rollout")
+    for empirical_normalization in [False, True]:
+        runner, differences, memory = run(empirical_normalization)
+        print(f"{str(empirical_normalization):>13} {memory:>18.2f}  {', '.join(f'{d:.1e}' for d in differences)}")
+    num_normalized, difference = round_trip(runner)
+    print(f"reloaded on history observations: {num_normalized} normalized values, max action diff {difference:.1e}")
+
+
+if __name__ == "__main__":
+    main()
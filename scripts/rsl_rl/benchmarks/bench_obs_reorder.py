@@ -0,0 +1,164 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Benchmark the observation reorder of the runner against the previous implementation.
+
+The previous implementation indexed the observations with a float NumPy array once per history frame, grew the
+reordered observations with :func:`torch.cat` and reallocated its buffer at every step. The script checks that both
+implementations produce the same (normalized) observations and reports the time per environment step.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_obs_reorder.py --num_envs 4096 --device cuda:0
+"""
+
+from __future__ import annotations
+
+import argparse
+import numpy as np
+import os
+import sys
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.modules import EmpiricalNormalization  # noqa: E402
+from local_rsl_rl.utils import ObservationReorder  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the observation reorder of the runner.")
+parser.add_argument("--num_envs", type=int, default=4096, help="Number of environments.")
+parser.add_argument("--num_history", type=int, default=10, help="Length of the observation history.")
+parser.add_argument("--num_steps", type=int, default=1000, help="Number of timed environment steps.")
+parser.add_argument("--device", type=str, default="cpu", help="Device to run the benchmark on.")
+args_cli = parser.parse_args()
+
+# proprioceptive terms (values per frame) followed by the privileged terms of the Go2Arm policy observations
+PROP_TERMS = {
+    "policy-base_ang_vel": 3,
+    "policy-projected_gravity": 3,
+    "policy-joint_pos": 18,
+    "policy-joint_vel": 18,
+    "policy-actions": 18,
+    "policy-velocity_commands": 3,
+    "policy-pose_command": 7,
+}
+PRIV_TERMS = {
+    "policy-priv_base_lin_vel": 3,
+    "policy-priv_mass_base": 1,
+    "policy-priv_friction": 1,
+    "policy-priv_feet_contact": 4,
+    "policy-priv_arm_torques": 18,
+}
+
+
+class ReferenceReorder:
+    """Reorder of :class:`OnPolicyRunner` before the precompiled permutation."""
+
+    def __init__(self, term_names, term_lengths, num_envs, num_hist, num_prop, normalizer, device):
+        self.num_envs = num_envs
+        self.num_history = num_hist
+        self.num_prop = num_prop
+        self.obs_normalizer = normalizer
+        self.device = device
+
+        self.total = np.zeros((self.num_history, self.num_prop))
+        self.obs_new = torch.zeros(self.num_envs, self.num_prop * self.num_history).to(self.device)
+
+        lst = [item for item in term_names if not item.startswith("policy-priv_")]
+        length = term_lengths
+        result_dict = {}
+        for i in range(len(lst)):
+            c = np.array(list(range(sum(length[: i + 1]) - int(length[i] / self.num_history), sum(length[: i + 1]))))
+            result_dict[lst[i]] = c
+
+        key_list = list(result_dict.keys())
+        a1_list = []
+        for i in range(self.num_history):
+            for j in range(len(lst)):
+                a1 = np.concatenate([result_dict[key_list[j]] - (i) * result_dict[key_list[j]].shape[0]])
+                a1_list.append(a1)
+                if j == len(lst) - 1:
+                    a1_list = np.concatenate(a1_list)
+                    self.total[i, :] = a1_list
+                    a1_list = []
+
+    def __call__(self, obs):
+        for i in range(self.num_history):
+            obs_1 = obs[:, self.total[i, :]]
+            self.obs_new = torch.cat([self.obs_new, obs_1], dim=-1)
+        obs = torch.cat(
+            [self.obs_new[:, self.num_prop * self.num_history :], obs[:, self.num_prop * self.num_history :]], dim=-1
+        )
+        obs = self.obs_normalizer(obs)
+        self.obs_new = torch.zeros(self.num_envs, self.num_prop * self.num_history).to(self.device)
+        return obs
+
+
+def time_steps(reorder, observations) -> float:
+    if args_cli.device.startswith("cuda"):
+        torch.cuda.synchronize()
+    start = time.perf_counter()
+    for obs in observations:
+        reorder(obs)
+    if args_cli.device.startswith("cuda"):
+        torch.cuda.synchronize()
+    return (time.perf_counter() - start) / len(observations)
+
+
+def main():
+    term_names = list(PROP_TERMS) + list(PRIV_TERMS)
+    term_lengths = [length * args_cli.num_history for length in PROP_TERMS.values()] + list(PRIV_TERMS.values())
+    num_prop = sum(PROP_TERMS.values())
+    num_obs = sum(term_lengths)
+    # a handful of distinct observation tensors, reused cyclically
+    observations = [torch.randn(args_cli.num_envs, num_obs, device=args_cli.device) for _ in range(8)]
+    observations = [observations[i % len(observations)] for i in range(args_cli.num_steps)]
+
+    print(f"num_envs: {args_cli.num_envs}, num_obs: {num_obs}, num_steps: {args_cli.num_steps}")
+    print(f"{'normalizer':>10} {'reference [us]':>15} {'reorder [us]':>13} {'speedup':>8}")
+    for empirical_normalization in [False, True]:
+        timings = {}
+        outputs = {}
+        for name in ["reference", "reorder"]:
+            if empirical_normalization:
+                normalizer = EmpiricalNormalization(shape=[num_obs], until=1.0e8).to(args_cli.device)
+            else:
+                normalizer = torch.nn.Identity()
+            if name == "reference":
+                reorder = ReferenceReorder(
+                    term_names,
+                    term_lengths,
+                    args_cli.num_envs,
+                    args_cli.num_history,
+                    num_prop,
+                    normalizer,
+                    args_cli.device,
+                )
+            else:
+                reorder = ObservationReorder(
+                    term_names,
+                    term_lengths,
+                    args_cli.num_envs,
+                    args_cli.num_history,
+                    num_prop,
+                    normalizer=normalizer if empirical_normalization else None,
+                    device=args_cli.device,
+                )
+            # both implementations see the same observations, so the normalizers follow the same statistics
+            with torch.inference_mode():
+                outputs[name] = [reorder(obs).clone() for obs in observations[:4]]
+                timings[name] = time_steps(reorder, observations)
+
+        if not all(torch.allclose(a, b, atol=1e-6) for a, b in zip(outputs["reference"], outputs["reorder"])):
+            raise RuntimeError(f"Reordered observations mismatch (empirical_normalization={empirical_normalization}).")
+        print(
+            f"{str(empirical_normalization):>10} {timings['reference'] * 1e6:>15.1f} {timings['reorder'] * 1e6:>13.1f}"
+            f" {timings['reference'] / timings['reorder']:>7.2f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,106 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Compare the throughput of the sequential and the pipelined rollout and update of :class:`OnPolicyRunner`.
+
+The script trains on the synthetic environment with a step that blocks for a configurable latency (like a simulator
+stepping on another device) and reports the collected steps per second with and without ``pipelined_updates``.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_pipelined_updates.py --num_envs 256 --step_latency_ms 40
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import tempfile
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.env import SyntheticVecEnv  # noqa: E402
+from local_rsl_rl.runners import OnPolicyRunner  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the pipelined rollout and update of the runner.")
+parser.add_argument("--num_envs", type=int, default=256, help="Number of environments.")
+parser.add_argument("--num_iterations", type=int, default=10, help="Number of learning iterations.")
+parser.add_argument("--num_steps", type=int, default=24, help="Number of steps per environment and iteration.")
+parser.add_argument("--step_latency_ms", type=float, default=40.0, help="Latency of an environment step.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the environment and of the policy.")
+args_cli = parser.parse_args()
+
+
+def make_cfg(pipelined_updates: bool) -> dict:
+    return dict(
+        num_steps_per_env=args_cli.num_steps,
+        save_interval=1000,
+        empirical_normalization=False,
+        logger="tensorboard",
+        pipelined_updates=pipelined_updates,
+        policy=dict(
+            class_name="ActorCritic",
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+        ),
+        algorithm=dict(
+            class_name="PPO",
+            value_loss_coef=1.0,
+            use_clipped_value_loss=True,
+            clip_param=0.2,
+            entropy_coef=0.005,
+            num_learning_epochs=5,
+            num_mini_batches=4,
+            learning_rate=1e-3,
+            schedule="adaptive",
+            gamma=0.99,
+            lam=0.95,
+            desired_kl=0.01,
+            max_grad_norm=1.0,
+            dagger_update_freq=20,
+            priv_reg_coef_schedual=[0, 0.1, 1500, 5000],
+            mixing_schedule=[1.0, 0, 4000],
+            eps=1e-5,
+        ),
+    )
+
+
+def main():
+    num_steps = args_cli.num_envs * args_cli.num_steps * args_cli.num_iterations
+    print(f"num_envs: {args_cli.num_envs}, step latency: {args_cli.step_latency_ms:.1f} ms")
+    print(f"{'mode':>10} {'time [s]':>9} {'steps/s':>9} {'speedup':>8}")
+    reference = None
+    for pipelined_updates in [False, True]:
+        torch.manual_seed(args_cli.seed)
+        env = SyntheticVecEnv(
+            args_cli.num_envs, max_episode_length=100, step_latency=args_cli.step_latency_ms * 1e-3, seed=args_cli.seed
+        )
+        with tempfile.TemporaryDirectory() as log_dir, contextlib.redirect_stdout(io.StringIO()):
+            runner = OnPolicyRunner(env, make_cfg(pipelined_updates), log_dir=log_dir)
+            start = time.perf_counter()
+            runner.learn(args_cli.num_iterations)
+            elapsed = time.perf_counter() - start
+        reference = elapsed if reference is None else reference
+        name = "pipelined" if pipelined_updates else "sequential"
+        print(f"{name:>10} {elapsed:>9.2f} {num_steps / elapsed:>9.0f} {reference / elapsed:>7.2f}x")
+
+
+if __name__ == "__main__":
+    main()
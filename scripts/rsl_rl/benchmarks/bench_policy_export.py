@@ -0,0 +1,135 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Latency of the exported policy and cost of its export.
+
+The script trains nothing: it builds the policy and a normalizer with random statistics for the observations of
+:class:`SyntheticVecEnv`, exports them with :func:`export_policy` and reports:
+
+- the largest difference between the actions of the TorchScript artifact and the ones of the eager inference,
+- the median latency per step of the eager inference (reorder, normalizer and :meth:`ActorCritic.act_inference`) and
+  of the TorchScript artifact on the observations of the manager,
+- the time of the export and of a second call with the same checkpoint (cache hit).
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_policy_export.py --num_envs 1 16 256 --grouped_heads
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import tempfile
+import time
+import torch
+import warnings
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.env import SyntheticVecEnv  # noqa: E402
+from local_rsl_rl.modules import ActorCritic, EmpiricalNormalization  # noqa: E402
+from local_rsl_rl.utils import ObservationReorder, export_policy  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the exported policy.")
+parser.add_argument("--num_envs", type=int, nargs="+", default=[1, 16, 256], help="Numbers of environments.")
+parser.add_argument("--num_steps", type=int, default=500, help="Number of timed steps.")
+parser.add_argument("--num_threads", type=int, default=1, help="Number of CPU threads (deployment uses one).")
+parser.add_argument("--grouped_heads", action="store_true", default=False, help="Build the policy with grouped heads.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the policy and of the observations.")
+args_cli = parser.parse_args()
+
+
+def make_policy(env: SyntheticVecEnv) -> ActorCritic:
+    torch.manual_seed(args_cli.seed)
+    with contextlib.redirect_stdout(io.StringIO()):
+        policy = ActorCritic(
+            env.num_prop,
+            env.num_prop,
+            env.num_priv,
+            env.num_actions,
+            env.num_history,
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+            grouped_heads=args_cli.grouped_heads,
+        )
+    return policy.eval()
+
+
+def median_latency(function, obs: torch.Tensor) -> float:
+    times = []
+    for step in range(args_cli.num_steps + 10):
+        start = time.perf_counter()
+        function(obs)
+        if step >= 10:
+            times.append(time.perf_counter() - start)
+    return statistics.median(times) * 1e6
+
+
+@torch.inference_mode()
+def main():
+    torch.set_num_threads(args_cli.num_threads)
+    env = SyntheticVecEnv(1, seed=args_cli.seed)
+    policy = make_policy(env)
+    obs_reorder = ObservationReorder.from_env(env, keep_extra=False)
+    # the normalizer of the runner reads the observations of the policy with the privileged terms
+    normalizer = EmpiricalNormalization(shape=[ObservationReorder.from_env(env).num_output]).eval()
+    generator = torch.Generator().manual_seed(args_cli.seed)
+    normalizer._mean.copy_(torch.randn(normalizer._mean.shape, generator=generator))
+    normalizer._std.copy_(torch.rand(normalizer._std.shape, generator=generator) + 0.1)
+    num_frames = obs_reorder.num_output
+
+    with tempfile.TemporaryDirectory() as path:
+        checkpoint_path = os.path.join(path, "model.pt")
+        torch.save({"model_state_dict": policy.state_dict()}, checkpoint_path)
+        times = []
+        for _ in range(2):
+            start = time.perf_counter()
+            with contextlib.redirect_stdout(io.StringIO()), warnings.catch_warnings():
+                warnings.simplefilter("ignore")
+                paths = export_policy(policy, obs_reorder, path, normalizer=normalizer, checkpoint_path=checkpoint_path)
+            times.append(time.perf_counter() - start)
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore")
+            exported = torch.jit.load(paths["jit"])
+
+    print(f"threads: {args_cli.num_threads}, grouped heads: {args_cli.grouped_heads}, formats: {sorted(paths)}")
+    print(f"export: {times[0] * 1e3:.1f} ms, cache hit: {times[1] * 1e3:.1f} ms")
+    print(f"{'num_envs':>8} {'eager [us]':>10} {'jit [us]':>10} {'speedup':>7} {'max diff':>8}")
+    for num_envs in args_cli.num_envs:
+        # the reorder writes to a buffer of the number of environments
+        env = SyntheticVecEnv(num_envs, seed=args_cli.seed)
+        obs_reorder = ObservationReorder.from_env(env, keep_extra=False)
+        obs = env.get_observations()[0]
+
+        def eager(obs):
+            frames = obs_reorder(obs)
+            frames = (frames - normalizer._mean[:, :num_frames]) / (normalizer._std[:, :num_frames] + normalizer.eps)
+            return policy.act_inference(frames, hist_encoding=True)
+
+        difference = (exported(obs) - eager(obs)).abs().max().item()
+        eager_time, exported_time = median_latency(eager, obs), median_latency(exported, obs)
+        print(
+            f"{num_envs:>8} {eager_time:>10.1f} {exported_time:>10.1f} {eager_time / exported_time:>7.2f}"
+            f" {difference:>8.1e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,142 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Benchmark the recurrent mini-batch generator of :class:`RolloutStorage` against the previous implementation.
+
+The previous implementation recomputed the trajectory starts and re-gathered all the saved hidden states for every
+mini-batch of every epoch. The script checks that both generators yield the same mini-batches and reports the time
+per update for GRU and LSTM memories.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_recurrent_mini_batches.py --num_steps 24 96
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import sys
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.storage import RolloutStorage  # noqa: E402
+from local_rsl_rl.utils import split_and_pad_trajectories  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the recurrent mini-batch generator of the rollout storage.")
+parser.add_argument("--num_envs", type=int, default=4096, help="Number of environments.")
+parser.add_argument("--num_steps", type=int, nargs="+", default=[24, 96], help="Rollout lengths to benchmark.")
+parser.add_argument("--num_epochs", type=int, default=5, help="Number of learning epochs.")
+parser.add_argument("--num_mini_batches", type=int, default=4, help="Number of mini-batches.")
+parser.add_argument("--num_obs", type=int, default=727, help="Dimension of the policy observations.")
+parser.add_argument("--num_actions", type=int, default=18, help="Dimension of the actions.")
+parser.add_argument("--rnn_hidden_dim", type=int, default=256, help="Hidden dimension of the memory.")
+parser.add_argument("--rnn_num_layers", type=int, default=1, help="Number of layers of the memory.")
+parser.add_argument("--repeats", type=int, default=3, help="Number of timed repetitions.")
+parser.add_argument("--device", type=str, default="cpu", help="Device to run the benchmark on.")
+args_cli = parser.parse_args()
+
+
+def reference_generator(storage: RolloutStorage, num_mini_batches, num_epochs):
+    """Recurrent generator used by the storage before the trajectory index (observations and hidden states)."""
+    padded_obs_trajectories, trajectory_masks = split_and_pad_trajectories(storage.observations, storage.dones)
+    mini_batch_size = storage.num_envs // num_mini_batches
+    for ep in range(num_epochs):
+        first_traj = 0
+        for i in range(num_mini_batches):
+            start = i * mini_batch_size
+            stop = (i + 1) * mini_batch_size
+
+            dones = storage.dones.squeeze(-1)
+            last_was_done = torch.zeros_like(dones, dtype=torch.bool)
+            last_was_done[1:] = dones[:-1]
+            last_was_done[0] = True
+            trajectories_batch_size = torch.sum(last_was_done[:, start:stop])
+            last_traj = first_traj + trajectories_batch_size
+
+            masks_batch = trajectory_masks[:, first_traj:last_traj]
+            obs_batch = padded_obs_trajectories[:, first_traj:last_traj]
+
+            last_was_done = last_was_done.permute(1, 0)
+            hid_a_batch = [
+                saved_hidden_states.permute(2, 0, 1, 3)[last_was_done][first_traj:last_traj].transpose(1, 0).contiguous()
+                for saved_hidden_states in storage.saved_hidden_states_a
+            ]
+            hid_c_batch = [
+                saved_hidden_states.permute(2, 0, 1, 3)[last_was_done][first_traj:last_traj].transpose(1, 0).contiguous()
+                for saved_hidden_states in storage.saved_hidden_states_c
+            ]
+            yield obs_batch, masks_batch, hid_a_batch, hid_c_batch
+
+            first_traj = last_traj
+
+
+def indexed_generator(storage: RolloutStorage, num_mini_batches, num_epochs):
+    for batch in storage.recurrent_mini_batch_generator(num_mini_batches, num_epochs):
+        hid_a_batch, hid_c_batch = batch[12]
+        if isinstance(hid_a_batch, torch.Tensor):
+            hid_a_batch, hid_c_batch = [hid_a_batch], [hid_c_batch]
+        yield batch[0], batch[13], hid_a_batch, hid_c_batch
+
+
+def make_storage(num_steps: int, rnn_type: str) -> RolloutStorage:
+    storage = RolloutStorage(
+        "rl", args_cli.num_envs, num_steps, [args_cli.num_obs], None, [args_cli.num_actions], device=args_cli.device
+    )
+    storage.observations.normal_()
+    storage.dones.copy_(torch.rand_like(storage.dones, dtype=torch.float) < 0.02)
+    # LSTM memories have a hidden and a cell state, GRU memories only a hidden state
+    num_states = 2 if rnn_type == "lstm" else 1
+    shape = (num_steps, args_cli.rnn_num_layers, args_cli.num_envs, args_cli.rnn_hidden_dim)
+    storage.saved_hidden_states_a = [torch.randn(shape, device=args_cli.device) for _ in range(num_states)]
+    storage.saved_hidden_states_c = [torch.randn(shape, device=args_cli.device) for _ in range(num_states)]
+    storage.step = num_steps
+    return storage
+
+
+def run(generator_fn, storage: RolloutStorage):
+    # the trajectory index is rebuilt for every rollout
+    storage.trajectory_index = None
+    for obs_batch, masks_batch, hid_a_batch, hid_c_batch in generator_fn(
+        storage, args_cli.num_mini_batches, args_cli.num_epochs
+    ):
+        pass
+    if args_cli.device.startswith("cuda"):
+        torch.cuda.synchronize()
+
+
+def main():
+    print(f"{'memory':>6} {'T':>4} {'reference [ms]':>15} {'indexed [ms]':>13} {'speedup':>8}")
+    for rnn_type in ["gru", "lstm"]:
+        for num_steps in args_cli.num_steps:
+            storage = make_storage(num_steps, rnn_type)
+
+            # check that both generators yield the same mini-batches
+            for reference, indexed in zip(
+                reference_generator(storage, args_cli.num_mini_batches, 1),
+                indexed_generator(storage, args_cli.num_mini_batches, 1),
+            ):
+                expected = [reference[0], reference[1], *reference[2], *reference[3]]
+                actual = [indexed[0], indexed[1], *indexed[2], *indexed[3]]
+                if len(expected) != len(actual) or not all(map(torch.equal, expected, actual)):
+                    raise RuntimeError(f"Mini-batch mismatch for {rnn_type} with T={num_steps}.")
+
+            timings = {}
+            for name, generator_fn in [("reference", reference_generator), ("indexed", indexed_generator)]:
+                run(generator_fn, storage)
+                start = time.perf_counter()
+                for _ in range(args_cli.repeats):
+                    run(generator_fn, storage)
+                timings[name] = (time.perf_counter() - start) / args_cli.repeats
+            print(
+                f"{rnn_type:>6} {num_steps:>4} {timings['reference'] * 1e3:>15.2f} {timings['indexed'] * 1e3:>13.2f}"
+                f" {timings['reference'] / timings['indexed']:>7.2f}x"
+            )
+
+
+if __name__ == "__main__":
+    main()
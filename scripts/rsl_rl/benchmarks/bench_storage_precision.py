@@ -0,0 +1,157 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Compare the reduced-precision rollout storage modes against full precision.
+
+The script reports the memory used by the rollout storage for each ``storage_dtype`` and the drift of the PPO
+losses on a fixed synthetic rollout. The rollout is generated once with a full-precision policy and copied into
+each storage, and every update starts from the same network weights and random seed, so the only difference
+between the runs is the precision of the stored observations, actions and action distribution parameters.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_storage_precision.py --num_envs 4096
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import sys
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.algorithms import PPO  # noqa: E402
+from local_rsl_rl.modules import ActorCritic  # noqa: E402
+from local_rsl_rl.storage import RolloutStorage  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the reduced-precision modes of the rollout storage.")
+parser.add_argument("--num_envs", type=int, default=4096, help="Number of environments.")
+parser.add_argument("--num_steps", type=int, default=24, help="Number of steps per environment.")
+parser.add_argument("--num_prop", type=int, default=70, help="Dimension of one proprioceptive frame.")
+parser.add_argument("--num_priv", type=int, default=27, help="Dimension of the privileged observations.")
+parser.add_argument("--num_history", type=int, default=10, help="Length of the observation history.")
+parser.add_argument("--num_actions", type=int, default=18, help="Dimension of the actions.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the synthetic rollout and of the updates.")
+parser.add_argument("--device", type=str, default="cpu", help="Device to run the benchmark on.")
+args_cli = parser.parse_args()
+
+POLICY_CFG = dict(
+    init_noise_std=1.0,
+    actor_hidden_dims=[256],
+    critic_hidden_dims=[256],
+    activation="elu",
+    activation_out="elu",
+    leg_control_head_hidden_dims=[256, 128],
+    arm_control_head_hidden_dims=[256, 128],
+    critic_leg_control_head_hidden_dims=[256, 128, 64],
+    critic_arm_control_head_hidden_dims=[256, 128, 64],
+    priv_encoder_dims=[32, 18],
+    num_leg_actions=12,
+    num_arm_actions=6,
+)
+ALGORITHM_CFG = dict(
+    value_loss_coef=1.0,
+    use_clipped_value_loss=True,
+    clip_param=0.2,
+    entropy_coef=0.005,
+    num_learning_epochs=5,
+    num_mini_batches=4,
+    learning_rate=1e-3,
+    schedule="adaptive",
+    gamma=0.99,
+    lam=0.95,
+    desired_kl=0.01,
+    max_grad_norm=1.0,
+    dagger_update_freq=20,
+    priv_reg_coef_schedual=[0, 0.1, 1500, 5000],
+    mixing_schedule=[1.0, 0, 4000],
+    eps=1e-5,
+)
+
+
+def make_algorithm(storage_dtype: str) -> PPO:
+    torch.manual_seed(args_cli.seed)
+    # the policy prints its configuration on construction
+    with contextlib.redirect_stdout(io.StringIO()):
+        policy = ActorCritic(
+            args_cli.num_prop,
+            args_cli.num_prop,
+            args_cli.num_priv,
+            args_cli.num_actions,
+            args_cli.num_history,
+            **POLICY_CFG,
+        ).to(args_cli.device)
+    alg = PPO(policy, device=args_cli.device, **ALGORITHM_CFG)
+    num_obs = args_cli.num_prop * args_cli.num_history + args_cli.num_priv
+    alg.init_storage(
+        "rl",
+        args_cli.num_envs,
+        args_cli.num_steps,
+        [num_obs],
+        None,
+        [args_cli.num_actions],
+        storage_dtype=storage_dtype,
+    )
+    return alg
+
+
+def collect_rollout(alg: PPO) -> torch.Tensor:
+    """Fill the storage of the full-precision algorithm and return the bootstrap observations."""
+    num_obs = alg.storage.observations.shape[-1]
+    generator = torch.Generator(device=args_cli.device).manual_seed(args_cli.seed)
+    with torch.inference_mode():
+        for _ in range(args_cli.num_steps):
+            obs = torch.randn(args_cli.num_envs, num_obs, device=args_cli.device, generator=generator)
+            alg.act(obs, obs)
+            rewards = torch.randn(args_cli.num_envs, device=args_cli.device, generator=generator)
+            arm_rewards = torch.randn(args_cli.num_envs, device=args_cli.device, generator=generator)
+            dones = torch.rand(args_cli.num_envs, device=args_cli.device, generator=generator) < 0.02
+            alg.process_env_step(rewards, arm_rewards, dones.long(), {})
+        return torch.randn(args_cli.num_envs, num_obs, device=args_cli.device, generator=generator)
+
+
+def main():
+    results = {}
+    reference = None
+    for storage_dtype in RolloutStorage.STORAGE_DTYPES:
+        alg = make_algorithm(storage_dtype)
+        if reference is None:
+            last_obs = collect_rollout(alg)
+            reference = alg.storage
+        else:
+            # copy the reference rollout, rounding the reduced-precision buffers
+            for field in alg.storage.schema:
+                if field.per_rollout:
+                    getattr(alg.storage, field.name)[0, 0].copy_(getattr(reference, field.name)[0, 0])
+                elif field.enabled:
+                    getattr(alg.storage, field.name).copy_(getattr(reference, field.name))
+            alg.storage.step = reference.step
+        with torch.inference_mode():
+            alg.compute_returns(last_obs)
+        num_bytes = alg.storage.arena.numel()
+        torch.manual_seed(args_cli.seed + 1)
+        value_loss, surrogate_loss, *_ = alg.update()
+        results[storage_dtype] = (num_bytes, value_loss, surrogate_loss)
+
+    ref_bytes, ref_value_loss, ref_surrogate_loss = results["float32"]
+    print(f"num_envs: {args_cli.num_envs}, num_steps: {args_cli.num_steps}")
+    print(
+        f"{'dtype':>9} {'storage [MiB]':>14} {'saved [MiB]':>12} {'value loss':>11} {'drift':>9}"
+        f" {'surrogate loss':>15} {'drift':>9}"
+    )
+    for storage_dtype, (num_bytes, value_loss, surrogate_loss) in results.items():
+        print(
+            f"{storage_dtype:>9} {num_bytes / 2**20:>14.1f} {(ref_bytes - num_bytes) / 2**20:>12.1f}"
+            f" {value_loss:>11.5f} {abs(value_loss - ref_value_loss):>9.2e}"
+            f" {surrogate_loss:>15.5f} {abs(surrogate_loss - ref_surrogate_loss):>9.2e}"
+        )
+
+
+if __name__ == "__main__":
+    main()
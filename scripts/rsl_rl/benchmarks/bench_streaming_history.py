@@ -0,0 +1,156 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Latency of the step-wise policy inference with the batch and the streaming history encoders.
+
+The batch encoder projects all the frames of the history and convolves all of them at every step, the streaming
+encoder (:class:`StreamingHistoryEncoder`) only projects the newest frame and computes the newest output of each
+convolution from its cached outputs. The script runs both on the same sequence of frames (with random resets, the
+history of the batch encoder is rebuilt by :class:`ObservationHistory` like the observation manager does), reports
+the largest difference between their latents and actions and the median latency per step of the history encoder and
+of the whole inference.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_streaming_history.py --num_envs 1 16 256 --num_history 10 50
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import os
+import statistics
+import sys
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.modules import ActorCritic, StreamingHistoryEncoder  # noqa: E402
+from local_rsl_rl.utils import ObservationHistory  # noqa: E402
+
+# proprioceptive frame and privileged terms of the Go2Arm policy observations
+NUM_PROP = 70
+NUM_PRIV = 27
+
+parser = argparse.ArgumentParser(description="Benchmark the streaming history encoder for step-wise inference.")
+parser.add_argument("--num_envs", type=int, nargs="+", default=[1, 16, 256], help="Numbers of environments.")
+parser.add_argument("--num_history", type=int, nargs="+", default=[10, 50], help="Lengths of the history.")
+parser.add_argument("--num_steps", type=int, default=500, help="Number of timed steps.")
+parser.add_argument("--reset_prob", type=float, default=0.02, help="Probability of a reset per environment and step.")
+parser.add_argument("--num_threads", type=int, default=1, help="Number of CPU threads (deployment uses one).")
+parser.add_argument("--device", type=str, default="cpu", help="Device of the policy.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the frames and of the policy.")
+args_cli = parser.parse_args()
+
+
+def make_policy(num_hist: int) -> ActorCritic:
+    with contextlib.redirect_stdout(io.StringIO()):
+        policy = ActorCritic(
+            NUM_PROP,
+            NUM_PROP,
+            NUM_PRIV,
+            18,
+            num_hist,
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+        )
+    return policy.to(args_cli.device).eval()
+
+
+def synchronize():
+    if torch.device(args_cli.device).type == "cuda":
+        torch.cuda.synchronize()
+
+
+@torch.inference_mode()
+def run(num_envs: int, num_hist: int) -> dict:
+    torch.manual_seed(args_cli.seed)
+    policy = make_policy(num_hist)
+    actor = policy.actor
+    history = ObservationHistory(num_envs, num_hist, NUM_PROP, device=args_cli.device)
+    streaming_encoder = StreamingHistoryEncoder(actor.history_encoder, num_envs)
+
+    generator = torch.Generator(device=args_cli.device).manual_seed(args_cli.seed)
+    num_steps = args_cli.num_steps + 10
+    frames = torch.randn(num_steps, num_envs, NUM_PROP, generator=generator, device=args_cli.device)
+    dones = torch.rand(num_steps, num_envs, generator=generator, device=args_cli.device) < args_cli.reset_prob
+
+    times = {name: [] for name in ["batch encoder", "streaming encoder", "batch inference", "streaming inference"]}
+    max_difference = 0.0
+    for step in range(num_steps):
+        if step == 0:
+            obs = history.reset(frames[step])
+        else:
+            obs = history.append(frames[step], dones[step])
+            streaming_encoder.reset(dones[step])
+        hist = obs.view(num_envs, num_hist, NUM_PROP)
+
+        # the encoders are timed on their own, then within the inference of the actions
+        synchronize()
+        start = time.perf_counter()
+        batch_latent = actor.history_encoder(hist)
+        synchronize()
+        middle = time.perf_counter()
+        batch_actions = policy.act_inference(obs, hist_encoding=True)
+        synchronize()
+        end = time.perf_counter()
+        if step >= 10:
+            times["batch encoder"].append(middle - start)
+            times["batch inference"].append(end - middle)
+
+        # the streaming encoder advances at every call, so it is only called within the inference
+        synchronize()
+        start = time.perf_counter()
+        latent = streaming_encoder(frames[step])
+        synchronize()
+        middle = time.perf_counter()
+        actions = policy.act_inference(frames[step], latent=latent)
+        synchronize()
+        end = time.perf_counter()
+        if step >= 10:
+            times["streaming encoder"].append(middle - start)
+            times["streaming inference"].append(end - start)
+
+        difference = max((latent - batch_latent).abs().max().item(), (actions - batch_actions).abs().max().item())
+        max_difference = max(max_difference, difference)
+
+    result = {name: statistics.median(values) * 1e6 for name, values in times.items()}
+    result["max difference"] = max_difference
+    return result
+
+
+def main():
+    torch.set_num_threads(args_cli.num_threads)
+    print(f"device: {args_cli.device}, threads: {args_cli.num_threads}, median latency per step [us]")
+    print(
+        f"{'num_envs':>8} {'history':>7} {'batch enc':>10} {'stream enc':>10} {'batch step':>10} {'stream step':>11}"
+        f" {'speedup':>7} {'max diff':>8}"
+    )
+    for num_hist in args_cli.num_history:
+        for num_envs in args_cli.num_envs:
+            result = run(num_envs, num_hist)
+            speedup = result["batch inference"] / result["streaming inference"]
+            print(
+                f"{num_envs:>8} {num_hist:>7} {result['batch encoder']:>10.1f} {result['streaming encoder']:>10.1f}"
+                f" {result['batch inference']:>10.1f} {result['streaming inference']:>11.1f} {speedup:>7.2f}"
+                f" {result['max difference']:>8.1e}"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,230 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Cost of the left/right mirror augmentation of the Go2Arm mini-batches.
+
+The mirror of the task (``Go2Arm_Lab/tasks/manager_based/go2arm_lab/mdp/symmetry.py``) is built for the observation
+layout of :class:`SyntheticVecEnv` and the joint order of the action configuration. The module is loaded from its file,
+so the benchmark runs without Isaac Sim.
+
+The script reports:
+
+- the time to augment the policy observations, the critic observations and the actions of a mini-batch, with the
+  batched gather of the mirror and with a reference that mirrors term by term and frame by frame,
+- the time per mini-batch step of :meth:`PPO.update` without and with the data augmentation (which doubles the
+  mini-batches).
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_symmetry.py --num_envs 4096 --device cuda
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.env import SyntheticVecEnv  # noqa: E402
+from local_rsl_rl.runners import OnPolicyRunner  # noqa: E402
+
+SYMMETRY_FILE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)),
+    "../../../source/Go2Arm_Lab/Go2Arm_Lab/tasks/manager_based/go2arm_lab/mdp/symmetry.py",
+)
+# joints of the actions and of the joint observations (see ActionsCfg of the task) and feet of the contact sensor
+JOINT_NAMES = [
+    *[f"{leg}_{joint}_joint" for leg in ["FR", "FL", "RR", "RL"] for joint in ["hip", "thigh", "calf"]],
+    *[f"arm_joint{i}" for i in range(1, 7)],
+]
+FEET_NAMES = ["FL_foot", "FR_foot", "RL_foot", "RR_foot"]
+
+parser = argparse.ArgumentParser(description="Benchmark the mirror augmentation of the mini-batches.")
+parser.add_argument("--num_envs", type=int, default=4096, help="Number of environments.")
+parser.add_argument("--num_steps", type=int, default=24, help="Number of steps per environment.")
+parser.add_argument("--num_mini_batches", type=int, default=4, help="Number of mini-batches.")
+parser.add_argument("--num_repeats", type=int, default=20, help="Number of timed augmentations.")
+parser.add_argument("--num_updates", type=int, default=2, help="Number of timed updates.")
+parser.add_argument("--device", type=str, default="cpu", help="Device of the mini-batches and of the policy.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the environment and of the policy.")
+args_cli = parser.parse_args()
+
+
+def load_symmetry():
+    spec = importlib.util.spec_from_file_location("go2arm_symmetry", SYMMETRY_FILE)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def make_cfg(data_augmentation_func=None) -> dict:
+    cfg = dict(
+        num_steps_per_env=args_cli.num_steps,
+        save_interval=100000,
+        empirical_normalization=False,
+        logger="tensorboard",
+        policy=dict(
+            class_name="ActorCritic",
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+        ),
+        algorithm=dict(
+            class_name="PPO",
+            value_loss_coef=1.0,
+            use_clipped_value_loss=True,
+            clip_param=0.2,
+            entropy_coef=0.005,
+            num_learning_epochs=5,
+            num_mini_batches=args_cli.num_mini_batches,
+            learning_rate=1e-3,
+            schedule="adaptive",
+            gamma=0.99,
+            lam=0.95,
+            desired_kl=0.01,
+            max_grad_norm=1.0,
+            dagger_update_freq=20,
+            priv_reg_coef_schedual=[0, 0.1, 1500, 5000],
+            mixing_schedule=[1.0, 0, 4000],
+            eps=1e-5,
+        ),
+    )
+    if data_augmentation_func is not None:
+        cfg["algorithm"]["symmetry_cfg"] = dict(
+            use_data_augmentation=True,
+            use_mirror_loss=False,
+            data_augmentation_func=data_augmentation_func,
+            mirror_loss_coeff=0.0,
+        )
+    return cfg
+
+
+def term_by_term_mirror(symmetry, mirror, env: SyntheticVecEnv, obs: torch.Tensor) -> torch.Tensor:
+    """Mirror the observations with one slice per term and frame (reference)."""
+    names, lengths = env.get_obs_list_length()
+    out = torch.empty_like(obs)
+    frame_offsets, offset = {}, 0
+    for name, length in zip(names, lengths):
+        name = name.removeprefix("policy-")
+        if not name.startswith("priv_"):
+            frame_offsets[name] = (offset, length // env.num_history)
+            offset += length // env.num_history
+    transforms = {}
+    for name in frame_offsets:
+        if name in symmetry.VECTOR_TERM_SIGNS:
+            signs = symmetry.VECTOR_TERM_SIGNS[name]
+            transforms[name] = (list(range(len(signs))), signs)
+        else:
+            transforms[name] = symmetry._mirror_names(JOINT_NAMES, symmetry.JOINT_MIRROR_SIGNS)
+    for frame in range(env.num_history):
+        for name, (start, length) in frame_offsets.items():
+            start += frame * env.num_prop
+            index, sign = transforms[name]
+            index = torch.tensor(index, device=obs.device) + start
+            sign = torch.tensor(sign, device=obs.device)
+            out[:, start : start + length] = obs[:, index] * sign
+    priv_start = env.num_prop * env.num_history
+    out[:, priv_start:] = mirror.mirror_obs(obs)[:, priv_start:]
+    return out
+
+
+def synchronize():
+    if torch.device(args_cli.device).type == "cuda":
+        torch.cuda.synchronize()
+
+
+def time_augmentation(augment, obs, critic_obs, actions) -> float:
+    augment(obs, critic_obs, actions)
+    synchronize()
+    start = time.perf_counter()
+    for _ in range(args_cli.num_repeats):
+        augment(obs, critic_obs, actions)
+    synchronize()
+    return (time.perf_counter() - start) / args_cli.num_repeats * 1e3
+
+
+def time_update(data_augmentation_func=None) -> float:
+    torch.manual_seed(args_cli.seed)
+    env = SyntheticVecEnv(args_cli.num_envs, seed=args_cli.seed, device=args_cli.device)
+    with tempfile.TemporaryDirectory() as log_dir, contextlib.redirect_stdout(io.StringIO()):
+        runner = OnPolicyRunner(env, make_cfg(data_augmentation_func), log_dir=log_dir, device=args_cli.device)
+        # the storage keeps the last rollout after the update
+        runner.learn(1)
+    alg = runner.alg
+    alg.update()
+    synchronize()
+    start = time.perf_counter()
+    for _ in range(args_cli.num_updates):
+        alg.update()
+    synchronize()
+    num_steps = args_cli.num_updates * alg.num_learning_epochs * alg.num_mini_batches
+    return (time.perf_counter() - start) / num_steps * 1e3
+
+
+def main():
+    symmetry = load_symmetry()
+    env = SyntheticVecEnv(8, device=args_cli.device)
+    names, lengths = env.get_obs_list_length()
+    mirror = symmetry.Go2ArmMirror(
+        names, lengths, env.num_history, JOINT_NAMES, JOINT_NAMES, FEET_NAMES, device=args_cli.device
+    )
+
+    # mini-batch of observations in the layout of the policy (newest frame first, then the privileged terms)
+    batch_size = args_cli.num_envs * args_cli.num_steps // args_cli.num_mini_batches
+    generator = torch.Generator(device=args_cli.device).manual_seed(args_cli.seed)
+    obs = torch.randn(batch_size, env.num_obs, generator=generator, device=args_cli.device)
+    critic_obs = obs.clone()
+    actions = torch.randn(batch_size, env.num_actions, generator=generator, device=args_cli.device)
+
+    def batched(obs, critic_obs, actions):
+        return mirror.augment_obs(obs), mirror.augment_obs(critic_obs), mirror.augment_actions(actions)
+
+    def reference(obs, critic_obs, actions):
+        return (
+            torch.cat([obs, term_by_term_mirror(symmetry, mirror, env, obs)]),
+            torch.cat([critic_obs, term_by_term_mirror(symmetry, mirror, env, critic_obs)]),
+            torch.cat([actions, mirror.mirror_actions(actions)]),
+        )
+
+    batched_outputs, reference_outputs = batched(obs, critic_obs, actions), reference(obs, critic_obs, actions)
+    matches = all(torch.equal(a, b) for a, b in zip(batched_outputs, reference_outputs))
+    involution = torch.equal(mirror.mirror_obs(mirror.mirror_obs(obs)), obs)
+    print(f"mini-batch: {batch_size} samples, {env.num_obs} observations, device: {args_cli.device}")
+    print(f"mirror matches the term-by-term reference: {matches}, mirror of the mirror is the identity: {involution}")
+    print(f"{'augmentation':>14} {'time [ms]':>10}")
+    for label, augment in [("term-by-term", reference), ("batched", batched)]:
+        print(f"{label:>14} {time_augmentation(augment, obs, critic_obs, actions):>10.3f}")
+
+    def data_augmentation_func(obs, actions, env, obs_type):
+        obs = None if obs is None else mirror.augment_obs(obs)
+        actions = None if actions is None else mirror.augment_actions(actions)
+        return obs, actions
+
+    plain_time = time_update()
+    augmented_time = time_update(data_augmentation_func)
+    print(f"{'update':>14} {'step [ms]':>10} {'samples':>8}")
+    print(f"{'plain':>14} {plain_time:>10.2f} {batch_size:>8}")
+    print(f"{'augmented':>14} {augmented_time:>10.2f} {2 * batch_size:>8}")
+
+
+if __name__ == "__main__":
+    main()
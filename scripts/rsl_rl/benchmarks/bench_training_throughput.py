@@ -0,0 +1,196 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""End-to-end training throughput of :class:`OnPolicyRunner` on the synthetic environment.
+
+The script runs :meth:`OnPolicyRunner.learn` on :class:`SyntheticVecEnv` for every combination of the given numbers of
+environments, steps per environment and mini-batches. Each configuration runs in its own process, so that its peak
+memory is measured in isolation. The throughput is computed from the collection and update times of the iterations
+after the warm-up (as logged by the runner), so it excludes logging and checkpointing. The results (environment steps
+per second, collection and update time per iteration, time per phase and peak memory) are written as JSON, to compare
+commits:
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_training_throughput.py --num_envs 256 1024 --num_steps 24 \\
+        --num_mini_batches 4 8 --output throughput.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import io
+import itertools
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.env import SyntheticVecEnv  # noqa: E402
+from local_rsl_rl.runners import OnPolicyRunner  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Benchmark the end-to-end training throughput of the runner.")
+parser.add_argument("--num_envs", type=int, nargs="+", default=[256, 1024], help="Numbers of environments.")
+parser.add_argument("--num_steps", type=int, nargs="+", default=[24], help="Numbers of steps per environment.")
+parser.add_argument("--num_mini_batches", type=int, nargs="+", default=[4], help="Numbers of mini-batches.")
+parser.add_argument("--num_learning_epochs", type=int, default=5, help="Number of learning epochs.")
+parser.add_argument("--num_iterations", type=int, default=5, help="Number of measured learning iterations.")
+parser.add_argument("--warmup_iterations", type=int, default=1, help="Number of learning iterations before measuring.")
+parser.add_argument("--device", type=str, default="cpu", help="Device of the environment and of the learner.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the environment and of the policy.")
+parser.add_argument("--output", type=str, default=None, help="Path of the JSON results (printed if not given).")
+parser.add_argument("--config", type=str, default=None, help=argparse.SUPPRESS)  # single configuration (internal)
+args_cli = parser.parse_args()
+
+
+def make_cfg(num_steps: int, num_mini_batches: int) -> dict:
+    return dict(
+        num_steps_per_env=num_steps,
+        save_interval=100000,
+        empirical_normalization=False,
+        logger="jsonl",
+        phase_timing=True,
+        policy=dict(
+            class_name="ActorCritic",
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+        ),
+        algorithm=dict(
+            class_name="PPO",
+            value_loss_coef=1.0,
+            use_clipped_value_loss=True,
+            clip_param=0.2,
+            entropy_coef=0.005,
+            num_learning_epochs=args_cli.num_learning_epochs,
+            num_mini_batches=num_mini_batches,
+            learning_rate=1e-3,
+            schedule="adaptive",
+            gamma=0.99,
+            lam=0.95,
+            desired_kl=0.01,
+            max_grad_norm=1.0,
+            dagger_update_freq=20,
+            priv_reg_coef_schedual=[0, 0.1, 1500, 5000],
+            mixing_schedule=[1.0, 0, 4000],
+            eps=1e-5,
+        ),
+    )
+
+
+def run_config(config: dict) -> dict:
+    """Train on one configuration and return its measurements."""
+    torch.manual_seed(args_cli.seed)
+    num_envs, num_steps = config["num_envs"], config["num_steps_per_env"]
+    env = SyntheticVecEnv(
+        num_envs, max_episode_length=1000, min_episode_length=500, seed=args_cli.seed, device=args_cli.device
+    )
+    with tempfile.TemporaryDirectory() as log_dir, contextlib.redirect_stdout(io.StringIO()):
+        runner = OnPolicyRunner(env, make_cfg(num_steps, config["num_mini_batches"]), log_dir=log_dir)
+        runner.learn(args_cli.warmup_iterations + args_cli.num_iterations)
+        # per-iteration times of the measured iterations (written by the jsonl logger)
+        runner.writer.flush()
+        times = {}
+        with open(os.path.join(log_dir, "metrics.jsonl")) as f:
+            for line in f:
+                record = json.loads(line)
+                if record["tag"].startswith("Perf/") and record["step"] >= args_cli.warmup_iterations:
+                    times.setdefault(record["tag"], []).append(record["value"])
+
+    def mean(tag):
+        return sum(times[tag]) / len(times[tag]) if tag in times else None
+
+    if torch.device(args_cli.device).type == "cuda":
+        peak_memory = torch.cuda.max_memory_allocated(args_cli.device)
+    else:
+        # peak resident set size of the process (kilobytes on linux)
+        peak_memory = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+    prefix = "Perf/phase/"
+    collection_time, update_time = mean("Perf/collection time"), mean("Perf/learning_time")
+    return dict(
+        config,
+        env_steps_per_s=num_envs * num_steps / (collection_time + update_time),
+        collection_time_s=collection_time,
+        update_time_s=update_time,
+        phase_times_ms={tag[len(prefix) : -len("_ms")]: mean(tag) for tag in times if tag.startswith(prefix)},
+        peak_memory_mb=peak_memory / 2**20,
+    )
+
+
+def git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=os.path.dirname(os.path.abspath(__file__)), capture_output=True, text=True
+        ).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def main():
+    if args_cli.config is not None:
+        print(json.dumps(run_config(json.loads(args_cli.config))))
+        return
+
+    results = []
+    matrix = itertools.product(args_cli.num_envs, args_cli.num_steps, args_cli.num_mini_batches)
+    for num_envs, num_steps, num_mini_batches in matrix:
+        config = dict(
+            num_envs=num_envs,
+            num_steps_per_env=num_steps,
+            num_mini_batches=num_mini_batches,
+            num_learning_epochs=args_cli.num_learning_epochs,
+        )
+        print(f"running {config}", file=sys.stderr)
+        # every configuration in a fresh process (isolated peak memory)
+        argv = [
+            f"--num_learning_epochs={args_cli.num_learning_epochs}",
+            f"--num_iterations={args_cli.num_iterations}",
+            f"--warmup_iterations={args_cli.warmup_iterations}",
+            f"--device={args_cli.device}",
+            f"--seed={args_cli.seed}",
+            f"--config={json.dumps(config)}",
+        ]
+        output = subprocess.run(
+            [sys.executable, os.path.abspath(__file__), *argv],
+            capture_output=True,
+            text=True,
+            check=True,
+        ).stdout
+        results.append(json.loads(output.strip().splitlines()[-1]))
+
+    report = dict(
+        commit=git_commit(),
+        torch=torch.__version__,
+        python=platform.python_version(),
+        device=args_cli.device,
+        num_iterations=args_cli.num_iterations,
+        warmup_iterations=args_cli.warmup_iterations,
+        results=results,
+    )
+    if args_cli.output is None:
+        print(json.dumps(report, indent=2))
+    else:
+        with open(args_cli.output, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
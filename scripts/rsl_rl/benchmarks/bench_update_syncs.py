@@ -0,0 +1,157 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Count the device-to-host synchronizations of the PPO update and of the adaptation (DAgger) update.
+
+Every read of a tensor value on the host (``item``, ``tolist``, ``bool``, ``float`` and ``int``) waits for the queued
+device work, so the script counts the calls made by ``local_rsl_rl`` during :meth:`PPO.update` and
+:meth:`PPO.update_dagger`, with the Python and the sync-free (``sync_free_adaptive_lr``) adaptive learning rate. The
+counts do not depend on the device; on GPU, the update times show the effect of the synchronizations.
+
+.. code-block:: bash
+
+    python scripts/rsl_rl/benchmarks/bench_update_syncs.py --num_envs 512 --device cuda:0
+"""
+
+from __future__ import annotations
+
+import argparse
+import contextlib
+import functools
+import io
+import os
+import sys
+import tempfile
+import time
+import torch
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), ".."))
+
+from local_rsl_rl.env import SyntheticVecEnv  # noqa: E402
+from local_rsl_rl.runners import OnPolicyRunner  # noqa: E402
+
+parser = argparse.ArgumentParser(description="Count the synchronizations of the PPO update.")
+parser.add_argument("--num_envs", type=int, default=256, help="Number of environments.")
+parser.add_argument("--num_steps", type=int, default=24, help="Number of steps per environment.")
+parser.add_argument("--num_mini_batches", type=int, default=4, help="Number of mini-batches.")
+parser.add_argument("--num_learning_epochs", type=int, default=5, help="Number of learning epochs.")
+parser.add_argument("--num_updates", type=int, default=3, help="Number of timed updates.")
+parser.add_argument("--device", type=str, default="cpu", help="Device of the environment and of the learner.")
+parser.add_argument("--seed", type=int, default=0, help="Seed of the environment and of the policy.")
+args_cli = parser.parse_args()
+
+# tensor methods that read a value on the host
+SYNC_METHODS = ["item", "tolist", "__bool__", "__float__", "__int__"]
+
+
+class SyncCounter:
+    """Count the calls from ``local_rsl_rl`` to the tensor methods that read a value on the host while enabled.
+
+    The calls from PyTorch itself are not counted (e.g. the optimizers read their step counters, which stay on the
+    host).
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.enabled = False
+        for name in SYNC_METHODS:
+            setattr(torch.Tensor, name, self._wrap(getattr(torch.Tensor, name)))
+
+    def _wrap(self, method):
+        @functools.wraps(method)
+        def wrapper(tensor, *args, **kwargs):
+            if self.enabled and sys._getframe(1).f_globals.get("__name__", "").startswith("local_rsl_rl"):
+                self.count += 1
+            return method(tensor, *args, **kwargs)
+
+        return wrapper
+
+    @contextlib.contextmanager
+    def counting(self):
+        self.count = 0
+        self.enabled = True
+        try:
+            yield self
+        finally:
+            self.enabled = False
+
+
+def make_cfg(sync_free_adaptive_lr: bool) -> dict:
+    return dict(
+        num_steps_per_env=args_cli.num_steps,
+        save_interval=1000,
+        empirical_normalization=False,
+        logger="tensorboard",
+        policy=dict(
+            class_name="ActorCritic",
+            init_noise_std=1.0,
+            actor_hidden_dims=[256],
+            critic_hidden_dims=[256],
+            activation="elu",
+            activation_out="elu",
+            leg_control_head_hidden_dims=[256, 128],
+            arm_control_head_hidden_dims=[256, 128],
+            critic_leg_control_head_hidden_dims=[256, 128, 64],
+            critic_arm_control_head_hidden_dims=[256, 128, 64],
+            priv_encoder_dims=[32, 18],
+            num_leg_actions=12,
+            num_arm_actions=6,
+        ),
+        algorithm=dict(
+            class_name="PPO",
+            value_loss_coef=1.0,
+            use_clipped_value_loss=True,
+            clip_param=0.2,
+            entropy_coef=0.005,
+            num_learning_epochs=args_cli.num_learning_epochs,
+            num_mini_batches=args_cli.num_mini_batches,
+            learning_rate=1e-3,
+            schedule="adaptive",
+            gamma=0.99,
+            lam=0.95,
+            desired_kl=0.01,
+            max_grad_norm=1.0,
+            dagger_update_freq=20,
+            priv_reg_coef_schedual=[0, 0.1, 1500, 5000],
+            mixing_schedule=[1.0, 0, 4000],
+            eps=1e-5,
+            sync_free_adaptive_lr=sync_free_adaptive_lr,
+        ),
+    )
+
+
+def synchronize():
+    if torch.device(args_cli.device).type == "cuda":
+        torch.cuda.synchronize(args_cli.device)
+
+
+def main():
+    counter = SyncCounter()
+    num_mini_batches = args_cli.num_learning_epochs * args_cli.num_mini_batches
+    print(f"num_envs: {args_cli.num_envs}, device: {args_cli.device}, mini-batches per update: {num_mini_batches}")
+    print(f"{'adaptive lr':>12} {'update':>8} {'syncs':>6} {'time [ms]':>10}")
+    for sync_free_adaptive_lr in [False, True]:
+        torch.manual_seed(args_cli.seed)
+        env = SyntheticVecEnv(args_cli.num_envs, seed=args_cli.seed, device=args_cli.device)
+        with tempfile.TemporaryDirectory() as log_dir, contextlib.redirect_stdout(io.StringIO()):
+            runner = OnPolicyRunner(env, make_cfg(sync_free_adaptive_lr), log_dir=log_dir, device=args_cli.device)
+            # one iteration to fill the storage (the storage keeps the last rollout after the update)
+            runner.learn(1)
+        for name, update in [("ppo", runner.alg.update), ("dagger", runner.alg.update_dagger)]:
+            update()
+            synchronize()
+            start = time.perf_counter()
+            for _ in range(args_cli.num_updates):
+                with counter.counting():
+                    update()
+                syncs = counter.count
+            synchronize()
+            elapsed = (time.perf_counter() - start) / args_cli.num_updates
+            mode = "sync-free" if sync_free_adaptive_lr else "python"
+            print(f"{mode:>12} {name:>8} {syncs:>6} {elapsed * 1e3:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
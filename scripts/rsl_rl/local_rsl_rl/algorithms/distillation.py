@@ -69,7 +69,16 @@ class Distillation:
         self.num_updates = 0
 
     def init_storage(
-        self, training_type, num_envs, num_transitions_per_env, student_obs_shape, teacher_obs_shape, actions_shape
+        self,
+        training_type,
+        num_envs,
+        num_transitions_per_env,
+        student_obs_shape,
+        teacher_obs_shape,
+        actions_shape,
+        storage_dtype="float32",
+        obs_history_shape=None,
+        history_normalization=False,
     ):
         # create rollout storage
         self.storage = RolloutStorage(
@@ -81,6 +90,9 @@ class Distillation:
             actions_shape,
             None,
             self.device,
+            storage_dtype=storage_dtype,
+            obs_history_shape=obs_history_shape,
+            history_normalization=history_normalization,
         )
 
     def act(self, obs, teacher_obs):
@@ -6,16 +6,16 @@
 from __future__ import annotations
 
 
+import os
 from time import time
 import torch
 import torch.nn as nn
 import torch.optim as optim
-from itertools import chain
 
 from local_rsl_rl.modules import ActorCritic
 from local_rsl_rl.storage import RolloutStorage
 from local_rsl_rl.modules.rnd import RandomNetworkDistillation
-from local_rsl_rl.utils import string_to_callable
+from local_rsl_rl.utils import GradientBucketReducer, PhaseTimer, broadcast_tensors, string_to_callable
 
 
 class PPO:
@@ -41,6 +41,14 @@ class PPO:
         desired_kl=0.01,
         device='cpu',
         normalize_advantage_per_mini_batch=False,
+        packed_mini_batches=False,
+        vtrace_rho_clip=1.0,
+        vtrace_c_clip=1.0,
+        compile_update=False,
+        compile_cache_dir: str | None = None,
+        sync_free_adaptive_lr=False,
+        fused_adaptation_update=False,
+        grad_bucket_cap_mb=0.5,
         # RND parameters
         rnd_cfg: dict | None = None,
         # Symmetry parameters
@@ -106,11 +114,48 @@ class PPO:
         self.policy = policy
         self.policy.to(self.device)
         self.storage = None # initialized later
-        self.optimizer = optim.Adam(self.policy.parameters(), lr=learning_rate,eps=eps)
+        # copy of the policy that collects the rollouts while the policy is updated (pipelined mode)
+        self.behavior_policy = None
+        # with the sync-free adaptive schedule, the learning rate is a device tensor updated in place (see update)
+        self.sync_free_adaptive_lr = sync_free_adaptive_lr
+        if self.sync_free_adaptive_lr:
+            self.learning_rate_tensor = torch.tensor(float(learning_rate), device=self.device)
+            self.optimizer = optim.Adam(
+                self.policy.parameters(),
+                lr=self.learning_rate_tensor,
+                eps=eps,
+                capturable=torch.device(self.device).type == "cuda",
+            )
+        else:
+            self.learning_rate_tensor = None
+            self.optimizer = optim.Adam(self.policy.parameters(), lr=learning_rate,eps=eps)
         self.transition = RolloutStorage.Transition()
+        # timer of the update phases (replaced by the timer of the runner when phase timing is enabled)
+        self.timer = PhaseTimer(self.device, enabled=False)
 
         # Adaptation
         self.hist_encoder_optimizer = optim.Adam(self.policy.actor.history_encoder.parameters(), lr=learning_rate)
+        # train the history encoder in the mini-batch loop of every PPO update instead of in separate DAgger updates
+        self.fused_adaptation_update = fused_adaptation_update
+        if fused_adaptation_update and self.policy.is_recurrent:
+            # the rollouts collected with the history latent are re-evaluated without their hidden states
+            raise ValueError("The fused adaptation update does not support recurrent policies.")
+
+        # Multi-GPU gradient averaging, overlapped with the backward pass (see reduce_parameters)
+        if self.is_multi_gpu:
+            reduced_parameters = list(self.policy.parameters())
+            if self.rnd:
+                reduced_parameters += list(self.rnd.predictor.parameters())
+            self.grad_reducer = GradientBucketReducer(
+                reduced_parameters, self.gpu_world_size, bucket_cap_mb=grad_bucket_cap_mb
+            )
+            # the DAgger update only trains the history encoder
+            self.hist_encoder_grad_reducer = GradientBucketReducer(
+                self.policy.actor.history_encoder.parameters(), self.gpu_world_size, bucket_cap_mb=grad_bucket_cap_mb
+            )
+        else:
+            self.grad_reducer = None
+            self.hist_encoder_grad_reducer = None
 
         # PPO parameters
         self.clip_param = clip_param
@@ -126,6 +171,9 @@ class PPO:
         self.schedule = schedule
         self.learning_rate = learning_rate
         self.normalize_advantage_per_mini_batch = normalize_advantage_per_mini_batch
+        self.packed_mini_batches = packed_mini_batches
+        self.vtrace_rho_clip = vtrace_rho_clip
+        self.vtrace_c_clip = vtrace_c_clip
 
         self.priv_reg_coef_schedual = priv_reg_coef_schedual
         self.min_policy_std = torch.tensor(min_policy_std, device=self.device)
@@ -141,9 +189,30 @@ class PPO:
         else:
             self.arm_fk = self.arm_fk_fixed_gains
 
+        # compiled forward pass and losses of the mini-batches (see _mini_batch_loss)
+        self.compile_update = compile_update
+        self.compiled_mini_batch_loss = None
+        self.compiled_batch_shapes = None
+        if self.compile_update:
+            if self.policy.is_recurrent:
+                raise ValueError("The compiled update does not support recurrent policies.")
+            if compile_cache_dir is not None:
+                # the inductor caches (graphs and kernels) persist in this directory, so restarts skip the compilation
+                os.makedirs(compile_cache_dir, exist_ok=True)
+                os.environ["TORCHINDUCTOR_CACHE_DIR"] = os.path.abspath(compile_cache_dir)
+            self.compiled_mini_batch_loss = torch.compile(self._mini_batch_loss, dynamic=False)
 
     def init_storage(
-        self, training_type, num_envs, num_transitions_per_env, actor_obs_shape, critic_obs_shape, actions_shape
+        self,
+        training_type,
+        num_envs,
+        num_transitions_per_env,
+        actor_obs_shape,
+        critic_obs_shape,
+        actions_shape,
+        storage_dtype="float32",
+        obs_history_shape=None,
+        history_normalization=False,
     ):
         # create memory for RND as well :)
         if self.rnd:
@@ -160,17 +229,24 @@ class PPO:
             actions_shape,
             rnd_state_shape,
             self.device,
+            torque_supervision=self.torque_supervision,
+            storage_dtype=storage_dtype,
+            obs_history_shape=obs_history_shape,
+            history_normalization=history_normalization,
+            global_action_sigma=self.policy.has_global_std,
         )
 
     def act(self, obs, critic_obs, hist_encoding=False):
         if self.policy.is_recurrent:
             self.transition.hidden_states = self.policy.get_hidden_states()
         # Compute the actions and values
-        self.transition.actions = self.policy.act(obs, hist_encoding).detach()
-        self.transition.values = self.policy.evaluate(critic_obs).detach()
-        self.transition.actions_log_prob = self.policy.get_actions_log_prob(self.transition.actions).detach()
-        self.transition.action_mean = self.policy.action_mean.detach()
-        self.transition.action_sigma = self.policy.action_std.detach()
+        # the rollout is collected by the behavior policy if it is set (pipelined rollout and update)
+        policy = self.policy if self.behavior_policy is None else self.behavior_policy
+        self.transition.actions = policy.act(obs, hist_encoding).detach()
+        self.transition.values = policy.evaluate(critic_obs).detach()
+        self.transition.actions_log_prob = policy.get_actions_log_prob(self.transition.actions).detach()
+        self.transition.action_mean = policy.action_mean.detach()
+        self.transition.action_sigma = policy.action_std.detach()
         # need to record obs and critic_obs before env.step()
         self.transition.observations = obs
         self.transition.privileged_observations = critic_obs
@@ -204,45 +280,88 @@ class PPO:
             self.transition.target_arm_torques = infos['target_arm_torques'].detach()
             self.transition.current_arm_dof_pos = infos['current_arm_dof_pos'].detach()
             self.transition.current_arm_dof_vel = infos['current_arm_dof_vel'].detach()
-            # Record the transition
-            self.storage.add_transitions(self.transition, torque_supervision=True)
-        else:
-            self.storage.add_transitions(self.transition, torque_supervision=False)
+        # Record the transition
+        self.storage.add_transitions(self.transition)
         self.transition.clear()
         self.policy.reset(dones)
     
-    def compute_returns(self, last_critic_obs):
+    def compute_returns(self, last_critic_obs, storage: RolloutStorage | None = None, correct_policy_lag=False):
+        storage = self.storage if storage is None else storage
+        # re-evaluate a rollout collected with an older policy
+        log_rhos = self.evaluate_rollout(storage) if correct_policy_lag else None
         # compute value for the last step
         last_values = self.policy.evaluate(last_critic_obs).detach()
-        self.storage.compute_returns(
-            last_values, self.gamma, self.lam, normalize_advantage=not self.normalize_advantage_per_mini_batch
+        storage.compute_returns(
+            last_values,
+            self.gamma,
+            self.lam,
+            normalize_advantage=not self.normalize_advantage_per_mini_batch,
+            log_rhos=log_rhos,
+            rho_clip=self.vtrace_rho_clip,
+            c_clip=self.vtrace_c_clip,
         )
 
-    def update(self): 
-        mean_value_loss = 0
-        mean_surrogate_loss = 0
-        mean_entropy = 0
+    def evaluate_rollout(self, storage: RolloutStorage) -> torch.Tensor:
+        """Replace the action distributions, log-probabilities and values of a rollout with those of the current policy.
+
+        The rollout was collected by the behavior policy: the parameters before the previous update in pipelined
+        mode, or the history latent with the fused adaptation update. The current policy (with the privileged latent)
+        becomes the proximal policy of the PPO ratio and clipping, and the returned log-ratio of the current and
+        behavior policies drives the V-trace correction of the returns.
+
+        Returns:
+            The log-ratio of the current and behavior policies. Shape: (num_transitions_per_env, num_envs, 2)
+        """
+        observations = storage.rollout_observations()
+        log_rhos = torch.empty_like(storage.actions_log_prob)
+        with torch.no_grad():
+            for step in range(storage.num_transitions_per_env):
+                obs = observations[step].float()
+                critic_obs = obs if storage.privileged_observations is None else storage.privileged_observations[step]
+                self.policy.act(obs, hist_encoding=False)
+                actions_log_prob = self.policy.get_actions_log_prob(storage.actions[step].float())
+                torch.sub(actions_log_prob, storage.actions_log_prob[step], out=log_rhos[step])
+                storage.actions_log_prob[step].copy_(actions_log_prob)
+                storage.mu[step].copy_(self.policy.action_mean)
+                if not storage.global_action_sigma:
+                    storage.sigma[step].copy_(self.policy.action_std)
+                storage.values[step].copy_(self.policy.evaluate(critic_obs.float()))
+            if storage.global_action_sigma:
+                storage.sigma[0, 0].copy_(self.policy.action_std[0])
+        return log_rhos
+
+    def update(self, storage: RolloutStorage | None = None):
+        # the rollout to learn from (the storage being filled by the collection in pipelined mode)
+        storage = self.storage if storage is None else storage
         mean_arm_torques_loss = 0
-        mean_priv_reg_loss = 0
         value_mixing_ratio = self.get_value_mixing_ratio()
         torque_supervision_weight = self.get_torque_supervision_weight() if self.torque_supervision else 0
-        
-        # -- RND loss
-        if self.rnd:
-            mean_rnd_loss = 0
-        else:
-            mean_rnd_loss = None
-        # -- Symmetry loss
-        if self.symmetry:
-            mean_symmetry_loss = 0
-        else:
-            mean_symmetry_loss = None
+        priv_reg_stage = min(max((self.counter - self.priv_reg_coef_schedual[2]), 0) / self.priv_reg_coef_schedual[3], 1)
+        priv_reg_coef = priv_reg_stage * (self.priv_reg_coef_schedual[1] - self.priv_reg_coef_schedual[0]) + self.priv_reg_coef_schedual[0]
+        if self.compiled_mini_batch_loss is not None:
+            # the schedules are passed as tensors so that their changes do not trigger recompilations
+            schedule_tensors = (
+                torch.tensor(value_mixing_ratio, device=self.device),
+                torch.tensor(priv_reg_coef, device=self.device),
+            )
+
+        # sums of the losses over the mini-batches, kept on the device and read once after the update
+        # (value function, surrogate, entropy, privileged regularization, then RND and symmetry if used)
+        loss_sums = torch.zeros(4 + bool(self.rnd) + bool(self.symmetry), device=self.device)
+        if self.sync_free_adaptive_lr:
+            # the optimizer holds the learning rate tensor (a loaded optimizer state replaces it by its own value)
+            for param_group in self.optimizer.param_groups:
+                if param_group["lr"] is not self.learning_rate_tensor:
+                    self.learning_rate_tensor.fill_(param_group["lr"])
+                    param_group["lr"] = self.learning_rate_tensor
 
         # generator for mini batches
         if self.policy.is_recurrent:
-            generator = self.storage.reccurent_mini_batch_generator(self.num_mini_batches, self.num_learning_epochs)
+            generator = storage.recurrent_mini_batch_generator(self.num_mini_batches, self.num_learning_epochs)
+        elif self.packed_mini_batches:
+            generator = storage.packed_mini_batch_generator(self.num_mini_batches, self.num_learning_epochs)
         else:
-            generator = self.storage.mini_batch_generator(self.num_mini_batches, self.num_learning_epochs)
+            generator = storage.mini_batch_generator(self.num_mini_batches, self.num_learning_epochs)
         
         # iterate over batches
         for (
@@ -261,7 +380,8 @@ class PPO:
             hid_states_batch,
             masks_batch,
             rnd_state_batch,
-        ) in generator:
+        ) in self.timer.iterate("mini_batch", generator):
+            self.timer.start("forward")
 
             # number of augmentations per sample
             # we start with 1 and increase it if we use symmetry augmentation
@@ -295,91 +415,62 @@ class PPO:
                 advantages_batch = advantages_batch.repeat(num_aug, 1)
                 returns_batch = returns_batch.repeat(num_aug, 1)
 
-            # Recompute actions log prob and entropy for current batch of transitions
-            # Note: we need to do this because we updated the policy with the new parameters
-            # -- actor
-            self.policy.act(obs_batch, hist_encoding=False, masks=masks_batch, hidden_states=hid_states_batch[0])
-            actions_log_prob_batch = self.policy.get_actions_log_prob(actions_batch)
-            # -- critic
-            value_batch = self.policy.evaluate(critic_obs_batch, masks=masks_batch, hidden_states=hid_states_batch[1])
-            # -- entropy
-            # we only keep the entropy of the first augmentation (the original one)
-            mu_batch = self.policy.action_mean[:original_batch_size]
-            sigma_batch = self.policy.action_std[:original_batch_size]
-            entropy_batch = self.policy.entropy[:original_batch_size]
-    
-            # Adaptation module update
-            priv_latent_batch = self.policy.actor.infer_priv_latent(obs_batch)
-            with torch.inference_mode():
-                hist_latent_batch = self.policy.actor.infer_hist_latent(obs_batch)
-            priv_reg_loss = (priv_latent_batch - hist_latent_batch.detach()).norm(p=2, dim=1).mean()
-            priv_reg_stage = min(max((self.counter - self.priv_reg_coef_schedual[2]), 0) / self.priv_reg_coef_schedual[3], 1)
-            priv_reg_coef = priv_reg_stage * (self.priv_reg_coef_schedual[1] - self.priv_reg_coef_schedual[0]) + self.priv_reg_coef_schedual[0]
-            # priv_reg_loss = torch.zeros(1, device=self.device)
+            # Recompute the actions log prob, values and entropy of the batch with the current parameters, and the
+            # losses (with the compiled function for the mini-batch shape it was compiled for)
+            loss_inputs = (
+                obs_batch,
+                critic_obs_batch,
+                actions_batch,
+                target_values_batch,
+                advantages_batch,
+                returns_batch,
+                old_actions_log_prob_batch,
+                old_mu_batch,
+                old_sigma_batch,
+                masks_batch,
+                hid_states_batch,
+                original_batch_size,
+            )
+            if self._use_compiled_loss(obs_batch, critic_obs_batch):
+                loss_outputs = self.compiled_mini_batch_loss(*loss_inputs, *schedule_tensors)
+            else:
+                loss_outputs = self._mini_batch_loss(*loss_inputs, value_mixing_ratio, priv_reg_coef)
+            loss, surrogate_loss, value_loss, entropy_mean, priv_reg_loss, kl_mean, hist_latent_batch, hist_latent_loss = (
+                loss_outputs
+            )
 
             # KL
             if self.desired_kl is not None and self.schedule == "adaptive":
                 with torch.inference_mode():
-                    kl = torch.sum(
-                        torch.log(sigma_batch / old_sigma_batch + 1.0e-5)
-                        + (torch.square(old_sigma_batch) + torch.square(old_mu_batch - mu_batch))
-                        / (2.0 * torch.square(sigma_batch))
-                        - 0.5,
-                        axis=-1,
-                    )
-                    kl_mean = torch.mean(kl)
-
                     # Reduce the KL divergence across all GPUs
                     if self.is_multi_gpu:
                         torch.distributed.all_reduce(kl_mean, op=torch.distributed.ReduceOp.SUM)
                         kl_mean /= self.gpu_world_size
 
                     # Update the learning rate
+                    if self.sync_free_adaptive_lr:
+                        # on the device, without reading the KL divergence (all the GPUs compute the same value
+                        # from the reduced KL divergence, so the learning rate is not broadcast)
+                        self.adapt_learning_rate_tensor(kl_mean)
                     # Perform this adaptation only on the main process
                     # TODO: Is this needed? If KL-divergence is the "same" across all GPUs,
                     #       then the learning rate should be the same across all GPUs.
-                    if self.gpu_global_rank == 0:
+                    elif self.gpu_global_rank == 0:
                         if kl_mean > self.desired_kl * 2.0:
                             self.learning_rate = max(1e-5, self.learning_rate / 1.5)
                         elif kl_mean < self.desired_kl / 2.0 and kl_mean > 0.0:
                             self.learning_rate = min(1e-2, self.learning_rate * 1.5)
 
                     # Update the learning rate for all GPUs
-                    if self.is_multi_gpu:
+                    if self.is_multi_gpu and not self.sync_free_adaptive_lr:
                         lr_tensor = torch.tensor(self.learning_rate, device=self.device)
                         torch.distributed.broadcast(lr_tensor, src=0)
                         self.learning_rate = lr_tensor.item()
 
                     # Update the learning rate for all parameter groups
-                    for param_group in self.optimizer.param_groups:
-                        param_group["lr"] = self.learning_rate
-
-
-            # Surrogate loss
-            mixing_advantages_batch = torch.zeros_like(advantages_batch)
-            mixing_advantages_batch[..., 0] = advantages_batch[..., 0] + value_mixing_ratio * advantages_batch[..., 1]
-            mixing_advantages_batch[..., 1] = advantages_batch[..., 1] + value_mixing_ratio * advantages_batch[..., 0]
-            ratio = torch.exp(actions_log_prob_batch - old_actions_log_prob_batch)
-            surrogate = - mixing_advantages_batch * ratio
-            surrogate_clipped = - mixing_advantages_batch * torch.clamp(ratio, 1.0 - self.clip_param,
-                                                                            1.0 + self.clip_param)
-            surrogate_loss = torch.max(surrogate, surrogate_clipped).mean()
-
-            # Value function loss
-            if self.use_clipped_value_loss:
-                value_clipped = target_values_batch + (value_batch - target_values_batch).clamp(
-                    -self.clip_param, self.clip_param
-                )
-                value_losses = (value_batch - returns_batch).pow(2)
-                value_losses_clipped = (value_clipped - returns_batch).pow(2)
-                value_loss = torch.max(value_losses, value_losses_clipped).mean()
-            else:
-                value_loss = (returns_batch - value_batch).pow(2).mean()
-
-            loss = surrogate_loss \
-                    + self.value_loss_coef * value_loss \
-                    - self.entropy_coef * entropy_batch.mean() \
-                    + priv_reg_coef * priv_reg_loss
+                    if not self.sync_free_adaptive_lr:
+                        for param_group in self.optimizer.param_groups:
+                            param_group["lr"] = self.learning_rate
 
 
             # adaptive arm gains
@@ -417,7 +508,9 @@ class PPO:
                     num_aug = int(obs_batch.shape[0] / original_batch_size)
 
                 # actions predicted by the actor for symmetrically-augmented observations
-                mean_actions_batch = self.policy.act_inference(obs_batch.detach().clone())
+                # (on the augmented batch of the loss, the history latent of the loss is reused)
+                latent = hist_latent_batch if self._reuse_hist_latent() else None
+                mean_actions_batch = self.policy.act_inference(obs_batch.detach().clone(), latent=latent)
 
                 # compute the symmetrically augmented actions
                 # note: we are assuming the first augmentation is the original one.
@@ -452,55 +545,83 @@ class PPO:
             #     if param.grad is not None:
             #         print(f"{name}: param {param.shape}, grad {param.grad.shape}")
 
+            self.timer.stop("forward")
+
             # Compute the gradients
-            # -- For PPO
+            self.timer.start("backward")
+            # -- the gradients are averaged across the GPUs during the backward passes
+            if self.is_multi_gpu:
+                self.grad_reducer.start()
+            # -- For PPO (and the adaptation module, in the same backward pass)
             self.optimizer.zero_grad()
-            loss.backward()
+            if self.fused_adaptation_update:
+                (loss + hist_latent_loss).backward()
+            else:
+                loss.backward()
             # -- For RND
             if self.rnd:
                 self.rnd_optimizer.zero_grad()  # type: ignore
                 rnd_loss.backward()
+            self.timer.stop("backward")
 
             # Collect gradients from all GPUs
             if self.is_multi_gpu:
-                self.reduce_parameters()
+                with self.timer.phase("all_reduce"):
+                    self.reduce_parameters()
 
             # Apply the gradients
+            self.timer.start("optimizer_step")
+            # -- The history encoder is only stepped by the adaptation optimizer in the fused update (the PPO
+            #    optimizer skips parameters without gradients)
+            if self.fused_adaptation_update:
+                hist_encoder_params = list(self.policy.actor.history_encoder.parameters())
+                hist_encoder_grads = [param.grad for param in hist_encoder_params]
+                for param in hist_encoder_params:
+                    param.grad = None
             # -- For PPO
             nn.utils.clip_grad_norm_(self.policy.parameters(), self.max_grad_norm)
             self.optimizer.step()
             # -- For RND
             if self.rnd_optimizer:
                 self.rnd_optimizer.step()
+            # -- For the adaptation module
+            if self.fused_adaptation_update:
+                for param, grad in zip(hist_encoder_params, hist_encoder_grads):
+                    param.grad = grad
+                nn.utils.clip_grad_norm_(hist_encoder_params, self.max_grad_norm)
+                self.hist_encoder_optimizer.step()
+            self.timer.stop("optimizer_step")
 
             # Store the losses
-            mean_value_loss += value_loss.item()
-            mean_surrogate_loss += surrogate_loss.item()
-            mean_entropy += entropy_batch.mean().item()
-
-            mean_priv_reg_loss += priv_reg_loss.item()
+            batch_losses = [value_loss, surrogate_loss, entropy_mean, priv_reg_loss]
             # -- RND loss
-            if mean_rnd_loss is not None:
-                mean_rnd_loss += rnd_loss.item()
+            if self.rnd:
+                batch_losses.append(rnd_loss)
             # -- Symmetry loss
-            if mean_symmetry_loss is not None:
-                mean_symmetry_loss += symmetry_loss.item()
+            if self.symmetry:
+                batch_losses.append(symmetry_loss)
+            loss_sums += torch.stack(batch_losses).detach()
 
         # -- For PPO     
         num_updates = self.num_learning_epochs * self.num_mini_batches
-        mean_value_loss /= num_updates
-        mean_surrogate_loss /= num_updates
-        mean_entropy /= num_updates
         mean_arm_torques_loss /= num_updates
-        mean_priv_reg_loss /= num_updates
+        # single read of the mean losses (and of the learning rate of the sync-free schedule)
+        mean_losses = loss_sums / num_updates
+        if self.sync_free_adaptive_lr:
+            mean_losses = torch.cat([mean_losses, self.learning_rate_tensor.view(1)])
+        mean_losses = mean_losses.tolist()
+        if self.sync_free_adaptive_lr:
+            self.learning_rate = mean_losses.pop()
+        mean_value_loss, mean_surrogate_loss, mean_entropy, mean_priv_reg_loss = mean_losses[:4]
+        # -- For the adaptation module (the same distance as the privileged regularization, with the gradient
+        #    applied to the history latent instead of the privileged latent)
+        mean_hist_latent_loss = mean_priv_reg_loss if self.fused_adaptation_update else None
         # -- For RND
-        if mean_rnd_loss is not None:
-            mean_rnd_loss /= num_updates
+        mean_rnd_loss = mean_losses[4] if self.rnd else None
         # -- For Symmetry
-        if mean_symmetry_loss is not None:
-            mean_symmetry_loss /= num_updates
+        mean_symmetry_loss = mean_losses[-1] if self.symmetry else None
         # -- Clear the storage
-        self.storage.clear()
+        storage.clear()
 
         self.update_counter()
 
@@ -525,8 +646,134 @@ class PPO:
 
         # TODO:
         # return loss_dict
-        return mean_value_loss, mean_surrogate_loss, mean_arm_torques_loss, value_mixing_ratio, torque_supervision_weight, mean_priv_reg_loss, priv_reg_coef 
-    
+        return mean_value_loss, mean_surrogate_loss, mean_arm_torques_loss, value_mixing_ratio, torque_supervision_weight, mean_priv_reg_loss, priv_reg_coef, mean_hist_latent_loss
+
+    def _mini_batch_loss(
+        self,
+        obs_batch,
+        critic_obs_batch,
+        actions_batch,
+        target_values_batch,
+        advantages_batch,
+        returns_batch,
+        old_actions_log_prob_batch,
+        old_mu_batch,
+        old_sigma_batch,
+        masks_batch,
+        hid_states_batch,
+        original_batch_size,
+        value_mixing_ratio,
+        priv_reg_coef,
+    ):
+        """Forward pass and losses of a mini-batch.
+
+        The function only depends on its inputs and the policy parameters, so it is compiled as a whole with
+        ``compile_update`` (the forward and backward graphs of the policy and of the losses).
+
+        The privileged latent of the actor pass is shared with the privileged regularization loss, so the privileged
+        encoder runs once per mini-batch.
+
+        Returns:
+            The total loss, the surrogate loss, the value loss, the mean entropy, the privileged regularization loss,
+            the mean KL divergence to the old policy (None without the adaptive learning rate schedule), the history
+            latent of the observations (with gradients when the symmetry loss reuses it, see :meth:`update`) and the
+            adaptation loss of the history encoder (None without ``fused_adaptation_update``).
+        """
+        # Recompute actions log prob and entropy for current batch of transitions
+        # Note: we need to do this because we updated the policy with the new parameters
+        # -- actor
+        _, priv_latent_batch = self.policy.act(
+            obs_batch, hist_encoding=False, return_latent=True, masks=masks_batch, hidden_states=hid_states_batch[0]
+        )
+        actions_log_prob_batch = self.policy.get_actions_log_prob(actions_batch)
+        # -- critic
+        value_batch = self.policy.evaluate(critic_obs_batch, masks=masks_batch, hidden_states=hid_states_batch[1])
+        # -- entropy
+        # we only keep the entropy of the first augmentation (the original one)
+        mu_batch = self.policy.action_mean[:original_batch_size]
+        sigma_batch = self.policy.action_std[:original_batch_size]
+        entropy_batch = self.policy.entropy[:original_batch_size]
+
+        # Adaptation module update
+        # the symmetry loss on the augmented batch reuses the history latent (it backpropagates through it)
+        if self._reuse_hist_latent() or self.fused_adaptation_update:
+            hist_latent_batch = self.policy.actor.infer_hist_latent(obs_batch)
+        else:
+            with torch.no_grad():
+                hist_latent_batch = self.policy.actor.infer_hist_latent(obs_batch)
+        priv_reg_loss = (priv_latent_batch - hist_latent_batch.detach()).norm(p=2, dim=1).mean()
+        # the fused update regresses the history latent on the privileged latent of the actor pass (as update_dagger)
+        hist_latent_loss = None
+        if self.fused_adaptation_update:
+            hist_latent_loss = (priv_latent_batch.detach() - hist_latent_batch).norm(p=2, dim=1).mean()
+
+        # KL
+        kl_mean = None
+        if self.desired_kl is not None and self.schedule == "adaptive":
+            with torch.no_grad():
+                kl = torch.sum(
+                    torch.log(sigma_batch / old_sigma_batch + 1.0e-5)
+                    + (torch.square(old_sigma_batch) + torch.square(old_mu_batch - mu_batch))
+                    / (2.0 * torch.square(sigma_batch))
+                    - 0.5,
+                    axis=-1,
+                )
+                kl_mean = torch.mean(kl)
+
+        # Surrogate loss
+        mixing_advantages_batch = torch.zeros_like(advantages_batch)
+        mixing_advantages_batch[..., 0] = advantages_batch[..., 0] + value_mixing_ratio * advantages_batch[..., 1]
+        mixing_advantages_batch[..., 1] = advantages_batch[..., 1] + value_mixing_ratio * advantages_batch[..., 0]
+        ratio = torch.exp(actions_log_prob_batch - old_actions_log_prob_batch)
+        surrogate = - mixing_advantages_batch * ratio
+        surrogate_clipped = - mixing_advantages_batch * torch.clamp(ratio, 1.0 - self.clip_param,
+                                                                        1.0 + self.clip_param)
+        surrogate_loss = torch.max(surrogate, surrogate_clipped).mean()
+
+        # Value function loss
+        if self.use_clipped_value_loss:
+            value_clipped = target_values_batch + (value_batch - target_values_batch).clamp(
+                -self.clip_param, self.clip_param
+            )
+            value_losses = (value_batch - returns_batch).pow(2)
+            value_losses_clipped = (value_clipped - returns_batch).pow(2)
+            value_loss = torch.max(value_losses, value_losses_clipped).mean()
+        else:
+            value_loss = (returns_batch - value_batch).pow(2).mean()
+
+        entropy_mean = entropy_batch.mean()
+        loss = surrogate_loss \
+                + self.value_loss_coef * value_loss \
+                - self.entropy_coef * entropy_mean \
+                + priv_reg_coef * priv_reg_loss
+        return loss, surrogate_loss, value_loss, entropy_mean, priv_reg_loss, kl_mean, hist_latent_batch, hist_latent_loss
+
+    def adapt_learning_rate_tensor(self, kl_mean: torch.Tensor):
+        """Adapt the learning rate tensor to the KL divergence on the device (same rule as the Python schedule)."""
+        learning_rate = self.learning_rate_tensor
+        decrease = kl_mean > self.desired_kl * 2.0
+        increase = (kl_mean < self.desired_kl / 2.0) & (kl_mean > 0.0)
+        new_learning_rate = torch.where(decrease, (learning_rate / 1.5).clamp(min=1e-5), learning_rate)
+        new_learning_rate = torch.where(increase, (learning_rate * 1.5).clamp(max=1e-2), new_learning_rate)
+        learning_rate.copy_(new_learning_rate)
+
+    def _reuse_hist_latent(self):
+        """Whether the symmetry loss reuses the history latent of the loss (the batch is already augmented)."""
+        return bool(self.symmetry) and self.symmetry["use_data_augmentation"]
+
+    def _use_compiled_loss(self, obs_batch, critic_obs_batch):
+        """Whether the mini-batch goes through the compiled loss.
+
+        The loss is compiled for the shapes of the first mini-batch. Mini-batches of other shapes (e.g. the remainder
+        of an uneven split) fall back to the eager loss instead of triggering a recompilation.
+        """
+        if self.compiled_mini_batch_loss is None:
+            return False
+        shapes = (obs_batch.shape, critic_obs_batch.shape)
+        if self.compiled_batch_shapes is None:
+            self.compiled_batch_shapes = shapes
+        return shapes == self.compiled_batch_shapes
+
     def enforce_min_std(self):
         current_std = self.policy.std.detach()
         new_std = torch.max(current_std, self.min_policy_std).detach()
@@ -563,17 +810,22 @@ class PPO:
         return arm_torques
 
     #TODO:
-    def update_dagger(self):
-        mean_hist_latent_loss = 0
+    def update_dagger(self, storage: RolloutStorage | None = None):
+        storage = self.storage if storage is None else storage
+        # sum of the losses over the mini-batches, kept on the device and read once after the update
+        hist_latent_loss_sum = torch.zeros((), device=self.device)
         if self.policy.is_recurrent:
-            generator = self.storage.reccurent_mini_batch_generator(self.num_mini_batches, self.num_learning_epochs)
+            generator = storage.recurrent_mini_batch_generator(self.num_mini_batches, self.num_learning_epochs)
+        elif self.packed_mini_batches:
+            generator = storage.packed_mini_batch_generator(self.num_mini_batches, self.num_learning_epochs)
         else:
-            generator = self.storage.mini_batch_generator(self.num_mini_batches, self.num_learning_epochs)
+            generator = storage.mini_batch_generator(self.num_mini_batches, self.num_learning_epochs)
         for obs_batch, critic_obs_batch, actions_batch, target_values_batch, advantages_batch, \
             returns_batch, old_actions_log_prob_batch, \
             old_mu_batch, old_sigma_batch, target_arm_torques, current_arm_dof_pos, \
-                current_arm_dof_vel, hid_states_batch, masks_batch ,rnd_state_batch in generator: #TODO
+                current_arm_dof_vel, hid_states_batch, masks_batch ,rnd_state_batch in self.timer.iterate("mini_batch", generator): #TODO
                 # print('obs_batch_updatedagger', obs_batch.shape)
+                self.timer.start("forward")
                 with torch.inference_mode():
                     self.policy.act(obs_batch, hist_encoding=True, masks=masks_batch, hidden_states=hid_states_batch[0])
 
@@ -582,15 +834,24 @@ class PPO:
                     priv_latent_batch = self.policy.actor.infer_priv_latent(obs_batch)
                 hist_latent_batch = self.policy.actor.infer_hist_latent(obs_batch)
                 hist_latent_loss = (priv_latent_batch.detach() - hist_latent_batch).norm(p=2, dim=1).mean()
-                self.hist_encoder_optimizer.zero_grad()
-                hist_latent_loss.backward()
-                nn.utils.clip_grad_norm_(self.policy.actor.history_encoder.parameters(), self.max_grad_norm)
-                self.hist_encoder_optimizer.step()
+                self.timer.stop("forward")
+                with self.timer.phase("backward"):
+                    self.hist_encoder_optimizer.zero_grad()
+                    if self.is_multi_gpu:
+                        self.hist_encoder_grad_reducer.start()
+                    hist_latent_loss.backward()
+                # Collect gradients from all GPUs
+                if self.is_multi_gpu:
+                    with self.timer.phase("all_reduce"):
+                        self.hist_encoder_grad_reducer.finish()
+                with self.timer.phase("optimizer_step"):
+                    nn.utils.clip_grad_norm_(self.policy.actor.history_encoder.parameters(), self.max_grad_norm)
+                    self.hist_encoder_optimizer.step()
                 
-                mean_hist_latent_loss += hist_latent_loss.item()
+                hist_latent_loss_sum += hist_latent_loss.detach()
         num_updates = self.num_learning_epochs * self.num_mini_batches
-        mean_hist_latent_loss /= num_updates
-        self.storage.clear()
+        mean_hist_latent_loss = hist_latent_loss_sum.item() / num_updates
+        storage.clear()
         self.update_counter()
         return mean_hist_latent_loss
 
@@ -601,43 +862,28 @@ class PPO:
 
     def broadcast_parameters(self):
         """Broadcast model parameters to all GPUs."""
-        # obtain the model parameters on current GPU
-        model_params = [self.policy.state_dict()]
-        if self.rnd:
-            model_params.append(self.rnd.predictor.state_dict())
-        # broadcast the model parameters
-        torch.distributed.broadcast_object_list(model_params, src=0)
-        # load the model parameters on all GPUs from source GPU
-        self.policy.load_state_dict(model_params[0])
+        # the parameters and buffers of the models, in the same order on all GPUs
+        model_tensors = list(self.policy.state_dict().values())
         if self.rnd:
-            self.rnd.predictor.load_state_dict(model_params[1])
+            model_tensors += list(self.rnd.predictor.state_dict().values())
+        # overwrite them with those of the main process (without serialization)
+        broadcast_tensors(model_tensors, src=0)
 
-    def reduce_parameters(self):
-        """Collect gradients from all GPUs and average them.
+    def set_process_group(self, global_rank: int, world_size: int):
+        """Use the rank and world size of a new process group (elastic training).
 
-        This function is called after the backward pass to synchronize the gradients across all GPUs.
+        The gradients in flight in the previous process group are dropped.
         """
-        # Create a tensor to store the gradients
-        grads = [param.grad.view(-1) for param in self.policy.parameters() if param.grad is not None]
-        if self.rnd:
-            grads += [param.grad.view(-1) for param in self.rnd.parameters() if param.grad is not None]
-        all_grads = torch.cat(grads)
+        self.gpu_global_rank = global_rank
+        self.gpu_world_size = world_size
+        self.grad_reducer.reset(world_size)
+        self.hist_encoder_grad_reducer.reset(world_size)
 
-        # Average the gradients across all GPUs
-        torch.distributed.all_reduce(all_grads, op=torch.distributed.ReduceOp.SUM)
-        all_grads /= self.gpu_world_size
+    def reduce_parameters(self):
+        """Collect gradients from all GPUs and average them.
 
-        # Get all parameters
-        all_params = self.policy.parameters()
-        if self.rnd:
-            all_params = chain(all_params, self.rnd.parameters())
-
-        # Update the gradients for all parameters with the reduced gradients
-        offset = 0
-        for param in all_params:
-            if param.grad is not None:
-                numel = param.numel()
-                # copy data back from shared buffer
-                param.grad.data.copy_(all_grads[offset : offset + numel].view_as(param.grad.data))
-                # update the offset for the next parameter
-                offset += numel
\ No newline at end of file
+        This function is called after the backward passes. The buckets of gradients that were complete during the
+        backward passes are already being reduced (see :class:`GradientBucketReducer`), so this function reduces the
+        remaining ones and waits for the averaged gradients.
+        """
+        self.grad_reducer.finish()
\ No newline at end of file
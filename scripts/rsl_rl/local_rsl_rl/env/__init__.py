@@ -5,6 +5,7 @@
 
 """Submodule defining the environment definitions."""
 
+from .synthetic_vec_env import SyntheticVecEnv
 from .vec_env import VecEnv
 
-__all__ = ["VecEnv"]
+__all__ = ["SyntheticVecEnv", "VecEnv"]
@@ -0,0 +1,209 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+from __future__ import annotations
+
+import time
+import torch
+
+from .vec_env import VecEnv
+
+# proprioceptive terms of the Go2Arm policy observations (values per frame), in the order of the observation manager
+POLICY_TERMS = {
+    "base_ang_vel": 3,
+    "joint_pos": 18,
+    "joint_vel": 18,
+    "actions": 18,
+    "velocity_commands": 3,
+    "Go2_pose_command": 7,
+    "projected_gravity": 3,
+}
+# privileged terms of the Go2Arm policy observations (without history)
+PRIVILEGED_TERMS = {
+    "priv_mass_base": 1,
+    "priv_mass_ee": 1,
+    "priv_joint_torques": 18,
+    "priv_base_lin_vel": 3,
+    "priv_feet_contact": 4,
+}
+
+
+class SyntheticEnvCfg:
+    """Configuration of :class:`SyntheticVecEnv` (the attributes read from ``env.cfg`` by the runner and wrapper)."""
+
+    def __init__(self, is_finite_horizon: bool = False):
+        self.is_finite_horizon = is_finite_horizon
+
+
+class SyntheticVecEnv(VecEnv):
+    """Synthetic stand-in for the Go2Arm environment wrapped by ``RslRlVecEnvWrapper``.
+
+    The environment follows the contract of the wrapper without a simulator, so the learner can be run and benchmarked
+    on machines without Isaac Sim:
+
+    - the policy observations have the layout of the observation manager: the history of each proprioceptive term
+      (oldest frame first) followed by the privileged ``priv_`` terms, with the term names and lengths returned by
+      :meth:`get_obs_list_length`,
+    - :meth:`step` returns the leg and the arm rewards separately, and the time-outs in ``extras["time_outs"]``
+      (unless the environment is finite horizon),
+    - the episodes end with a termination probability per step or at their time limit. The time limit of each
+      episode is drawn between ``min_episode_length`` and ``max_episode_length`` when it starts.
+
+    The proprioceptive frames follow a stable linear system driven by the actions, and the rewards favor small actions,
+    so the training signal is meaningful but cheap to compute. ``step_latency`` blocks each step for a fixed time
+    (e.g. to stand in for a simulator stepping on another device).
+    """
+
+    def __init__(
+        self,
+        num_envs: int,
+        num_history: int = 10,
+        max_episode_length: int = 1000,
+        min_episode_length: int | None = None,
+        termination_probability: float = 0.0,
+        single_frame: bool = False,
+        is_finite_horizon: bool = False,
+        step_latency: float = 0.0,
+        step_dt: float = 0.02,
+        seed: int = 0,
+        device: str = "cpu",
+    ):
+        """Initialize the environment.
+
+        Args:
+            num_envs: Number of environments.
+            num_history: Length of the history of the proprioceptive terms.
+            max_episode_length: Maximum time limit of the episodes (in steps).
+            min_episode_length: Minimum time limit of the episodes. Defaults to None (equal to the maximum).
+            termination_probability: Probability of a termination at each step.
+            single_frame: Whether the observations only contain the newest proprioceptive frame (for the
+                ``obs_history_length`` option of the runner).
+            is_finite_horizon: Whether the time-outs are terminal (they are then not reported in the extras).
+            step_latency: Time in seconds each step blocks for.
+            step_dt: Time step of the environment in seconds.
+            seed: Seed of the random generator of the environment.
+            device: Device of the environment tensors.
+        """
+        self.num_envs = num_envs
+        self.num_history = num_history
+        self.num_prop = sum(POLICY_TERMS.values())
+        self.num_priv = sum(PRIVILEGED_TERMS.values())
+        self.num_actions = POLICY_TERMS["actions"]
+        self.num_obs = self.num_prop * (1 if single_frame else num_history) + self.num_priv
+        self.max_episode_length = max_episode_length
+        self.min_episode_length = max_episode_length if min_episode_length is None else min_episode_length
+        self.termination_probability = termination_probability
+        self.single_frame = single_frame
+        self.step_latency = step_latency
+        self.step_dt = step_dt
+        self.device = device
+        self.cfg = SyntheticEnvCfg(is_finite_horizon)
+
+        self.generator = torch.Generator(device=device).manual_seed(seed)
+        self.episode_length_buf = torch.zeros(num_envs, dtype=torch.long, device=device)
+        self.time_limits = torch.zeros(num_envs, dtype=torch.long, device=device)
+        # history of the proprioceptive frames (oldest first) and privileged values
+        self.history = torch.zeros(num_envs, num_history, self.num_prop, device=device)
+        self.privileged = torch.zeros(num_envs, self.num_priv, device=device)
+        # random stable dynamics of the frames and their response to the actions
+        self.decay = 0.5 + 0.45 * torch.rand(self.num_prop, generator=self.generator, device=device)
+        self.action_gain = 0.1 * torch.randn(self.num_actions, self.num_prop, generator=self.generator, device=device)
+
+        # gather from the history (flattened frame-major) to the term-major layout of the observation manager
+        index, offset = [], 0
+        frames = range(num_history - 1, num_history) if single_frame else range(num_history)
+        for name, length in POLICY_TERMS.items():
+            index += [frame * self.num_prop + offset + i for frame in frames for i in range(length)]
+            if name == "actions":
+                self.actions_slice = slice(offset, offset + length)
+            offset += length
+        self.obs_index = torch.tensor(index, dtype=torch.long, device=device)
+
+        self._reset_envs(torch.ones(num_envs, dtype=torch.bool, device=device))
+
+    @property
+    def unwrapped(self) -> SyntheticVecEnv:
+        return self
+
+    def get_obs_list_length(self) -> tuple[list[str], list[int]]:
+        """Return the names and lengths of the policy observation terms (see ``RslRlVecEnvWrapper``)."""
+        num_frames = 1 if self.single_frame else self.num_history
+        keys = [f"policy-{name}" for name in POLICY_TERMS] + [f"policy-{name}" for name in PRIVILEGED_TERMS]
+        lengths = [length * num_frames for length in POLICY_TERMS.values()] + list(PRIVILEGED_TERMS.values())
+        return keys, lengths
+
+    """
+    Operations.
+    """
+
+    def get_observations(self) -> tuple[torch.Tensor, dict]:
+        obs = self._compute_observations()
+        return obs, {"observations": {"policy": obs}}
+
+    def reset(self) -> tuple[torch.Tensor, dict]:
+        self.episode_length_buf.zero_()
+        self._reset_envs(torch.ones(self.num_envs, dtype=torch.bool, device=self.device))
+        return self.get_observations()
+
+    def step(self, actions: torch.Tensor) -> tuple[torch.Tensor, torch.Tensor, torch.Tensor, torch.Tensor, dict]:
+        if self.step_latency > 0.0:
+            time.sleep(self.step_latency)
+        actions = actions.to(self.device)
+
+        # advance the frames
+        frame = self.history[:, -1] * self.decay + actions @ self.action_gain
+        frame[:, self.actions_slice] = actions
+        frame += 0.05 * torch.randn(frame.shape, generator=self.generator, device=self.device)
+        self.history = torch.cat([self.history[:, 1:], frame.unsqueeze(1)], dim=1)
+
+        # rewards of the legs and of the arm
+        rewards = 1.0 - actions[:, :12].square().mean(dim=-1) - 0.1 * frame[:, :3].square().sum(dim=-1)
+        arm_rewards = 1.0 - actions[:, 12:].square().mean(dim=-1)
+
+        # terminations and time-outs
+        self.episode_length_buf += 1
+        time_outs = self.episode_length_buf >= self.time_limits
+        terminated = torch.rand(self.num_envs, generator=self.generator, device=self.device)
+        terminated = terminated < self.termination_probability
+        dones = terminated | time_outs
+        extras = {}
+        if dones.any():
+            extras["log"] = {
+                "Episode_Termination/time_out": time_outs.float().mean(),
+                "Episode_Termination/terminated": (terminated & ~time_outs).float().mean(),
+            }
+            self.episode_length_buf[dones] = 0
+            self._reset_envs(dones)
+
+        obs = self._compute_observations()
+        extras["observations"] = {"policy": obs}
+        if not self.cfg.is_finite_horizon:
+            extras["time_outs"] = time_outs
+        return obs, rewards, arm_rewards, dones.long(), extras
+
+    def close(self):
+        pass
+
+    """
+    Helper functions.
+    """
+
+    def _reset_envs(self, env_mask: torch.Tensor):
+        num_resets = int(env_mask.sum())
+        frame = torch.randn(num_resets, self.num_prop, generator=self.generator, device=self.device)
+        # the history of a new episode is filled with its first frame (as the history buffers of the managers)
+        self.history[env_mask] = frame.unsqueeze(1).expand(-1, self.num_history, -1)
+        self.privileged[env_mask] = torch.randn(num_resets, self.num_priv, generator=self.generator, device=self.device)
+        self.time_limits[env_mask] = torch.randint(
+            self.min_episode_length,
+            self.max_episode_length + 1,
+            (num_resets,),
+            generator=self.generator,
+            device=self.device,
+        )
+
+    def _compute_observations(self) -> torch.Tensor:
+        history = self.history.reshape(self.num_envs, -1)
+        return torch.cat([history.index_select(1, self.obs_index), self.privileged], dim=1)
@@ -11,6 +11,7 @@ from .normalizer import EmpiricalNormalization
 from .rnd import RandomNetworkDistillation
 from .student_teacher import StudentTeacher
 from .student_teacher_recurrent import StudentTeacherRecurrent
+from .actor_critic import StreamingHistoryEncoder
 
 __all__ = [
     "ActorCritic",
@@ -19,4 +20,5 @@ __all__ = [
     "RandomNetworkDistillation",
     "StudentTeacher",
     "StudentTeacherRecurrent",
+    "StreamingHistoryEncoder",
 ]
@@ -9,9 +9,37 @@ import torch
 import torch.nn as nn
 from torch.distributions import Normal
 
+from local_rsl_rl.networks import GroupedMLP
 from local_rsl_rl.utils import resolve_nn_activation
 
 
+# (kernel size, stride) of the convolutions of the history encoder for the original history lengths
+HISTORY_CONV_SCHEDULES = {
+    10: [(4, 2), (2, 1)],
+    20: [(6, 2), (4, 2)],
+    50: [(8, 4), (5, 1), (5, 1)],
+}
+# number of time steps left by the convolutions (flattened into the output layer)
+HISTORY_CONV_OUTPUT_LENGTH = 3
+
+
+def history_conv_schedule(tsteps: int) -> list[tuple[int, int]]:
+    """Return the (kernel size, stride) of the convolutions of the history encoder for a history length.
+
+    The original schedules are kept for 10, 20 and 50 steps (so their checkpoints load). For other lengths, a first
+    convolution with a stride of about a fifth of the history and a kernel of twice the stride downsamples the history
+    to 4 to 8 steps, and a second convolution with a stride of 1 reduces them to 3 steps.
+    """
+    if tsteps in HISTORY_CONV_SCHEDULES:
+        return HISTORY_CONV_SCHEDULES[tsteps]
+    if tsteps < HISTORY_CONV_OUTPUT_LENGTH:
+        raise ValueError(f"The history encoder needs at least {HISTORY_CONV_OUTPUT_LENGTH} steps, got {tsteps}.")
+    stride = max(1, tsteps // 5)
+    kernel_size = 2 * stride if tsteps // stride - 1 >= HISTORY_CONV_OUTPUT_LENGTH else 1
+    length = (tsteps - kernel_size) // stride + 1
+    return [(kernel_size, stride), (length - HISTORY_CONV_OUTPUT_LENGTH + 1, 1)]
+
+
 # History Encoder
 class StateHistoryEncoder(nn.Module):
     def __init__(self, activation_fn, input_size, tsteps, output_size, tanh_encoder_output=False):
@@ -27,23 +55,16 @@ class StateHistoryEncoder(nn.Module):
                 nn.Linear(input_size, 3 * channel_size), self.activation_fn,
                 )
 
-        if tsteps == 50:
-            self.conv_layers = nn.Sequential(
-                    nn.Conv1d(in_channels = 3 * channel_size, out_channels = 2 * channel_size, kernel_size = 8, stride = 4), self.activation_fn,
-                    nn.Conv1d(in_channels = 2 * channel_size, out_channels = channel_size, kernel_size = 5, stride = 1), self.activation_fn,
-                    nn.Conv1d(in_channels = channel_size, out_channels = channel_size, kernel_size = 5, stride = 1), self.activation_fn, nn.Flatten())
-        elif tsteps == 10:
-            self.conv_layers = nn.Sequential(
-                nn.Conv1d(in_channels = 3 * channel_size, out_channels = 2 * channel_size, kernel_size = 4, stride = 2), self.activation_fn,
-                nn.Conv1d(in_channels = 2 * channel_size, out_channels = channel_size, kernel_size = 2, stride = 1), self.activation_fn,
-                nn.Flatten())
-        elif tsteps == 20:
-            self.conv_layers = nn.Sequential(
-                nn.Conv1d(in_channels = 3 * channel_size, out_channels = 2 * channel_size, kernel_size = 6, stride = 2), self.activation_fn,
-                nn.Conv1d(in_channels = 2 * channel_size, out_channels = channel_size, kernel_size = 4, stride = 2), self.activation_fn,
-                nn.Flatten())
-        else:
-            raise(ValueError("tsteps must be 10, 20 or 50"))
+        # the first convolution halves the channels of the projection, the others keep them
+        conv_layers = []
+        in_channels, out_channels = 3 * channel_size, 2 * channel_size
+        for kernel_size, stride in history_conv_schedule(tsteps):
+            conv_layers += [
+                nn.Conv1d(in_channels=in_channels, out_channels=out_channels, kernel_size=kernel_size, stride=stride),
+                self.activation_fn,
+            ]
+            in_channels, out_channels = out_channels, channel_size
+        self.conv_layers = nn.Sequential(*conv_layers, nn.Flatten())
 
         self.linear_output = nn.Sequential(
                 nn.Linear(channel_size * 3, output_size), self.activation_fn
@@ -59,8 +80,107 @@ class StateHistoryEncoder(nn.Module):
         output = self.linear_output(output)
         return output
 
+
+class StreamingHistoryEncoder(nn.Module):
+    """Step-wise inference of a :class:`StateHistoryEncoder` from the newest proprioceptive frame.
+
+    The batch encoder projects all the frames of the history and runs the convolutions over all of them at every step,
+    although everything but the outputs that involve the newest frame was already computed at the previous steps. An
+    output of a convolution only depends on the time of its newest input, so the streaming encoder computes, per step,
+    the projection of the newest frame and the newest output of each convolution (a matrix product with the dilated
+    window of the previous outputs), and keeps the previous ones in per-environment rings. The latents match the ones of
+    the batch encoder on the observations of the observation manager, up to the rounding of the convolutions computed
+    as matrix products.
+
+    Like the history buffers of the observation manager, the history of an environment is filled with its first frame
+    after a reset (see :meth:`reset`), so the rings of the environment are filled with the outputs of that frame. The
+    rings are stored twice along the time axis, so the dilated windows are strided views of the buffers.
+    """
+
+    def __init__(self, history_encoder: StateHistoryEncoder, num_envs: int, device: str | None = None):
+        """Build the rings of the projections and of the outputs of the convolutions.
+
+        Args:
+            history_encoder: The encoder whose parameters are used (shared, not copied).
+            num_envs: Number of environments.
+            device: Device of the rings. Defaults to the device of the encoder.
+        """
+        super().__init__()
+        self.history_encoder = history_encoder
+        self.num_envs = num_envs
+        if device is None:
+            device = next(history_encoder.parameters()).device
+
+        layers = list(history_encoder.conv_layers)
+        self.convs = [layer for layer in layers if isinstance(layer, nn.Conv1d)]
+        self.activations = [layers[layers.index(conv) + 1] for conv in self.convs]
+        # the inputs of a convolution are dilated by the strides of the previous ones, and the rings keep the inputs
+        # of its kernel (the last ring keeps the outputs flattened into the output layer)
+        self.dilations = [1]
+        for conv in self.convs:
+            self.dilations.append(self.dilations[-1] * conv.stride[0])
+        self.kernel_sizes = [conv.kernel_size[0] for conv in self.convs] + [HISTORY_CONV_OUTPUT_LENGTH]
+        self.ring_lengths = [(k - 1) * d + 1 for k, d in zip(self.kernel_sizes, self.dilations)]
+        channels = [self.convs[0].in_channels] + [conv.out_channels for conv in self.convs]
+        self.rings = [torch.zeros(num_envs, c, 2 * r, device=device) for c, r in zip(channels, self.ring_lengths)]
+        # slots written at each position of the pointer of a ring (the slot and its copy in the second half)
+        self.slot_masks = [
+            (torch.arange(2 * r, device=device) % r == torch.arange(r, device=device).unsqueeze(1)).unsqueeze(1)
+            for r in self.ring_lengths
+        ]
+
+        # environments whose history is filled with their next frame (all of them before the first step)
+        self.reset_pending = torch.ones(num_envs, dtype=torch.bool, device=device)
+        self.num_steps = 0
+
+    def reset(self, dones: torch.Tensor | None = None):
+        """Fill the history of the environments with their next frame.
+
+        Args:
+            dones: Environments that were reset (all of them if None). Shape: (num_envs,)
+        """
+        if dones is None:
+            self.reset_pending.fill_(True)
+        else:
+            self.reset_pending |= dones.to(self.reset_pending.device).bool()
+
+    def forward(self, frames: torch.Tensor) -> torch.Tensor:
+        """Push the newest frames and return the latents of the history.
+
+        Args:
+            frames: Newest proprioceptive frames. Shape: (num_envs, num_prop)
+
+        Returns:
+            The latents. Shape: (num_envs, output_size)
+        """
+        self.num_steps += 1
+        values = self.history_encoder.encoder(frames)
+        for i, conv in enumerate(self.convs):
+            self._push(i, values)
+            weight = conv.weight.view(conv.out_channels, -1)
+            values = self.activations[i](nn.functional.linear(self._window(i), weight, conv.bias))
+        self._push(len(self.convs), values)
+        self.reset_pending.fill_(False)
+        return self.history_encoder.linear_output(self._window(len(self.convs)))
+
+    def _push(self, i: int, values: torch.Tensor):
+        """Write the newest values of a ring (in all its slots for the reset environments)."""
+        ring = self.rings[i]
+        slots = self.slot_masks[i][-self.num_steps % self.ring_lengths[i]]
+        # a single selection writes the newest slots and fills the rings of the reset environments (without a host
+        # synchronization)
+        torch.where(slots | self.reset_pending.view(-1, 1, 1), values.unsqueeze(-1), ring, out=ring)
+
+    def _window(self, i: int) -> torch.Tensor:
+        """Dilated window of a ring, newest first and flattened channel by channel. Shape: (num_envs, c * k)"""
+        pointer = -self.num_steps % self.ring_lengths[i]
+        window = self.rings[i][:, :, pointer : pointer + self.ring_lengths[i] : self.dilations[i]]
+        return window.reshape(self.num_envs, -1)
+
+
 class  ActorCritic(nn.Module):
     is_recurrent = False
+    has_global_std = True
 
     def __init__(
         self,  
@@ -76,6 +196,7 @@ class  ActorCritic(nn.Module):
         activation_out='tanh',
         init_noise_std=1.0,
         noise_std_type: str = "scalar",
+        grouped_heads: bool = False,
         **kwargs,
     ):
         if kwargs:
@@ -100,14 +221,16 @@ class  ActorCritic(nn.Module):
         activation_out = resolve_nn_activation(activation_out)
         mlp_input_dim_a = num_actor_obs
         mlp_input_dim_c = num_critic_obs
+        self.grouped_heads = grouped_heads
 
         # Policy
         class Actor(nn.Module):
             def __init__(self, mlp_input_dim_a, actor_hidden_dims, activation,activation_out, 
                 leg_control_head_hidden_dims, arm_control_head_hidden_dims, 
-                num_leg_actions, num_arm_actions, num_priv, num_hist, num_prop, priv_encoder_dims):
+                num_leg_actions, num_arm_actions, num_priv, num_hist, num_prop, priv_encoder_dims, grouped_heads):
                 super().__init__()
                 self.num_arm_actions = num_arm_actions
+                self.grouped_heads = grouped_heads
 
                 # Policy
                 if len(priv_encoder_dims) > 0:
@@ -158,7 +281,7 @@ class  ActorCritic(nn.Module):
                     else:
                         actor_leg_layers.append(nn.Linear(leg_control_head_hidden_dims[l], leg_control_head_hidden_dims[l + 1]))
                         actor_leg_layers.append(activation)
-                self.actor_leg_control_head = nn.Sequential(*actor_leg_layers)
+                actor_leg_control_head = nn.Sequential(*actor_leg_layers)
 
                 actor_arm_layers = []
                 actor_arm_layers.append(nn.Linear(actor_backbone_output_dim, arm_control_head_hidden_dims[0]))
@@ -170,20 +293,41 @@ class  ActorCritic(nn.Module):
                     else:
                         actor_arm_layers.append(nn.Linear(arm_control_head_hidden_dims[l], arm_control_head_hidden_dims[l + 1]))
                         actor_arm_layers.append(activation)
-                self.actor_arm_control_head = nn.Sequential(*actor_arm_layers)
+                actor_arm_control_head = nn.Sequential(*actor_arm_layers)
+
+                # the grouped heads evaluate both heads with one matrix product per layer
+                if grouped_heads:
+                    self.control_heads = GroupedMLP.from_sequentials([actor_leg_control_head, actor_arm_control_head])
+                else:
+                    self.actor_leg_control_head = actor_leg_control_head
+                    self.actor_arm_control_head = actor_arm_control_head
             
-            def forward(self, obs, hist_encoding: bool = True):
+            def forward(self, obs, hist_encoding: bool = True, latent=None, return_latent: bool = False):
+                """Compute the actions.
+
+                Args:
+                    obs: The observations.
+                    hist_encoding: Whether the latent is encoded from the history or from the privileged observations.
+                    latent: The latent of the observations, if it was already computed (skips the encoder).
+                    return_latent: Whether to also return the latent, so callers can reuse its activations.
+                """
                 obs_prop = obs[:, :self.num_prop]
-                if hist_encoding:
-                    latent = self.infer_hist_latent(obs)
-                else:
-                    latent = self.infer_priv_latent(obs)
+                if latent is None:
+                    if hist_encoding:
+                        latent = self.infer_hist_latent(obs)
+                    else:
+                        latent = self.infer_priv_latent(obs)
                 backbone_input = torch.cat([obs_prop, latent], dim=1)
                 backbone_output = self.actor_backbone(backbone_input)
-                leg_output = self.actor_leg_control_head(backbone_output)
-                arm_output = self.actor_arm_control_head(backbone_output)
-
-                return torch.cat([leg_output, arm_output], dim=-1)
+                if self.grouped_heads:
+                    actions = self.control_heads(backbone_output)
+                else:
+                    leg_output = self.actor_leg_control_head(backbone_output)
+                    arm_output = self.actor_arm_control_head(backbone_output)
+                    actions = torch.cat([leg_output, arm_output], dim=-1)
+                if return_latent:
+                    return actions, latent
+                return actions
             
             def infer_priv_latent(self, obs):
                 priv = obs[:, (self.num_prop * self.num_hist): ]
@@ -200,9 +344,10 @@ class  ActorCritic(nn.Module):
         class Critic(nn.Module):
             def __init__(self, mlp_input_dim_c, critic_hidden_dims, activation,
                          critic_leg_control_head_hidden_dims, critic_arm_control_head_hidden_dims,
-                         num_priv, num_hist, num_prop):
+                         num_priv, num_hist, num_prop, grouped_heads):
                 super().__init__()
 
+                self.grouped_heads = grouped_heads
                 self.num_priv = num_priv
                 self.num_hist = num_hist
                 self.num_prop = num_prop
@@ -233,7 +378,7 @@ class  ActorCritic(nn.Module):
                     else:   
                         critic_leg_layers.append(nn.Linear(critic_leg_control_head_hidden_dims[l], critic_leg_control_head_hidden_dims[l + 1]))
                         critic_leg_layers.append(activation)
-                self.critic_leg_control_head = nn.Sequential(*critic_leg_layers)
+                critic_leg_control_head = nn.Sequential(*critic_leg_layers)
 
                 critic_arm_layers = []
                 critic_arm_layers.append(nn.Linear(critic_backbone_output_dim, critic_arm_control_head_hidden_dims[0]))
@@ -244,23 +389,31 @@ class  ActorCritic(nn.Module):
                     else:
                         critic_arm_layers.append(nn.Linear(critic_arm_control_head_hidden_dims[l], critic_arm_control_head_hidden_dims[l + 1]))
                         critic_arm_layers.append(activation)
-                self.critic_arm_control_head = nn.Sequential(*critic_arm_layers)
+                critic_arm_control_head = nn.Sequential(*critic_arm_layers)
+
+                if grouped_heads:
+                    self.control_heads = GroupedMLP.from_sequentials([critic_leg_control_head, critic_arm_control_head])
+                else:
+                    self.critic_leg_control_head = critic_leg_control_head
+                    self.critic_arm_control_head = critic_arm_control_head
             
             def forward(self, obs):
                 prop_obs = obs[:, :self.num_prop]
                 priv_obs = obs[:, -self.num_priv:]
                 prop_and_priv = torch.cat([prop_obs, priv_obs], dim=-1)
                 backbone_output = self.critic_backbone(prop_and_priv)
+                if self.grouped_heads:
+                    return self.control_heads(backbone_output)
                 leg_output = self.critic_leg_control_head(backbone_output)
                 arm_output = self.critic_arm_control_head(backbone_output)
                 return torch.cat([leg_output, arm_output], dim=-1)
 
         self.actor = Actor(mlp_input_dim_a, actor_hidden_dims, activation,activation_out, leg_control_head_hidden_dims, arm_control_head_hidden_dims, \
             self.num_leg_actions, self.num_arm_actions, 
-            num_priv, num_hist, num_prop, priv_encoder_dims)
+            num_priv, num_hist, num_prop, priv_encoder_dims, grouped_heads)
 
         self.critic = Critic(mlp_input_dim_c + num_priv, critic_hidden_dims, activation, critic_leg_control_head_hidden_dims, critic_arm_control_head_hidden_dims, 
-                             num_priv, num_hist, num_prop)
+                             num_priv, num_hist, num_prop, grouped_heads)
 
 
         print(f"Actor MLP: {self.actor}")
@@ -317,8 +470,11 @@ class  ActorCritic(nn.Module):
         arm_entropy_sum = entropy[:, self.num_leg_actions:].sum(dim=-1, keepdim=True)
         return torch.cat([leg_entropy_sum, arm_entropy_sum], dim=-1)
 
-    def update_distribution(self, observations, hist_encoding):
-        mean = self.actor(observations, hist_encoding)
+    def update_distribution(self, observations, hist_encoding, return_latent=False):
+        if return_latent:
+            mean, latent = self.actor(observations, hist_encoding, return_latent=True)
+        else:
+            mean = self.actor(observations, hist_encoding)
         # compute standard deviation
         if self.noise_std_type == "scalar":
             std = self.std.expand_as(mean)
@@ -328,9 +484,15 @@ class  ActorCritic(nn.Module):
             raise ValueError(f"Unknown standard deviation type: {self.noise_std_type}. Should be 'scalar' or 'log'")
         # create distribution
         self.distribution = Normal(mean, std)
+        if return_latent:
+            return latent
 
 
-    def act(self, observations, hist_encoding, **kwargs):
+    def act(self, observations, hist_encoding, return_latent=False, **kwargs):
+        """Sample actions. With ``return_latent``, also return the latent of the actor (history or privileged)."""
+        if return_latent:
+            latent = self.update_distribution(observations, hist_encoding, return_latent=True)
+            return self.distribution.sample(), latent
         self.update_distribution(observations, hist_encoding)
         return self.distribution.sample()
     
@@ -340,8 +502,8 @@ class  ActorCritic(nn.Module):
         arm_log_prob_sum = log_prob[:, self.num_leg_actions:].sum(dim=-1, keepdim=True)
         return torch.cat([leg_log_prob_sum, arm_log_prob_sum], dim=-1)
 
-    def act_inference(self, observations, hist_encoding=True):
-        actions_mean = self.actor(observations, hist_encoding)
+    def act_inference(self, observations, hist_encoding=True, latent=None):
+        actions_mean = self.actor(observations, hist_encoding, latent=latent)
         return actions_mean 
 
     def evaluate(self, critic_observations, **kwargs):
@@ -361,5 +523,36 @@ class  ActorCritic(nn.Module):
                   `OnPolicyRunner` to determine how to load further parameters (relevant for, e.g., distillation).
         """
 
+        # the checkpoints of the separate and of the grouped heads load into both layouts
+        state_dict = self.convert_heads_state_dict(state_dict, self.grouped_heads)
         super().load_state_dict(state_dict, strict=strict)
         return True
+
+    def convert_heads_state_dict(self, state_dict: dict, grouped_heads: bool) -> dict:
+        """Convert the parameters of the leg and arm heads to the grouped or to the separate layout.
+
+        Args:
+            state_dict: State dictionary of the model, with the heads in either layout.
+            grouped_heads: Whether the heads are converted to the grouped layout (``control_heads``) or to the separate
+                one (``*_leg_control_head`` and ``*_arm_control_head``).
+        """
+        state_dict = dict(state_dict)
+        output_dims = {"actor": [self.num_leg_actions, self.num_arm_actions], "critic": [1, 1]}
+        for module, dims in output_dims.items():
+            grouped_prefix = f"{module}.control_heads."
+            head_prefixes = [f"{module}.{module}_leg_control_head.", f"{module}.{module}_arm_control_head."]
+            if grouped_heads and any(key.startswith(head_prefixes[0]) for key in state_dict):
+                head_state_dicts = [_pop_prefix(state_dict, prefix) for prefix in head_prefixes]
+                for key, value in GroupedMLP.stack_state_dict(head_state_dicts).items():
+                    state_dict[grouped_prefix + key] = value
+            elif not grouped_heads and any(key.startswith(grouped_prefix) for key in state_dict):
+                head_state_dicts = GroupedMLP.unstack_state_dict(_pop_prefix(state_dict, grouped_prefix), dims)
+                for prefix, head_state in zip(head_prefixes, head_state_dicts):
+                    state_dict.update({prefix + key: value for key, value in head_state.items()})
+        return state_dict
+
+
+def _pop_prefix(state_dict: dict, prefix: str) -> dict:
+    """Remove the entries of a submodule from a state dictionary and return them without the prefix."""
+    keys = [key for key in state_dict if key.startswith(prefix)]
+    return {key[len(prefix) :]: state_dict.pop(key) for key in keys}
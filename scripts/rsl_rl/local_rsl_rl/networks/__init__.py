@@ -5,6 +5,7 @@
 
 """Definitions for neural networks."""
 
+from .grouped_mlp import GroupedMLP
 from .memory import Memory
 
-__all__ = ["Memory"]
+__all__ = ["GroupedMLP", "Memory"]
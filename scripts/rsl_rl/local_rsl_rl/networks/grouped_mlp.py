@@ -0,0 +1,172 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+from __future__ import annotations
+
+import torch
+import torch.nn as nn
+
+
+class GroupedMLP(nn.Module):
+    """MLP heads of equal depth on the same input, evaluated together.
+
+    The heads must have the same hidden dimensions and activations; their outputs can differ in size. The first layers
+    of all the heads are a single matrix product (they share their input), and each following layer is a single
+    batched matrix product (:func:`torch.baddbmm`) over the stacked weights of the heads. The output layers are padded
+    to the largest output: the padded rows only produce values that are dropped, so they receive no gradients.
+
+    The outputs of the heads are concatenated, in the order of the heads.
+
+    The parameters are stacked along a leading head dimension (``weights.i`` of shape ``(num_heads, out, in)`` and
+    ``biases.i`` of shape ``(num_heads, out)`` for layer ``i``). :meth:`stack_state_dict` and
+    :meth:`unstack_state_dict` convert between this layout and the one of ``nn.Sequential`` heads of
+    ``nn.Linear`` layers and activations.
+    """
+
+    def __init__(
+        self,
+        input_dim: int,
+        hidden_dims: list[int],
+        output_dims: list[int],
+        activation: nn.Module,
+        activation_out: nn.Module | None = None,
+    ):
+        """Build the stacked layers.
+
+        Args:
+            input_dim: Size of the input shared by the heads.
+            hidden_dims: Hidden dimensions of each head.
+            output_dims: Size of the output of each head.
+            activation: Activation after the hidden layers.
+            activation_out: Activation after the output layers. Defaults to None (linear outputs).
+        """
+        super().__init__()
+        self.input_dim = input_dim
+        self.hidden_dims = list(hidden_dims)
+        self.output_dims = list(output_dims)
+        self.num_heads = len(output_dims)
+        self.activation = activation
+        self.activation_out = activation_out
+
+        dims = [input_dim, *hidden_dims, max(output_dims)]
+        self.weights = nn.ParameterList(
+            [nn.Parameter(torch.zeros(self.num_heads, dims[i + 1], dims[i])) for i in range(len(dims) - 1)]
+        )
+        self.biases = nn.ParameterList(
+            [nn.Parameter(torch.zeros(self.num_heads, dims[i + 1])) for i in range(len(dims) - 1)]
+        )
+
+    @classmethod
+    def from_sequentials(cls, heads: list[nn.Sequential]) -> GroupedMLP:
+        """Group ``nn.Sequential`` heads of ``nn.Linear`` layers, each followed by an activation or not (last one).
+
+        Raises:
+            ValueError: When the heads have different inputs, hidden dimensions or activations.
+        """
+        structures = [_sequential_structure(head) for head in heads]
+        linears, activations = structures[0]
+        for head_linears, head_activations in structures[1:]:
+            if [(layer.in_features, layer.out_features) for layer in head_linears[:-1]] != [
+                (layer.in_features, layer.out_features) for layer in linears[:-1]
+            ] or head_linears[-1].in_features != linears[-1].in_features:
+                raise ValueError("The grouped heads must have the same input and hidden dimensions.")
+            if [type(act) for act in head_activations] != [type(act) for act in activations]:
+                raise ValueError("The grouped heads must have the same activations.")
+        if any(act is None for act in activations[:-1]):
+            raise ValueError("The hidden layers of the grouped heads must be followed by an activation.")
+
+        grouped = cls(
+            linears[0].in_features,
+            [layer.out_features for layer in linears[:-1]],
+            [head_linears[-1].out_features for head_linears, _ in structures],
+            activations[0],
+            activations[-1],
+        ).to(linears[0].weight.device)
+        grouped.load_state_dict(cls.stack_state_dict([head.state_dict() for head in heads]))
+        return grouped
+
+    def forward(self, x: torch.Tensor) -> torch.Tensor:
+        """Evaluate the heads. Shape: (batch_size, input_dim) -> (batch_size, sum(output_dims))"""
+        batch_size = x.shape[0]
+        num_layers = len(self.weights)
+        # the first layers share their input: a single matrix product for all the heads
+        out = nn.functional.linear(x, self.weights[0].flatten(0, 1), self.biases[0].flatten())
+        out = out.view(batch_size, self.num_heads, -1).transpose(0, 1)
+        for i in range(1, num_layers):
+            out = self._activate(out, i - 1)
+            out = torch.baddbmm(self.biases[i].unsqueeze(1), out, self.weights[i].transpose(1, 2))
+        out = self._activate(out, num_layers - 1)
+        # (num_heads, batch_size, max(output_dims)) -> (batch_size, sum(output_dims))
+        if all(dim == self.output_dims[0] for dim in self.output_dims):
+            return out.transpose(0, 1).reshape(batch_size, -1)
+        return torch.cat([out[i, :, :dim] for i, dim in enumerate(self.output_dims)], dim=-1)
+
+    def _activate(self, out: torch.Tensor, layer: int) -> torch.Tensor:
+        activation = self.activation_out if layer == len(self.weights) - 1 else self.activation
+        return out if activation is None else activation(out)
+
+    @staticmethod
+    def stack_state_dict(head_state_dicts: list[dict[str, torch.Tensor]]) -> dict[str, torch.Tensor]:
+        """Convert the state dictionaries of ``nn.Sequential`` heads to the stacked layout."""
+        layer_keys = [sorted({int(key.split(".")[0]) for key in state}) for state in head_state_dicts]
+        num_layers = len(layer_keys[0])
+        output_dim = max(state[f"{keys[-1]}.weight"].shape[0] for state, keys in zip(head_state_dicts, layer_keys))
+        stacked = {}
+        for i in range(num_layers):
+            weights, biases = [], []
+            for state, keys in zip(head_state_dicts, layer_keys):
+                weight, bias = state[f"{keys[i]}.weight"], state[f"{keys[i]}.bias"]
+                if i == num_layers - 1:
+                    # the padded rows of the output layers are zeros
+                    padding = output_dim - weight.shape[0]
+                    weight = nn.functional.pad(weight, (0, 0, 0, padding))
+                    bias = nn.functional.pad(bias, (0, padding))
+                weights.append(weight)
+                biases.append(bias)
+            stacked[f"weights.{i}"] = torch.stack(weights)
+            stacked[f"biases.{i}"] = torch.stack(biases)
+        return stacked
+
+    @staticmethod
+    def unstack_state_dict(
+        state_dict: dict[str, torch.Tensor], output_dims: list[int]
+    ) -> list[dict[str, torch.Tensor]]:
+        """Convert a stacked state dictionary to the ones of ``nn.Sequential`` heads.
+
+        The linear layers of the heads are every other module (each hidden layer is followed by its activation).
+
+        Args:
+            state_dict: The stacked state dictionary.
+            output_dims: Size of the output of each head (the padded rows are removed).
+        """
+        num_layers = len([key for key in state_dict if key.startswith("weights.")])
+        head_state_dicts = [{} for _ in output_dims]
+        for i in range(num_layers):
+            for head, head_state in enumerate(head_state_dicts):
+                weight, bias = state_dict[f"weights.{i}"][head], state_dict[f"biases.{i}"][head]
+                if i == num_layers - 1:
+                    weight, bias = weight[: output_dims[head]], bias[: output_dims[head]]
+                head_state[f"{2 * i}.weight"] = weight.clone()
+                head_state[f"{2 * i}.bias"] = bias.clone()
+        return head_state_dicts
+
+
+"""
+Helper functions.
+"""
+
+
+def _sequential_structure(head: nn.Sequential) -> tuple[list[nn.Linear], list[nn.Module | None]]:
+    """Linear layers of a head and the activation after each of them (None if there is none)."""
+    linears, activations = [], []
+    for module in head:
+        if isinstance(module, nn.Linear):
+            linears.append(module)
+            activations.append(None)
+        elif linears and activations[-1] is None:
+            activations[-1] = module
+        else:
+            raise ValueError(f"The grouped heads must be linear layers and activations, got {module}.")
+    return linears, activations
@@ -9,8 +9,6 @@ import os
 import statistics
 import time
 import torch
-from collections import deque
-import numpy as np
 
 import local_rsl_rl
 from local_rsl_rl.algorithms import PPO, Distillation
@@ -22,7 +20,20 @@ from local_rsl_rl.modules import (
     StudentTeacher,
     StudentTeacherRecurrent,
 )
-from local_rsl_rl.utils import store_code_state
+from local_rsl_rl.runners.update_worker import UpdateWorker
+from local_rsl_rl.utils import (
+    AsyncMetricsWriter,
+    CheckpointWriter,
+    ElasticGroup,
+    EpisodeStatistics,
+    JsonlSummaryWriter,
+    ObservationHistory,
+    ObservationReorder,
+    PhaseTimer,
+    broadcast_state,
+    distributed_backend,
+    store_code_state,
+)
 
 
 
@@ -54,6 +65,23 @@ class OnPolicyRunner:
         self.num_priv = self.env.num_priv
         self.num_history = self.env.num_history
 
+        # single-frame observation protocol: the environment only emits the newest proprioceptive frame and the
+        # runner rebuilds the history of the given length (see ObservationHistory)
+        self.obs_history_length = self.cfg.get("obs_history_length")
+        if self.obs_history_length is not None and num_obs != self.num_prop + self.num_priv:
+            # the environment emits the history (e.g. in play.py, which does not remove it from the environment
+            # configuration like train.py): the policy trained on the rebuilt history reads the same observations
+            if num_obs != self.obs_history_length * self.num_prop + self.num_priv:
+                raise ValueError(
+                    f"The environment emits {num_obs} observations, expected a single frame"
+                    f" ({self.num_prop + self.num_priv}) or a history of {self.obs_history_length} frames"
+                    f" ({self.obs_history_length * self.num_prop + self.num_priv})."
+                )
+            self.obs_history_length = None
+        if self.obs_history_length is not None:
+            self.num_history = self.obs_history_length
+            num_obs = num_obs + (self.num_history - 1) * self.num_prop
+
         # num_prop = self.policy_cfg["num_prop"]
         # resolve type of privileged observations
         if self.training_type == "rl":
@@ -109,6 +137,13 @@ class OnPolicyRunner:
         self.num_steps_per_env = self.cfg["num_steps_per_env"]
         self.save_interval = self.cfg["save_interval"]
         self.empirical_normalization = self.cfg["empirical_normalization"]
+        self.async_logging = self.cfg.get("async_logging", False)
+        self.pipelined_updates = self.cfg.get("pipelined_updates", False)
+        self.checkpoint_writer = CheckpointWriter(
+            asynchronous=self.cfg.get("async_checkpointing", False),
+            keep_last=self.cfg.get("keep_last_checkpoints"),
+            keep_every=self.cfg.get("keep_checkpoint_every"),
+        )
         self.dagger_update_freq = self.alg_cfg["dagger_update_freq"]        
 
 
@@ -123,13 +158,18 @@ class OnPolicyRunner:
         # init storage and model
 
         # init storage and model
+        # note: without a privileged observation group, the privileged observations alias the policy observations
+        #   and the storage only keeps the latter.
         self.alg.init_storage(
             self.training_type,
             self.env.num_envs,
             self.num_steps_per_env,
             [num_obs],
-            [num_privileged_obs],
+            [num_privileged_obs] if self.privileged_obs_type is not None else None,
             [self.env.num_actions],
+            storage_dtype=self.cfg.get("storage_dtype", "float32"),
+            obs_history_shape=(self.num_history, self.num_prop) if self.obs_history_length is not None else None,
+            history_normalization=self.obs_history_length is not None and self.empirical_normalization,
         )
 
         # Decide whether to disable logging
@@ -142,11 +182,26 @@ class OnPolicyRunner:
         self.tot_time = 0
         self.current_learning_iteration = 0
         self.git_status_repos = [local_rsl_rl.__file__]
+        # timers of the phases of the training loop, with an optional Chrome trace of some iterations
+        trace_iterations = self.cfg.get("phase_trace_iterations")
+        self.timer = PhaseTimer(
+            self.device,
+            enabled=self.cfg.get("phase_timing", False) or trace_iterations is not None,
+            trace_path=os.path.join(log_dir, "phase_trace.json") if log_dir is not None and not self.disable_logs else None,
+            trace_window=trace_iterations,
+        )
+        self.alg.timer = self.timer
         
         _, _ = self.env.reset()  #TODO
 
         # prepare obs
-        self.prepare_obs()
+        if self.obs_history_length is not None:
+            self.obs_history = ObservationHistory(self.env.num_envs, self.num_history, self.num_prop, self.device)
+            # raw history frames of the last observations and the statistics they were normalized with
+            self.history_normalization = None
+        else:
+            self.obs_history = None
+            self.prepare_obs()
 
 
     def learn(self, num_learning_iterations: int, init_at_random_ep_len: bool = False):  # noqa: C901
@@ -180,8 +235,14 @@ class OnPolicyRunner:
                 from torch.utils.tensorboard import SummaryWriter
 
                 self.writer = SummaryWriter(log_dir=self.log_dir, flush_secs=10)
+            elif self.logger_type == "jsonl":
+                self.writer = JsonlSummaryWriter(log_dir=self.log_dir, flush_secs=10)
             else:
-                raise ValueError("Logger type not found. Please choose 'neptune', 'wandb' or 'tensorboard'.")
+                raise ValueError("Logger type not found. Please choose 'neptune', 'wandb', 'tensorboard' or 'jsonl'.")
+
+            # move the writer calls out of the training loop
+            if self.async_logging:
+                self.writer = AsyncMetricsWriter(self.writer)
 
         # check if teacher is loaded
         if self.training_type == "distillation" and not self.alg.policy.loaded_teacher:
@@ -196,41 +257,56 @@ class OnPolicyRunner:
 
         # start learning
         obs, extras = self.env.get_observations()
-        obs = self.change_obs_order(obs)
+        obs = self.process_obs(obs)
         privileged_obs = extras["observations"].get(self.privileged_obs_type, obs)
         obs, privileged_obs = obs.to(self.device), privileged_obs.to(self.device)
         self.train_mode()  # switch to train mode (for dropout for example)
 
         # Book keeping
         ep_infos = []
-        rewbuffer = deque(maxlen=100)
-        armrewbuffer = deque(maxlen=100)
-        lenbuffer = deque(maxlen=100)
-        donebuffer = deque(maxlen=100)
-        cur_reward_sum = torch.zeros(self.env.num_envs, dtype=torch.float, device=self.device)
-        cur_arm_reward_sum = torch.zeros(self.env.num_envs, dtype=torch.float, device=self.device)
-        cur_episode_length = torch.zeros(self.env.num_envs, dtype=torch.float, device=self.device)
-
+        # returns and lengths of the last 100 completed episodes, kept on the device and read once per iteration
+        episode_keys = ["reward", "arm_reward", "length"]
         # create buffers for logging extrinsic and intrinsic rewards
         if self.alg.rnd:
-            erewbuffer = deque(maxlen=100)
-            irewbuffer = deque(maxlen=100)
-            cur_ereward_sum = torch.zeros(self.env.num_envs, dtype=torch.float, device=self.device)
-            cur_ireward_sum = torch.zeros(self.env.num_envs, dtype=torch.float, device=self.device)
+            episode_keys += ["extrinsic_reward", "intrinsic_reward"]
+        episode_statistics = EpisodeStatistics(self.env.num_envs, episode_keys, capacity=100, device=self.device)
+
+        start_iter = self.current_learning_iteration
+        tot_iter = start_iter + num_learning_iterations
 
         # Ensure all parameters are in-synced
-        if self.is_distributed:
+        if self.elastic is not None:
+            if self.training_type != "rl" or self.pipelined_updates:
+                raise ValueError("The elastic training is only available for sequential reinforcement learning.")
+            # join the training and receive the state of the coordinator (including the iterations)
+            print("Joining the elastic training...")
+            self.elastic.join()
+            start_iter, tot_iter = self._elastic_sync(start_iter, tot_iter)
+        elif self.is_distributed:
             print(f"Synchronizing parameters for rank {self.gpu_global_rank}...")
             self.alg.broadcast_parameters()
             # TODO: Do we need to synchronize empirical normalizers?
             #   Right now: No, because they all should converge to the same values "asymptotically".
 
+        # Update the policy on a rollout while the next one is collected
+        if self.pipelined_updates:
+            if self.training_type != "rl":
+                raise ValueError("The pipelined rollout and update is only available for reinforcement learning.")
+            update_worker = UpdateWorker(self.alg)
+        else:
+            update_worker = None
+        pending_dagger_update = False
+
         # Start training
-        start_iter = self.current_learning_iteration
-        tot_iter = start_iter + num_learning_iterations
         for it in range(start_iter, tot_iter):
+            # admit the processes waiting to join the elastic training
+            if self.elastic is not None:
+                self._elastic_sync(it, tot_iter)
             start = time.time()
             hist_encoding = it % self.dagger_update_freq == 0
+            # the rollouts collected with the history latent are used for a DAgger update instead of a PPO update,
+            # unless the history encoder is trained in every PPO update
+            dagger_update = hist_encoding and not self.alg.fused_adaptation_update
 
             # Rollout
             with torch.inference_mode():
@@ -242,16 +318,21 @@ class OnPolicyRunner:
                     #     tensor_str = np.array2string(tensor_cpu.numpy(), precision=4, separator=', ', suppress_small=True)
                     #     f.write(tensor_str + '\n')   
 
-                    actions = self.alg.act(obs, privileged_obs, hist_encoding)
+                    with self.timer.phase("act"):
+                        actions = self.alg.act(obs, privileged_obs, hist_encoding)
+                        if self.obs_history is not None and self.empirical_normalization:
+                            self.alg.transition.history_normalization = self.history_normalization
                     #  Step the environment
-                    obs, rewards, arm_rewards, dones, infos = self.env.step(actions)
+                    with self.timer.phase("env_step"):
+                        obs, rewards, arm_rewards, dones, infos = self.env.step(actions)
                     # print("on_policy_runner")\
                     
  
                     rewards = torch.clamp(rewards, min=-5.0)
                     arm_rewards = torch.clamp(arm_rewards, min=-5.0)
 
-                    obs = self.change_obs_order(obs)
+                    with self.timer.phase("obs_reorder"):
+                        obs = self.process_obs(obs, dones)
                     # with open('data/obs_train.txt', 'a') as f:
                     #     tensor_cpu = obs.detach().cpu() 
                     #     tensor_str = np.array2string(tensor_cpu.numpy(), precision=4, separator=', ', suppress_small=True)
@@ -268,62 +349,75 @@ class OnPolicyRunner:
                     # print("obs",obs)
 
                     # process the step
-                    self.alg.process_env_step(rewards, arm_rewards, dones, infos)
+                    with self.timer.phase("process_env_step"):
+                        self.alg.process_env_step(rewards, arm_rewards, dones, infos)
                     
                     # Extract intrinsic rewards (only for logging)
                     intrinsic_rewards = self.alg.intrinsic_rewards if self.alg.rnd else None
 
                     # book keeping
                     if self.log_dir is not None:
+                        self.timer.start("bookkeeping")
                         if "episode" in infos:
                             ep_infos.append(infos["episode"])
                         elif "log" in infos:
                             ep_infos.append(infos["log"])
-                        # Update rewards
+                        # Update rewards and episode length, and record the completed episodes
                         if self.alg.rnd:
-                            cur_ereward_sum += rewards
-                            cur_ireward_sum += intrinsic_rewards  # type: ignore
-                            cur_reward_sum += rewards + intrinsic_rewards
+                            episode_statistics.add(
+                                dones,
+                                reward=rewards + intrinsic_rewards,
+                                length=1.0,
+                                extrinsic_reward=rewards,
+                                intrinsic_reward=intrinsic_rewards,
+                            )
                         else:
-                            cur_reward_sum += rewards
-                            cur_arm_reward_sum += arm_rewards
-
-                        # Update episode length
-                        cur_episode_length += 1
-                        # Clear data for completed episodes
-                        # -- common
-                        new_ids = (dones > 0).nonzero(as_tuple=False)
-                        rewbuffer.extend(cur_reward_sum[new_ids][:, 0].cpu().numpy().tolist())
-                        armrewbuffer.extend(cur_arm_reward_sum[new_ids][:, 0].cpu().numpy().tolist())
-                        lenbuffer.extend(cur_episode_length[new_ids][:, 0].cpu().numpy().tolist())
-                        donebuffer.append(len(new_ids) / self.env.num_envs)
-                        cur_reward_sum[new_ids] = 0
-                        cur_arm_reward_sum[new_ids] = 0
-                        cur_episode_length[new_ids] = 0
-                        # -- intrinsic and extrinsic rewards
-                        if self.alg.rnd:
-                            erewbuffer.extend(cur_ereward_sum[new_ids][:, 0].cpu().numpy().tolist())
-                            irewbuffer.extend(cur_ireward_sum[new_ids][:, 0].cpu().numpy().tolist())
-                            cur_ereward_sum[new_ids] = 0
-                            cur_ireward_sum[new_ids] = 0
+                            episode_statistics.add(dones, reward=rewards, arm_reward=arm_rewards, length=1.0)
+                        self.timer.stop("bookkeeping")
 
 
                 stop = time.time()
                 collection_time = stop - start
                 start = stop
 
-                # compute returns
-                if self.training_type == "rl":
-                    self.alg.compute_returns(privileged_obs)      
+                # compute returns (in pipelined mode, the update worker computes them with the updated policy)
+                if self.training_type == "rl" and update_worker is None:
+                    with self.timer.phase("compute_returns"):
+                        # with the fused update, the rollouts collected with the history latent are off-policy for
+                        # the update (which acts with the privileged latent): they are re-evaluated and corrected
+                        self.alg.compute_returns(
+                            privileged_obs, correct_policy_lag=hist_encoding and self.alg.fused_adaptation_update
+                        )      
 
             # self.alg.storage.clear()
             
             # mean_value_loss, mean_surrogate_loss, mean_arm_torques_loss, value_mixing_ratio, torque_supervision_weight, mean_priv_reg_loss, priv_reg_coef = self.alg.update()
             #TODO:
-            if hist_encoding:
-                mean_hist_latent_loss = self.alg.update_dagger()
+            if update_worker is None:
+                updated_with_dagger = dagger_update
+                try:
+                    update_results = self.alg.update_dagger() if dagger_update else self.alg.update()
+                except RuntimeError as error:
+                    if self.elastic is None:
+                        raise
+                    # a process left the elastic training: the rollout is dropped and the training state is
+                    # broadcast at the start of the next iteration
+                    self._elastic_recover(error)
+                    self.alg.storage.clear()
+                    update_results = None
             else:
-                mean_value_loss, mean_surrogate_loss, mean_arm_torques_loss, value_mixing_ratio, torque_supervision_weight, mean_priv_reg_loss, priv_reg_coef = self.alg.update()
+                # wait for the update on the previous rollout (its losses are logged in this iteration)
+                updated_with_dagger = pending_dagger_update
+                update_results = update_worker.wait()
+                pending_dagger_update = dagger_update
+            if update_results is None:
+                pass
+            elif updated_with_dagger:
+                mean_hist_latent_loss = update_results
+            else:
+                mean_value_loss, mean_surrogate_loss, mean_arm_torques_loss, value_mixing_ratio, torque_supervision_weight, mean_priv_reg_loss, priv_reg_coef, fused_hist_latent_loss = update_results
+                if fused_hist_latent_loss is not None:
+                    mean_hist_latent_loss = fused_hist_latent_loss
             
             # TODO: line 379 "loss_dict"
             loss_dict = {
@@ -335,6 +429,9 @@ class OnPolicyRunner:
             stop = time.time()
             learn_time = stop - start
             self.current_learning_iteration = it
+            # time of the phases of the iteration (in pipelined mode, the update phases are those of the update
+            # that finished during this iteration)
+            phase_times = self.timer.end_iteration(it)
             # log info
             if self.log_dir is not None and not self.disable_logs:
                 # Log information
@@ -342,6 +439,10 @@ class OnPolicyRunner:
                 # Save model
                 if it % self.save_interval == 0:
                     self.save(os.path.join(self.log_dir, f"model_{it}.pt"))
+
+            # start the update on the rollout of this iteration (after saving, so checkpoints are consistent)
+            if update_worker is not None:
+                update_worker.submit(privileged_obs, dagger_update)
     
             # Clear episode infos
             ep_infos.clear()
@@ -354,9 +455,20 @@ class OnPolicyRunner:
                     for path in git_file_paths:
                         self.writer.save_file(path)
 
+        # Finish the update on the last rollout
+        if update_worker is not None:
+            update_worker.close()
+
+        # write the trace of the traced iterations if the training stopped inside the trace window
+        self.timer.write_trace()
+
         # Save the final model after training
         if self.log_dir is not None and not self.disable_logs:
             self.save(os.path.join(self.log_dir, f"model_{self.current_learning_iteration}.pt"))
+            # write the checkpoints and metrics still queued in the background writers
+            self.checkpoint_writer.flush()
+            if self.async_logging:
+                self.writer.flush()
 
     def log(self, locs: dict, width: int = 80, pad: int = 35):
         # Compute the collection size
@@ -367,7 +479,7 @@ class OnPolicyRunner:
         iteration_time = locs["collection_time"] + locs["learn_time"]
 
         # -- Episode info
-        ep_string = ""
+        ep_values = []
         if locs["ep_infos"]:
             for key in locs["ep_infos"][0]:
                 infotensor = torch.tensor([], device=self.device)
@@ -384,12 +496,16 @@ class OnPolicyRunner:
                 # log to logger and terminal
                 if "/" in key:
                     self.writer.add_scalar(key, value, locs["it"])
-                    ep_string += f"""{f'{key}:':>{pad}} {value:.4f}\n"""
+                    ep_values.append((f"{key}:", value))
                 else:
                     self.writer.add_scalar("Episode/" + key, value, locs["it"])
-                    ep_string += f"""{f'Mean episode {key}:':>{pad}} {value:.4f}\n"""
+                    ep_values.append((f"Mean episode {key}:", value))
 
-        mean_std = self.alg.policy.action_std.mean()
+        # noise of the policy that collected the rollout
+        policy = self.alg.policy if self.alg.behavior_policy is None else self.alg.behavior_policy
+        mean_std = policy.action_std.mean()
+        if not self.async_logging:
+            mean_std = mean_std.item()
         fps = int(collection_size / (locs["collection_time"] + locs["learn_time"]))
 
         # -- Losses
@@ -398,77 +514,85 @@ class OnPolicyRunner:
         self.writer.add_scalar("Loss/learning_rate", self.alg.learning_rate, locs["it"])
 
         # -- Policy
-        self.writer.add_scalar("Policy/mean_noise_std", mean_std.item(), locs["it"])
+        self.writer.add_scalar("Policy/mean_noise_std", mean_std, locs["it"])
 
         # -- Performance
         self.writer.add_scalar("Perf/total_fps", fps, locs["it"])
         self.writer.add_scalar("Perf/collection time", locs["collection_time"], locs["it"])
         self.writer.add_scalar("Perf/learning_time", locs["learn_time"], locs["it"])
+        for name, phase_time in locs["phase_times"].items():
+            self.writer.add_scalar(f"Perf/phase/{name}_ms", phase_time, locs["it"])
 
         # -- Training
-        if len(locs["rewbuffer"]) > 0:
+        # single device to host copy of the completed episodes of the iteration
+        episodes = locs["episode_statistics"].completed()
+        rewbuffer, lenbuffer = episodes["reward"], episodes["length"]
+        if len(rewbuffer) > 0:
             # separate logging for intrinsic and extrinsic rewards
             if self.alg.rnd:
-                self.writer.add_scalar("Rnd/mean_extrinsic_reward", statistics.mean(locs["erewbuffer"]), locs["it"])
-                self.writer.add_scalar("Rnd/mean_intrinsic_reward", statistics.mean(locs["irewbuffer"]), locs["it"])
+                erewbuffer, irewbuffer = episodes["extrinsic_reward"], episodes["intrinsic_reward"]
+                self.writer.add_scalar("Rnd/mean_extrinsic_reward", statistics.mean(erewbuffer), locs["it"])
+                self.writer.add_scalar("Rnd/mean_intrinsic_reward", statistics.mean(irewbuffer), locs["it"])
                 self.writer.add_scalar("Rnd/weight", self.alg.rnd.weight, locs["it"])
             # everything else
-            self.writer.add_scalar("Train/mean_reward", statistics.mean(locs["rewbuffer"]), locs["it"])
-            self.writer.add_scalar("Train/mean_episode_length", statistics.mean(locs["lenbuffer"]), locs["it"])
+            self.writer.add_scalar("Train/mean_reward", statistics.mean(rewbuffer), locs["it"])
+            self.writer.add_scalar("Train/mean_episode_length", statistics.mean(lenbuffer), locs["it"])
             if self.logger_type != "wandb":  # wandb does not support non-integer x-axis logging
-                self.writer.add_scalar("Train/mean_reward/time", statistics.mean(locs["rewbuffer"]), self.tot_time)
-                self.writer.add_scalar(
-                    "Train/mean_episode_length/time", statistics.mean(locs["lenbuffer"]), self.tot_time
-                )
+                self.writer.add_scalar("Train/mean_reward/time", statistics.mean(rewbuffer), self.tot_time)
+                self.writer.add_scalar("Train/mean_episode_length/time", statistics.mean(lenbuffer), self.tot_time)
 
-        str = f" \033[1m Learning iteration {locs['it']}/{locs['tot_iter']} \033[0m "
+        it, tot_iter, loss_dict, phase_times = locs["it"], locs["tot_iter"], locs["loss_dict"], locs["phase_times"]
+        collection_time, learn_time = locs["collection_time"], locs["learn_time"]
+        tot_timesteps, tot_time = self.tot_timesteps, self.tot_time
+        eta = tot_time / (it - locs["start_iter"] + 1) * (locs["start_iter"] + locs["num_learning_iterations"] - it)
+
+        def format_log_string() -> str:
+            # formatting the tensors (noise std and episode infos) synchronizes with the device
+            str = f" \033[1m Learning iteration {it}/{tot_iter} \033[0m "
 
-        if len(locs["rewbuffer"]) > 0:
             log_string = (
                 f"""{'#' * width}\n"""
                 f"""{str.center(width, ' ')}\n\n"""
-                f"""{'Computation:':>{pad}} {fps:.0f} steps/s (collection: {locs[
-                    'collection_time']:.3f}s, learning {locs['learn_time']:.3f}s)\n"""
-                f"""{'Mean action noise std:':>{pad}} {mean_std.item():.2f}\n"""
+                f"""{'Computation:':>{pad}} {fps:.0f} steps/s (collection: {collection_time:.3f}s, """
+                f"""learning {learn_time:.3f}s)\n"""
+                f"""{'Mean action noise std:':>{pad}} {mean_std:.2f}\n"""
             )
-            # -- Losses
-            for key, value in locs["loss_dict"].items():
-                log_string += f"""{f'Mean {key} loss:':>{pad}} {value:.4f}\n"""
-            # -- Rewards
-            if self.alg.rnd:
-                log_string += (
-                    f"""{'Mean extrinsic reward:':>{pad}} {statistics.mean(locs['erewbuffer']):.2f}\n"""
-                    f"""{'Mean intrinsic reward:':>{pad}} {statistics.mean(locs['irewbuffer']):.2f}\n"""
-                )
-            log_string += f"""{'Mean reward:':>{pad}} {statistics.mean(locs['rewbuffer']):.2f}\n"""
-            # -- episode info
-            log_string += f"""{'Mean episode length:':>{pad}} {statistics.mean(locs['lenbuffer']):.2f}\n"""
-        else:
-            log_string = (
-                f"""{'#' * width}\n"""
-                f"""{str.center(width, ' ')}\n\n"""
-                f"""{'Computation:':>{pad}} {fps:.0f} steps/s (collection: {locs[
-                    'collection_time']:.3f}s, learning {locs['learn_time']:.3f}s)\n"""
-                f"""{'Mean action noise std:':>{pad}} {mean_std.item():.2f}\n"""
+            if len(rewbuffer) > 0:
+                # -- Losses
+                for key, value in loss_dict.items():
+                    log_string += f"""{f'Mean {key} loss:':>{pad}} {value:.4f}\n"""
+                # -- Rewards
+                if self.alg.rnd:
+                    log_string += (
+                        f"""{'Mean extrinsic reward:':>{pad}} {statistics.mean(erewbuffer):.2f}\n"""
+                        f"""{'Mean intrinsic reward:':>{pad}} {statistics.mean(irewbuffer):.2f}\n"""
+                    )
+                log_string += f"""{'Mean reward:':>{pad}} {statistics.mean(rewbuffer):.2f}\n"""
+                # -- episode info
+                log_string += f"""{'Mean episode length:':>{pad}} {statistics.mean(lenbuffer):.2f}\n"""
+            else:
+                for key, value in loss_dict.items():
+                    log_string += f"""{f'{key}:':>{pad}} {value:.4f}\n"""
+
+            for label, value in ep_values:
+                log_string += f"""{label:>{pad}} {value:.4f}\n"""
+            for name, phase_time in phase_times.items():
+                log_string += f"""{f'Phase {name}:':>{pad}} {phase_time:.1f}ms\n"""
+            log_string += (
+                f"""{'-' * width}\n"""
+                f"""{'Total timesteps:':>{pad}} {tot_timesteps}\n"""
+                f"""{'Iteration time:':>{pad}} {iteration_time:.2f}s\n"""
+                f"""{'Time elapsed:':>{pad}} {time.strftime("%H:%M:%S", time.gmtime(tot_time))}\n"""
+                f"""{'ETA:':>{pad}} {time.strftime("%H:%M:%S", time.gmtime(eta))}\n"""
             )
-            for key, value in locs["loss_dict"].items():
-                log_string += f"""{f'{key}:':>{pad}} {value:.4f}\n"""
-
-        log_string += ep_string
-        log_string += (
-            f"""{'-' * width}\n"""
-            f"""{'Total timesteps:':>{pad}} {self.tot_timesteps}\n"""
-            f"""{'Iteration time:':>{pad}} {iteration_time:.2f}s\n"""
-            f"""{'Time elapsed:':>{pad}} {time.strftime("%H:%M:%S", time.gmtime(self.tot_time))}\n"""
-            f"""{'ETA:':>{pad}} {time.strftime(
-                "%H:%M:%S",
-                time.gmtime(
-                    self.tot_time / (locs['it'] - locs['start_iter'] + 1)
-                    * (locs['start_iter'] + locs['num_learning_iterations'] - locs['it'])
-                )
-            )}\n"""
-        )
-        print(log_string)
+            return log_string
+
+        if self.async_logging:
+            # the scalars and the console output of the iteration are written by the metrics writer thread
+            self.writer.print(format_log_string)
+            self.writer.commit()
+        else:
+            print(format_log_string())
 
     def save(self, path: str, infos=None):
         # -- Save model
@@ -487,14 +611,17 @@ class OnPolicyRunner:
             saved_dict["obs_norm_state_dict"] = self.obs_normalizer.state_dict()
             saved_dict["privileged_obs_norm_state_dict"] = self.privileged_obs_normalizer.state_dict()
 
-        # save model
-        torch.save(saved_dict, path)
-
         # upload model to external logging service
+        upload = None
         if self.logger_type in ["neptune", "wandb"] and not self.disable_logs:
-            self.writer.save_model(path, self.current_learning_iteration)
+            upload = self.writer.save_model
+
+        # save model (in the background with async checkpointing, after a copy of the state to the cpu)
+        self.checkpoint_writer.save(saved_dict, path, self.current_learning_iteration, upload=upload)
 
     def load(self, path: str, load_optimizer: bool = True):
+        # the checkpoint may still be written by the checkpoint writer
+        self.checkpoint_writer.flush()
         loaded_dict = torch.load(path, weights_only=False)
         # -- Load model
         resumed_training = self.alg.policy.load_state_dict(loaded_dict["model_state_dict"])
@@ -514,6 +641,11 @@ class OnPolicyRunner:
                 # is not loaded, as the observation space could differ from the previous rl training.
                 self.privileged_obs_normalizer.load_state_dict(loaded_dict["obs_norm_state_dict"])
         # -- load optimizer if used
+        checkpoint_grouped_heads = any(".control_heads." in key for key in loaded_dict["model_state_dict"])
+        if load_optimizer and checkpoint_grouped_heads != getattr(self.alg.policy, "grouped_heads", False):
+            # the parameters of the heads were converted, the optimizer state does not match them
+            print("[INFO] The layout of the control heads differs from the checkpoint, the optimizer is not loaded.")
+            load_optimizer = False
         if load_optimizer and resumed_training:
             # -- algorithm optimizer
             self.alg.optimizer.load_state_dict(loaded_dict["optimizer_state_dict"])
@@ -569,10 +701,9 @@ class OnPolicyRunner:
         """
         Modify the order of observations containing historical information for easier network reading. Try to avoid modifications if possible!
 
-        Args:
-            total(num_hist, num_prop): Indices of the modified observation order
-            obs_new(num_envs, num_prop * num_hist): Modified observation order indices corresponding to the observations
-        
+        The permutation is built once as an ObservationReorder (fused with the empirical normalizer) and applied by
+        :meth:`change_obs_order` at every step.
+
         Notes:
             Try to avoid modifications if possible!
 
@@ -586,41 +717,55 @@ class OnPolicyRunner:
             We need to modify the observation order to:
                 obs_new = ang_vel_timestep_1, joint_pos_timestep_1, joint_vel_timestep_1 -> ang_vel_timestep_10, joint_pos_timestep_10, joint_vel_timestep_10
         """
-        self.total = np.zeros((self.num_history, self.num_prop)) 
-        self.obs_new = torch.zeros(self.env.num_envs, self.num_prop * self.num_history).to(self.env.device)
-
-        lst, length = self.env.get_obs_list_length()
-        lst = [item for item in lst if not item.startswith("policy-priv_")]
-
-        result_dict = {}
-        for i in range(len(lst)):
-            c = np.array(list(range( sum(length[: i + 1 ]) - int(length[i] / self.num_history), sum(length[: i + 1]) )))
-            result_dict[lst[i]] = c
-
-        key_list = list(result_dict.keys())
-        a1_list = []
-        for i in range(self.num_history):
-            for j in range(len(lst)):
-                a1 = np.concatenate([
-                    result_dict[key_list[j]] - (i) * result_dict[key_list[j]].shape[0]])
-                a1_list.append(a1)
-                if j == len(lst) - 1:
-                    a1_list = np.concatenate(a1_list)
-                    self.total[i, :] = a1_list
-                    a1_list = []
+        self.obs_reorder = ObservationReorder.from_env(
+            self.env,
+            normalizer=self.obs_normalizer if self.empirical_normalization else None,
+            device=self.device,
+        )
 
     #TODO:
+    def process_obs(self, obs, dones=None):
+        """Bring the policy observations to the layout of :meth:`change_obs_order` and normalize them.
+
+        Args:
+            obs(num_envs, num_obs): The observations returned by the environment
+            dones(num_envs): The environments reset at this step (None when the observations do not follow a step)
+
+        Returns:
+            obs(num_envs, num_prop * num_hist + num_priv): The input to the actor and critic network
+
+        Notes:
+            With the rebuilt history, every slot of the history is normalized with the statistics of the current
+            step. The raw frames and these statistics are kept in :attr:`history_normalization` for the rollout
+            storage, which rebuilds the windows from the raw frames.
+        """
+        if self.obs_history is None:
+            return self.change_obs_order(obs)
+        obs = obs.to(self.device)
+        if dones is None:
+            obs = self.obs_history.reset(obs)
+        else:
+            obs = self.obs_history.append(obs, dones.to(self.device))
+        normalized_obs = self.obs_normalizer(obs)
+        if self.empirical_normalization:
+            num_frames = self.num_history * self.num_prop
+            self.history_normalization = (
+                obs[:, :num_frames],
+                self.obs_normalizer._mean[:, :num_frames].clone(),
+                self.obs_normalizer._std[:, :num_frames] + self.obs_normalizer.eps,
+            )
+        return normalized_obs
+
     def change_obs_order(self, obs):
         """
         Modify the order of observations containing historical information for easier network reading. Try to avoid modifications if possible!
 
         Args:
-            obs(num_envs, num_prop * num_hist): The input to the actor and critic network
-            obs_new(num_envs, num_prop * num_hist): Modified observation order indices corresponding to the observations
-            total(num_hist, num_prop): Indices of the modified observation order
+            obs(num_envs, num_obs): The observations returned by the environment
 
         Returns:
-            obs(num_envs, num_prop * num_hist): The input to the actor and critic network
+            obs(num_envs, num_prop * num_hist + num_priv): The normalized input to the actor and critic network.
+                The tensor is reused by the call after next (see ObservationReorder).
 
         Notes:
             Try to avoid modifications if possible!
@@ -636,14 +781,7 @@ class OnPolicyRunner:
                 obs_new = ang_vel_timestep_1, joint_pos_timestep_1, joint_vel_timestep_1 -> ang_vel_timestep_10, joint_pos_timestep_10, joint_vel_timestep_10
         """ 
 
-        for i in range(self.num_history):
-            obs_1 = obs[:, self.total[i, :]]
-            self.obs_new = torch.cat([self.obs_new, obs_1], dim=-1)
-        obs = torch.cat([self.obs_new[:, self.num_prop * self.num_history:], 
-                            obs[:, self.num_prop * self.num_history:]], dim=-1)                    
-        obs = self.obs_normalizer(obs)
-        self.obs_new = torch.zeros(self.env.num_envs, self.num_prop * self.num_history).to(self.env.device)
-        return obs
+        return self.obs_reorder(obs)
     
 
     """
@@ -652,6 +790,11 @@ class OnPolicyRunner:
 
     def _configure_multi_gpu(self):
         """Configure multi-gpu training."""
+        self.elastic = None
+        if self.cfg.get("elastic_training", False):
+            self._configure_elastic()
+            return
+
         # check if distributed training is enabled
         self.gpu_world_size = int(os.getenv("WORLD_SIZE", "1"))
         self.is_distributed = self.gpu_world_size > 1
@@ -674,8 +817,9 @@ class OnPolicyRunner:
             "world_size": self.gpu_world_size,  # total number of processes
         }
 
-        # check if user has device specified for local rank
-        if self.device != f"cuda:{self.gpu_local_rank}":
+        # check if user has device specified for local rank (the processes on the CPU share the device)
+        device_type = torch.device(self.device).type
+        if device_type == "cuda" and self.device != f"cuda:{self.gpu_local_rank}":
             raise ValueError(
                 f"Device '{self.device}' does not match expected device for local rank '{self.gpu_local_rank}'."
             )
@@ -689,7 +833,111 @@ class OnPolicyRunner:
                 f"Global rank '{self.gpu_global_rank}' is greater than or equal to world size '{self.gpu_world_size}'."
             )
 
-        # initialize torch distributed
-        torch.distributed.init_process_group(backend="nccl", rank=self.gpu_global_rank, world_size=self.gpu_world_size)
+        # initialize torch distributed (nccl between GPUs, gloo between CPU processes, unless configured)
+        backend = self.cfg.get("distributed_backend") or distributed_backend(self.device)
+        torch.distributed.init_process_group(backend=backend, rank=self.gpu_global_rank, world_size=self.gpu_world_size)
         # set device to the local rank
-        torch.cuda.set_device(self.gpu_local_rank)
+        if device_type == "cuda":
+            torch.cuda.set_device(self.gpu_local_rank)
+
+    def _configure_elastic(self):
+        """Configure the elastic data-parallel training (processes can join and leave between iterations).
+
+        The processes meet at ``MASTER_ADDR:MASTER_PORT``. The process with ``RANK`` 0 is the coordinator: it hosts the
+        key-value store of the training, is the rank 0 of every process group and logs. The ranks and the world size
+        are assigned when a process joins the training (see :class:`ElasticGroup`).
+        """
+        self.is_distributed = True
+        self.gpu_local_rank = int(os.getenv("LOCAL_RANK", "0"))
+        is_coordinator = int(os.getenv("RANK", "0")) == 0
+        device_type = torch.device(self.device).type
+        if device_type == "cuda":
+            torch.cuda.set_device(self.device)
+
+        self.elastic = ElasticGroup(
+            host=os.getenv("MASTER_ADDR", "localhost"),
+            port=int(os.getenv("MASTER_PORT", "29500")),
+            is_coordinator=is_coordinator,
+            backend=self.cfg.get("distributed_backend") or distributed_backend(self.device),
+            device=self.device,
+            timeout=self.cfg.get("elastic_timeout", 30.0),
+        )
+        # rank and world size until the process joins the training (only the coordinator has the rank 0)
+        self.gpu_global_rank = self.elastic.rank
+        self.gpu_world_size = self.elastic.world_size
+        self.multi_gpu_cfg = {
+            "global_rank": self.gpu_global_rank,
+            "local_rank": self.gpu_local_rank,
+            "world_size": self.gpu_world_size,
+        }
+
+    def _elastic_sync(self, it: int, tot_iter: int) -> tuple[int, int]:
+        """Admit the waiting processes and broadcast the training state if the process group was re-formed.
+
+        Returns:
+            The current and the last (excluded) iteration of the training, which are those of the coordinator.
+        """
+        while True:
+            try:
+                if not self.elastic.sync():
+                    return it, tot_iter
+                # rank and world size of the new process group
+                self.gpu_global_rank, self.gpu_world_size = self.elastic.rank, self.elastic.world_size
+                self.multi_gpu_cfg.update(global_rank=self.gpu_global_rank, world_size=self.gpu_world_size)
+                self.alg.set_process_group(self.gpu_global_rank, self.gpu_world_size)
+                # state of the coordinator, without going through the disk
+                is_coordinator = self.gpu_global_rank == 0
+                state = self._training_state(it, tot_iter) if is_coordinator else None
+                state = broadcast_state(state, src=0, device=self.device)
+                if not is_coordinator:
+                    self._load_training_state(state)
+                return state["iter"], state["tot_iter"]
+            except RuntimeError as error:
+                # a process left while the group was re-formed
+                self._elastic_recover(error)
+
+    def _elastic_recover(self, error: RuntimeError):
+        """Re-form the process group with the remaining processes after a failed collective."""
+        num_lost = self.elastic.recover()
+        if num_lost == 0:
+            # the collective did not fail because of a process that left
+            raise error
+        if not self.disable_logs:
+            print(f"[INFO] {num_lost} process(es) left the training, continuing with {self.elastic.world_size}.")
+
+    def _training_state(self, it: int, tot_iter: int) -> dict:
+        """Return the state that a process needs to join the training at the iteration."""
+        state = {
+            "model_state_dict": self.alg.policy.state_dict(),
+            "optimizer_state_dict": self.alg.optimizer.state_dict(),
+            "hist_encoder_optimizer_state_dict": self.alg.hist_encoder_optimizer.state_dict(),
+            "learning_rate": self.alg.learning_rate,
+            "counter": self.alg.counter,
+            "iter": it,
+            "tot_iter": tot_iter,
+        }
+        if self.alg.rnd:
+            state["rnd_state_dict"] = self.alg.rnd.state_dict()
+            state["rnd_optimizer_state_dict"] = self.alg.rnd_optimizer.state_dict()
+        if self.empirical_normalization:
+            state["obs_norm_state_dict"] = self.obs_normalizer.state_dict()
+            state["privileged_obs_norm_state_dict"] = self.privileged_obs_normalizer.state_dict()
+        return state
+
+    def _load_training_state(self, state: dict):
+        """Load the state of :meth:`_training_state`."""
+        self.alg.policy.load_state_dict(state["model_state_dict"])
+        self.alg.optimizer.load_state_dict(state["optimizer_state_dict"])
+        self.alg.hist_encoder_optimizer.load_state_dict(state["hist_encoder_optimizer_state_dict"])
+        self.alg.learning_rate = state["learning_rate"]
+        self.alg.counter = state["counter"]
+        if self.alg.rnd:
+            self.alg.rnd.load_state_dict(state["rnd_state_dict"])
+            self.alg.rnd_optimizer.load_state_dict(state["rnd_optimizer_state_dict"])
+        if self.empirical_normalization:
+            # the statistics of a process that already collected rollouts are inference tensors (updated in the
+            # inference mode of the rollout), which can only be updated in place in inference mode
+            with torch.inference_mode():
+                self.obs_normalizer.load_state_dict(state["obs_norm_state_dict"])
+                self.privileged_obs_normalizer.load_state_dict(state["privileged_obs_norm_state_dict"])
+        self.current_learning_iteration = state["iter"]
@@ -0,0 +1,87 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Background update of the policy for the pipelined rollout and update of the on-policy runner."""
+
+from __future__ import annotations
+
+import copy
+import torch
+from concurrent.futures import Future, ThreadPoolExecutor
+
+from local_rsl_rl.algorithms import PPO
+
+
+class UpdateWorker:
+    """Run the updates of PPO in a background thread while the next rollout is collected.
+
+    The rollout storage is double-buffered: while the worker updates the policy on the rollout ``k``, the environment
+    fills the other storage with the rollout ``k + 1``. The rollout ``k + 1`` is collected by a copy of the policy
+    (the behavior policy of the algorithm) that holds the parameters from before the update on the rollout ``k``, so
+    the learner is one update ahead of the collected data. The worker re-evaluates each rollout with the current
+    parameters and corrects the returns with V-trace (see :meth:`PPO.evaluate_rollout`).
+
+    On CUDA devices, the updates run on a separate stream so that they overlap with the collection.
+    """
+
+    def __init__(self, alg: PPO):
+        if alg.policy.is_recurrent:
+            raise ValueError("The pipelined rollout and update does not support recurrent policies.")
+        if alg.rnd:
+            raise ValueError("The pipelined rollout and update does not support random network distillation.")
+        self.alg = alg
+        # the second storage (the algorithm storage is always the one being collected)
+        self.storages = [alg.storage, copy.deepcopy(alg.storage)]
+        self.alg.behavior_policy = copy.deepcopy(alg.policy)
+        self.alg.behavior_policy.load_state_dict(alg.policy.state_dict())
+
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="update-worker")
+        self.stream = torch.cuda.Stream(device=alg.device) if torch.device(alg.device).type == "cuda" else None
+        self.future: Future | None = None
+
+    def submit(self, last_critic_obs: torch.Tensor, dagger_update: bool):
+        """Start the update on the collected rollout and switch the collection to the other storage.
+
+        The behavior policy takes the current parameters, i.e. the parameters before this update.
+        """
+        if self.future is not None:
+            raise RuntimeError("The previous update is still running.")
+        storage = self.alg.storage
+        self.alg.storage = self.storages[1] if storage is self.storages[0] else self.storages[0]
+        self.alg.behavior_policy.load_state_dict(self.alg.policy.state_dict())
+        # the observations of the last step are overwritten during the next rollout
+        last_critic_obs = last_critic_obs.clone()
+        if self.stream is not None:
+            self.stream.wait_stream(torch.cuda.current_stream(self.alg.device))
+        self.future = self.executor.submit(self._update, storage, last_critic_obs, dagger_update)
+
+    def wait(self):
+        """Wait for the running update and return its results (None if no update is running)."""
+        if self.future is None:
+            return None
+        results = self.future.result()
+        self.future = None
+        if self.stream is not None:
+            torch.cuda.current_stream(self.alg.device).wait_stream(self.stream)
+        return results
+
+    def close(self):
+        """Wait for the running update and stop the worker thread."""
+        self.wait()
+        self.executor.shutdown()
+        self.alg.behavior_policy = None
+
+    def _update(self, storage, last_critic_obs, dagger_update):
+        if self.stream is not None:
+            with torch.cuda.stream(self.stream):
+                return self._run_update(storage, last_critic_obs, dagger_update)
+        return self._run_update(storage, last_critic_obs, dagger_update)
+
+    def _run_update(self, storage, last_critic_obs, dagger_update):
+        if dagger_update:
+            return self.alg.update_dagger(storage)
+        with torch.no_grad(), self.alg.timer.phase("compute_returns"):
+            self.alg.compute_returns(last_critic_obs, storage, correct_policy_lag=True)
+        return self.alg.update(storage)
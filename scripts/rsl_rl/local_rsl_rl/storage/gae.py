@@ -0,0 +1,109 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Generalized advantage estimation over preallocated rollout buffers."""
+
+from __future__ import annotations
+
+import torch
+
+
+@torch.jit.script
+def _reverse_discounted_scan_(deltas: torch.Tensor, discounts: torch.Tensor) -> None:
+    """In-place reverse scan ``x[t] = x[t] + discounts[t] * x[t + 1]`` along the time axis."""
+    for step in range(deltas.shape[0] - 2, -1, -1):
+        deltas[step].addcmul_(discounts[step], deltas[step + 1])
+
+
+def compute_gae_(
+    rewards: torch.Tensor,
+    values: torch.Tensor,
+    last_values: torch.Tensor,
+    not_dones: torch.Tensor,
+    gamma: float,
+    lam: float,
+    returns: torch.Tensor,
+    advantages: torch.Tensor,
+    discounts: torch.Tensor,
+) -> None:
+    """Compute GAE advantages and returns in-place.
+
+    All the time-wise work except the recursion itself is done with whole-buffer operations. The recursion
+    ``A_t = delta_t + gamma * lambda * (1 - done_t) * A_{t+1}`` is evaluated by a scripted reverse scan that
+    writes directly into ``advantages``.
+
+    Args:
+        rewards: Rewards. Shape: (T, num_envs, num_heads)
+        values: Value estimates. Shape: (T, num_envs, num_heads)
+        last_values: Bootstrap values of the step following the rollout. Shape: (num_envs, num_heads)
+        not_dones: 1 if the step is not terminal, 0 otherwise. Shape: (T, num_envs, 1)
+        gamma: Discount factor.
+        lam: GAE lambda.
+        returns: Output buffer for the returns. Shape: (T, num_envs, num_heads)
+        advantages: Output buffer for the advantages. Shape: (T, num_envs, num_heads)
+        discounts: Scratch buffer for the masked discounts. Shape: (T, num_envs, 1)
+    """
+    # TD error: r_t + gamma * V(s_{t+1}) - V(s_t), with the bootstrap masked by the terminal flags
+    torch.mul(not_dones, gamma, out=discounts)
+    torch.addcmul(rewards[:-1], discounts[:-1], values[1:], out=advantages[:-1])
+    torch.addcmul(rewards[-1], discounts[-1], last_values, out=advantages[-1])
+    advantages.sub_(values)
+    # Advantage: A(s_t, a_t) = delta_t + gamma * lambda * A(s_{t+1}, a_{t+1})
+    discounts.mul_(lam)
+    _reverse_discounted_scan_(advantages, discounts)
+    # Return: R_t = A(s_t, a_t) + V(s_t)
+    torch.add(advantages, values, out=returns)
+
+
+def compute_vtrace_(
+    rewards: torch.Tensor,
+    values: torch.Tensor,
+    last_values: torch.Tensor,
+    not_dones: torch.Tensor,
+    log_rhos: torch.Tensor,
+    gamma: float,
+    lam: float,
+    rho_clip: float,
+    c_clip: float,
+    returns: torch.Tensor,
+    advantages: torch.Tensor,
+) -> None:
+    """Compute V-trace advantages and returns in-place for a rollout collected with a lagging behavior policy.
+
+    With the truncated importance weights ``rho_t = min(rho_clip, pi(a_t|s_t) / mu(a_t|s_t))`` and
+    ``c_t = lambda * min(c_clip, pi(a_t|s_t) / mu(a_t|s_t))``, the advantages follow the recursion
+    ``A_t = rho_t * delta_t + gamma * c_t * (1 - done_t) * A_{t+1}`` and the returns are the V-trace targets
+    ``R_t = A_t + V(s_t)``. Without policy lag (all the ratios equal to one), this is the GAE of :func:`compute_gae_`.
+
+    Args:
+        rewards: Rewards. Shape: (T, num_envs, num_heads)
+        values: Value estimates of the current critic. Shape: (T, num_envs, num_heads)
+        last_values: Bootstrap values of the step following the rollout. Shape: (num_envs, num_heads)
+        not_dones: 1 if the step is not terminal, 0 otherwise. Shape: (T, num_envs, 1)
+        log_rhos: Log-ratio of the current and behavior policies. Shape: (T, num_envs, num_heads)
+        gamma: Discount factor.
+        lam: GAE lambda.
+        rho_clip: Truncation of the importance weights of the TD errors.
+        c_clip: Truncation of the importance weights of the traces.
+        returns: Output buffer for the returns. Shape: (T, num_envs, num_heads)
+        advantages: Output buffer for the advantages. Shape: (T, num_envs, num_heads)
+    """
+    ratios = torch.exp(log_rhos)
+    # TD error weighted by the truncated importance weights
+    discounts = not_dones * gamma
+    torch.addcmul(rewards[:-1], discounts[:-1], values[1:], out=advantages[:-1])
+    torch.addcmul(rewards[-1], discounts[-1], last_values, out=advantages[-1])
+    advantages.sub_(values).mul_(ratios.clamp(max=rho_clip))
+    # traces cut by the truncated importance weights (per head)
+    discounts = discounts * lam * ratios.clamp(max=c_clip)
+    _reverse_discounted_scan_(advantages, discounts)
+    torch.add(advantages, values, out=returns)
+
+
+def normalize_advantages_(advantages: torch.Tensor, eps: float = 1e-8) -> None:
+    """Normalize the advantages in-place to zero mean and unit standard deviation."""
+    mean = advantages.mean()
+    std = advantages.std()
+    advantages.sub_(mean).div_(std + eps)
@@ -5,30 +5,105 @@
 
 from __future__ import annotations
 
+import math
 import torch
+from dataclasses import dataclass
+
+from .gae import compute_gae_, compute_vtrace_, normalize_advantages_
+
+
+@dataclass
+class TransitionField:
+    """Description of a per-step buffer of the rollout storage."""
+
+    name: str
+    """Name of the buffer. The buffer is accessible as an attribute of the storage with this name."""
+
+    shape: tuple[int, ...]
+    """Shape of a single transition, excluding the time and environment dimensions."""
+
+    dtype: torch.dtype = torch.float
+    """Data type of the buffer."""
+
+    enabled: bool = True
+    """Whether the buffer is allocated. Disabled buffers are set to None."""
+
+    source: str | None = None
+    """Attribute of :class:`RolloutStorage.Transition` that is copied into the buffer at every step.
+
+    If None, the buffer is not filled from the transitions (e.g. returns and advantages).
+    """
+
+    per_rollout: bool = False
+    """Whether the value is constant over the rollout (e.g. a state-independent action std).
+
+    Such buffers hold a single row that is written at the first step of the rollout. The storage exposes it
+    broadcast to the time and environment dimensions, so it is only materialized in the mini-batches.
+    """
+
+
+@dataclass
+class TrajectoryIndex:
+    """Segmentation of a rollout into trajectories, shared by the epochs of the recurrent mini-batch generator."""
+
+    num_mini_batches: int
+    """Number of mini-batches of environments the offsets were computed for."""
+
+    mini_batch_offsets: list[int]
+    """Index of the first trajectory of every mini-batch, followed by the total number of trajectories."""
+
+    masks: torch.Tensor
+    """Valid steps of the padded trajectories. Shape: (time, num_trajectories)"""
+
+    observations: torch.Tensor
+    """Padded observation trajectories. Shape: (time, num_trajectories, obs_dim)"""
+
+    privileged_observations: torch.Tensor
+    """Padded privileged observation trajectories. Shape: (time, num_trajectories, privileged_obs_dim)"""
+
+    rnd_state: torch.Tensor | None
+    """Padded RND state trajectories. Shape: (time, num_trajectories, rnd_state_dim)"""
+
+    hidden_states_a: list[torch.Tensor]
+    """Actor hidden states at the start of the trajectories. Shape: (num_layers, num_trajectories, hidden_dim)"""
+
+    hidden_states_c: list[torch.Tensor]
+    """Critic hidden states at the start of the trajectories. Shape: (num_layers, num_trajectories, hidden_dim)"""
 
-from local_rsl_rl.utils import split_and_pad_trajectories
 
 class RolloutStorage:
     class Transition:
+        __slots__ = (
+            "observations",
+            "privileged_observations",
+            "actions",
+            "privileged_actions",
+            "rewards",
+            "dones",
+            "values",
+            "actions_log_prob",
+            "action_mean",
+            "action_sigma",
+            "hidden_states",
+            "target_arm_torques",
+            "current_arm_dof_pos",
+            "current_arm_dof_vel",
+            "rnd_state",
+            "history_normalization",
+        )
+
         def __init__(self):
-            self.observations = None
-            self.privileged_observations = None
-            self.actions = None
-            self.privileged_actions = None
-            self.rewards = None
-            self.dones = None
-            self.values = None
-            self.actions_log_prob = None
-            self.action_mean = None
-            self.action_sigma = None
-            self.hidden_states = None
-            self.target_arm_torques = None
-            self.current_arm_dof_pos = None
-            self.current_arm_dof_vel = None
-        
+            self.clear()
+
         def clear(self):
-            self.__init__()
+            for name in self.__slots__:
+                setattr(self, name, None)
+
+    ARENA_ALIGNMENT = 64
+    """Alignment (in bytes) of the buffers inside the arena."""
+
+    STORAGE_DTYPES = {"float32": torch.float32, "float16": torch.float16, "bfloat16": torch.bfloat16}
+    """Supported precisions of the observation and action buffers."""
 
     def __init__(
         self, 
@@ -40,6 +115,11 @@ class RolloutStorage:
         actions_shape, 
         rnd_state_shape=None,
         device='cpu',
+        torque_supervision=False,
+        storage_dtype="float32",
+        global_action_sigma=False,
+        obs_history_shape=None,
+        history_normalization=False,
     ):
 
         # store inputs
@@ -51,80 +131,273 @@ class RolloutStorage:
         self.privileged_obs_shape = privileged_obs_shape
         self.rnd_state_shape = rnd_state_shape
         self.actions_shape = actions_shape
-
-        # Core
-        self.observations = torch.zeros(num_transitions_per_env, num_envs, *obs_shape, device=self.device)
-        if privileged_obs_shape is not None:
-            self.privileged_observations = torch.zeros(
-                num_transitions_per_env, num_envs, *privileged_obs_shape, device=self.device
+        self.torque_supervision = torque_supervision
+        self.global_action_sigma = global_action_sigma
+        if storage_dtype not in self.STORAGE_DTYPES:
+            raise ValueError(
+                f"Unsupported storage dtype '{storage_dtype}'. Expected one of {list(self.STORAGE_DTYPES.keys())}."
             )
+        self.storage_dtype = self.STORAGE_DTYPES[storage_dtype]
+
+        # single-frame observations: only the newest proprioceptive frame of every transition is stored and the
+        # history windows are rebuilt from the stored frames when the mini-batches are built
+        self.obs_history_shape = obs_history_shape
+        if obs_history_shape is not None:
+            num_hist, num_prop = obs_history_shape
+            stored_obs_shape = [obs_shape[0] - (num_hist - 1) * num_prop]
         else:
-            self.privileged_observations = None
-        self.rewards = torch.zeros(num_transitions_per_env, num_envs, 2, device=self.device)
-        self.actions = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, device=self.device)
-        self.dones = torch.zeros(num_transitions_per_env, num_envs, 1, device=self.device).byte()
-
-        # for distillation
-        if training_type == "distillation":
-            self.privileged_actions = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, device=self.device)
-
-        # for reinforcement learning
-        if training_type == "rl":
-            self.actions_log_prob = torch.zeros(num_transitions_per_env, num_envs, 2, device=self.device)
-            self.values = torch.zeros(num_transitions_per_env, num_envs, 2, device=self.device)
-            self.returns = torch.zeros(num_transitions_per_env, num_envs, 2, device=self.device)
-            self.advantages = torch.zeros(num_transitions_per_env, num_envs, 2, device=self.device)
-            self.mu = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, device=self.device)
-            self.sigma = torch.zeros(num_transitions_per_env, num_envs, *actions_shape, device=self.device)
-
-            self.target_arm_torques = torch.zeros(num_transitions_per_env, num_envs, 6, device=self.device)
-            self.current_arm_dof_pos = torch.zeros(num_transitions_per_env, num_envs, 6, device=self.device)
-            self.current_arm_dof_vel = torch.zeros(num_transitions_per_env, num_envs, 6, device=self.device)\
-            
-        # For RND
-        if rnd_state_shape is not None:
-            self.rnd_state = torch.zeros(num_transitions_per_env, num_envs, *rnd_state_shape, device=self.device)
+            stored_obs_shape = obs_shape
+
+        # describe the buffers and allocate all of them in one arena
+        self.schema = self.build_schema(
+            training_type,
+            stored_obs_shape,
+            privileged_obs_shape,
+            actions_shape,
+            rnd_state_shape,
+            torque_supervision,
+            self.storage_dtype,
+            global_action_sigma,
+        )
+        self.arena = torch.zeros(
+            self.arena_size(self.schema, num_envs, num_transitions_per_env), dtype=torch.uint8, device=self.device
+        )
+        offset = 0
+        for field in self.schema:
+            if not field.enabled:
+                setattr(self, field.name, None)
+                continue
+            num_bytes = self._field_size(field, num_envs, num_transitions_per_env)
+            buffer = self.arena[offset : offset + num_bytes].view(field.dtype)
+            if field.per_rollout:
+                buffer = buffer.view(1, 1, *field.shape).expand(num_transitions_per_env, num_envs, *field.shape)
+            else:
+                buffer = buffer.view(num_transitions_per_env, num_envs, *field.shape)
+            setattr(self, field.name, buffer)
+            offset += self._align(num_bytes)
+        # buffers that are filled from the transitions at every step
+        self.transition_fields = [field for field in self.schema if field.enabled and field.source is not None]
+
+        # For single-frame observations
+        if obs_history_shape is not None:
+            # the single-frame observations are extracted from the transitions in add_transitions()
+            self.transition_fields = [field for field in self.transition_fields if field.name != "observations"]
+            # frames preceding the rollout (newest first), taken from the history of the first transition
+            self.history_prefix = torch.zeros(
+                num_envs, num_hist - 1, num_prop, dtype=self.storage_dtype, device=self.device
+            )
+        # normalized single-frame observations: each slot of the windows was normalized with the statistics of the
+        # step it was acted on, so the raw frames are stored with the mean and denominator of every step
+        if obs_history_shape is not None and history_normalization:
+            self.history_mean = torch.zeros(num_transitions_per_env, num_hist * num_prop, device=self.device)
+            self.history_denominator = torch.ones(num_transitions_per_env, num_hist * num_prop, device=self.device)
+        else:
+            self.history_mean = None
+            self.history_denominator = None
+        # frames and window indices of the current rollout (built on first use)
+        self.history_frames = None
+        self.history_windows = None
 
         # For RNN networks
         self.saved_hidden_states_a = None
         self.saved_hidden_states_c = None
 
+        # For the packed mini-batch generator (allocated on first use)
+        self.packed_transitions = None
+        self.shuffled_transitions = None
+
         # counter for the number of transitions stored
         self.step = 0
 
-
-    def add_transitions(self, transition: Transition, torque_supervision):
+        # trajectory segmentation of the current rollout (for recurrent networks)
+        self.trajectory_index = None
+
+    def rollout_observations(self) -> torch.Tensor:
+        """Policy observations of the rollout. Shape: (num_transitions_per_env, num_envs, *obs_shape)
+
+        With single-frame observations, the history windows are rebuilt for the whole rollout. The feedforward
+        generators only rebuild the rows of the mini-batches (see :meth:`gather_observations`).
+        """
+        if self.obs_history_shape is None:
+            return self.observations
+        num_transitions = self.num_transitions_per_env * self.num_envs
+        indices = torch.arange(num_transitions, device=self.device)
+        return self.gather_observations(indices).view(self.num_transitions_per_env, self.num_envs, -1)
+
+    def gather_observations(self, indices: torch.Tensor) -> torch.Tensor:
+        """Policy observations of the transitions with the given (time-major) flat indices."""
+        if self.obs_history_shape is None:
+            return self.observations.flatten(0, 1)[indices]
+        num_hist, num_prop = self.obs_history_shape
+        if self.history_windows is None:
+            self._build_history_index()
+        stored = self.observations.flatten(0, 1)[indices]
+        windows = self.history_frames[self.history_windows[indices]].flatten(1)
+        if self.history_mean is not None:
+            # same operations as the normalizer at the step of the transitions
+            steps = torch.div(indices, self.num_envs, rounding_mode="floor")
+            windows = ((windows - self.history_mean[steps]) / self.history_denominator[steps]).to(stored.dtype)
+        return torch.cat([windows, stored[:, num_prop:]], dim=-1)
+
+    def _build_history_index(self):
+        """Index the frame of every slot of the history windows of the rollout.
+
+        The window of the transition at step ``t`` holds the frames ``t, t-1, ..., t-num_hist+1``, where frames older
+        than the start of the episode are replaced by the first frame of the episode (as done by the history buffers
+        of the observation manager after a reset).
+        """
+        num_hist, num_prop = self.obs_history_shape
+        num_steps, num_envs = self.num_transitions_per_env, self.num_envs
+        frames = self.observations[..., :num_prop]
+        # frames of the rollout preceded by the frames of the history of the first transition: oldest first
+        self.history_frames = torch.cat([self.history_prefix.flip(1).transpose(0, 1), frames])
+        self.history_frames = self.history_frames.flatten(0, 1)
+
+        # first step of the current episode of every transition (-num_hist if it started before the rollout)
+        steps = torch.arange(num_steps, device=self.device).unsqueeze(1)
+        dones = self.dones.squeeze(-1).bool()
+        episode_starts = torch.full((num_steps, num_envs), -num_hist, dtype=torch.long, device=self.device)
+        episode_starts[1:] = torch.where(dones[:-1], steps[1:], episode_starts[1:])
+        episode_starts = torch.cummax(episode_starts, dim=0).values
+
+        # step of every slot of the windows, clamped to the start of the episode
+        lags = torch.arange(num_hist, device=self.device)
+        window_steps = torch.maximum(steps.unsqueeze(-1) - lags, episode_starts.unsqueeze(-1))
+        env_ids = torch.arange(num_envs, device=self.device).view(1, -1, 1)
+        self.history_windows = ((window_steps + num_hist - 1) * num_envs + env_ids).flatten(0, 1)
+
+    @staticmethod
+    def build_schema(
+        training_type,
+        obs_shape,
+        privileged_obs_shape,
+        actions_shape,
+        rnd_state_shape=None,
+        torque_supervision=False,
+        storage_dtype=torch.float,
+        global_action_sigma=False,
+    ) -> list[TransitionField]:
+        """Describe the per-step buffers needed for the given training setup.
+
+        The observations, actions and action distribution parameters are kept in ``storage_dtype``. The values,
+        returns and advantages are always kept in full precision. If ``global_action_sigma`` is True, the action
+        std is shared by all the environments and steps of a rollout and is stored once.
+
+        Note:
+            Without privileged observations (``privileged_obs_shape=None``), the critic reuses the policy
+            observations and no separate buffer is allocated.
+        """
+        is_rl = training_type == "rl"
+        return [
+            # Core
+            TransitionField("observations", tuple(obs_shape), dtype=storage_dtype, source="observations"),
+            TransitionField(
+                "privileged_observations",
+                tuple(privileged_obs_shape or ()),
+                dtype=storage_dtype,
+                enabled=privileged_obs_shape is not None,
+                source="privileged_observations",
+            ),
+            TransitionField("actions", tuple(actions_shape), dtype=storage_dtype, source="actions"),
+            TransitionField("rewards", (2,), source="rewards"),
+            TransitionField("dones", (1,), dtype=torch.uint8, source="dones"),
+            # for distillation
+            TransitionField(
+                "privileged_actions",
+                tuple(actions_shape),
+                enabled=training_type == "distillation",
+                source="privileged_actions",
+            ),
+            # for reinforcement learning
+            TransitionField("actions_log_prob", (2,), enabled=is_rl, source="actions_log_prob"),
+            TransitionField("values", (2,), enabled=is_rl, source="values"),
+            TransitionField("returns", (2,), enabled=is_rl),
+            TransitionField("advantages", (2,), enabled=is_rl),
+            TransitionField("mu", tuple(actions_shape), dtype=storage_dtype, enabled=is_rl, source="action_mean"),
+            TransitionField(
+                "sigma",
+                tuple(actions_shape),
+                dtype=storage_dtype,
+                enabled=is_rl,
+                source="action_sigma",
+                per_rollout=global_action_sigma,
+            ),
+            # -- scratch buffers for the advantage estimation
+            TransitionField("not_dones", (1,), enabled=is_rl),
+            TransitionField("discounts", (1,), enabled=is_rl),
+            # -- arm torque supervision
+            TransitionField(
+                "target_arm_torques", (6,), enabled=is_rl and torque_supervision, source="target_arm_torques"
+            ),
+            TransitionField(
+                "current_arm_dof_pos", (6,), enabled=is_rl and torque_supervision, source="current_arm_dof_pos"
+            ),
+            TransitionField(
+                "current_arm_dof_vel", (6,), enabled=is_rl and torque_supervision, source="current_arm_dof_vel"
+            ),
+            # For RND
+            TransitionField(
+                "rnd_state",
+                tuple(rnd_state_shape or ()),
+                enabled=rnd_state_shape is not None,
+                source="rnd_state",
+            ),
+        ]
+
+    @classmethod
+    def arena_size(cls, schema: list[TransitionField], num_envs: int, num_transitions_per_env: int) -> int:
+        """Number of bytes needed to store the enabled fields of the schema."""
+        return sum(
+            cls._align(cls._field_size(field, num_envs, num_transitions_per_env))
+            for field in schema
+            if field.enabled
+        )
+
+    @staticmethod
+    def _field_size(field: TransitionField, num_envs: int, num_transitions_per_env: int) -> int:
+        itemsize = torch.empty((), dtype=field.dtype).element_size()
+        if field.per_rollout:
+            return math.prod(field.shape) * itemsize
+        return num_transitions_per_env * num_envs * math.prod(field.shape) * itemsize
+
+    @classmethod
+    def _align(cls, num_bytes: int) -> int:
+        return -(-num_bytes // cls.ARENA_ALIGNMENT) * cls.ARENA_ALIGNMENT
+
+    def add_transitions(self, transition: Transition):
         # check if the transition is valid
         if self.step >= self.num_transitions_per_env:
             raise OverflowError("Rollout buffer overflow! You should call clear() before adding new transitions.")
 
-        # Core
-        self.observations[self.step].copy_(transition.observations)
-        if self.privileged_observations is not None:
-            self.privileged_observations[self.step].copy_(transition.privileged_observations)
-        self.actions[self.step].copy_(transition.actions)
-        self.rewards[self.step].copy_(transition.rewards)
-        self.dones[self.step].copy_(transition.dones.view(-1, 1))
-
-        if torque_supervision:
-            self.target_arm_torques[self.step].copy_(transition.target_arm_torques)
-            self.current_arm_dof_pos[self.step].copy_(transition.current_arm_dof_pos)
-            self.current_arm_dof_vel[self.step].copy_(transition.current_arm_dof_vel)
-
-        # for distillation
-        if self.training_type == "distillation":
-            self.privileged_actions[self.step].copy_(transition.privileged_actions)
-
-        # for reinforcement learning
-        if self.training_type == "rl":
-            self.values[self.step].copy_(transition.values)
-            self.actions_log_prob[self.step].copy_(transition.actions_log_prob)
-            self.mu[self.step].copy_(transition.action_mean)
-            self.sigma[self.step].copy_(transition.action_sigma)
-
-        # For RND
-        if self.rnd_state_shape is not None:
-            self.rnd_state[self.step].copy_(transition.rnd_state)
+        # For single-frame observations
+        if self.obs_history_shape is not None:
+            num_hist, num_prop = self.obs_history_shape
+            frames = transition.observations
+            if self.history_mean is not None:
+                # raw frames and statistics of the normalization at this step
+                frames, mean, denominator = transition.history_normalization
+                self.history_mean[self.step].copy_(mean.view(-1))
+                self.history_denominator[self.step].copy_(denominator.view(-1))
+            if self.step == 0:
+                history = frames[:, num_prop : num_hist * num_prop]
+                self.history_prefix.copy_(history.view(self.history_prefix.shape))
+            # only the newest frame and the non-historical terms are stored
+            self.observations[self.step, :, :num_prop].copy_(frames[:, :num_prop])
+            self.observations[self.step, :, num_prop:].copy_(transition.observations[:, num_hist * num_prop :])
+
+        # copy the transition into the buffers
+        for field in self.transition_fields:
+            value = getattr(transition, field.source)
+            # optional inputs (e.g. torque supervision) are not provided at every step
+            if value is None:
+                continue
+            buffer = getattr(self, field.name)[self.step]
+            if field.per_rollout:
+                # the value is the same for all the environments and steps: only record it once
+                if self.step == 0:
+                    buffer[0].copy_(value.reshape(buffer.shape)[0])
+                continue
+            buffer.copy_(value.reshape(buffer.shape))
 
         # For RNN networks
         self._save_hidden_states(transition.hidden_states)
@@ -142,10 +415,10 @@ class RolloutStorage:
         # initialize if needed
         if self.saved_hidden_states_a is None:
             self.saved_hidden_states_a = [
-                torch.zeros(self.observations.shape[0], *hid_a[i].shape, device=self.device) for i in range(len(hid_a))
+                torch.zeros(self.num_transitions_per_env, *hid_a[i].shape, device=self.device) for i in range(len(hid_a))
             ]
             self.saved_hidden_states_c = [
-                torch.zeros(self.observations.shape[0], *hid_c[i].shape, device=self.device) for i in range(len(hid_c))
+                torch.zeros(self.num_transitions_per_env, *hid_c[i].shape, device=self.device) for i in range(len(hid_c))
             ]
         # copy the states
         for i in range(len(hid_a)):
@@ -156,30 +429,54 @@ class RolloutStorage:
 
     def clear(self):
         self.step = 0
-
-    def compute_returns(self, last_values, gamma, lam, normalize_advantage: bool = True):
-        advantage = 0
-        for step in reversed(range(self.num_transitions_per_env)):
-            # if we are at the last step, bootstrap the return value
-            if step == self.num_transitions_per_env - 1:
-                next_values = last_values
-            else:
-                next_values = self.values[step + 1]
-            # 1 if we are not in a terminal state, 0 otherwise
-            next_is_not_terminal = 1.0 - self.dones[step].float()
-            # TD error: r_t + gamma * V(s_{t+1}) - V(s_t)
-            delta = self.rewards[step] + next_is_not_terminal * gamma * next_values - self.values[step]
-            # Advantage: A(s_t, a_t) = delta_t + gamma * lambda * A(s_{t+1}, a_{t+1})
-            advantage = delta + next_is_not_terminal * gamma * lam * advantage
-            # Return: R_t = A(s_t, a_t) + V(s_t)
-            self.returns[step] = advantage + self.values[step]
-
-        # Compute the advantages
-        self.advantages = self.returns - self.values
+        self.trajectory_index = None
+        self.history_frames = None
+        self.history_windows = None
+
+    def compute_returns(
+        self,
+        last_values,
+        gamma,
+        lam,
+        normalize_advantage: bool = True,
+        log_rhos: torch.Tensor | None = None,
+        rho_clip: float = 1.0,
+        c_clip: float = 1.0,
+    ):
+        # 1 if we are not in a terminal state, 0 otherwise (computed once for the whole rollout)
+        torch.logical_not(self.dones, out=self.not_dones)
+        # compute advantages and returns in the preallocated buffers
+        if log_rhos is None:
+            compute_gae_(
+                self.rewards,
+                self.values,
+                last_values,
+                self.not_dones,
+                gamma,
+                lam,
+                self.returns,
+                self.advantages,
+                self.discounts,
+            )
+        else:
+            # off-policy correction of a rollout collected with an older policy
+            compute_vtrace_(
+                self.rewards,
+                self.values,
+                last_values,
+                self.not_dones,
+                log_rhos,
+                gamma,
+                lam,
+                rho_clip,
+                c_clip,
+                self.returns,
+                self.advantages,
+            )
         # Normalize the advantages if flag is set
         # This is to prevent double normalization (i.e. if per minibatch normalization is used)
         if normalize_advantage:
-            self.advantages = (self.advantages - self.advantages.mean()) / (self.advantages.std() + 1e-8)
+            normalize_advantages_(self.advantages)
 
     def get_statistics(self):
         done = self.dones
@@ -194,14 +491,14 @@ class RolloutStorage:
         if self.training_type != "distillation":
             raise ValueError("This function is only available for distillation training.")
 
+        observations = self.rollout_observations()
         for i in range(self.num_transitions_per_env):
             if self.privileged_observations is not None:
                 privileged_observations = self.privileged_observations[i]
             else:
-                privileged_observations = self.observations[i]
-            yield self.observations[i], privileged_observations, self.actions[i], self.privileged_actions[
-                i
-            ], self.dones[i]
+                privileged_observations = observations[i]
+            yield observations[i].float(), privileged_observations.float(), self.actions[i].float(), \
+                self.privileged_actions[i], self.dones[i]
 
     # for reinforcement learning with feedforward networks
     def mini_batch_generator(self, num_mini_batches, num_epochs=8):
@@ -212,11 +509,10 @@ class RolloutStorage:
         indices = torch.randperm(num_mini_batches * mini_batch_size, requires_grad=False, device=self.device)
 
         # Core
-        observations = self.observations.flatten(0, 1)
         if self.privileged_observations is not None:
             privileged_observations = self.privileged_observations.flatten(0, 1)
         else:
-            privileged_observations = observations
+            privileged_observations = None
 
         actions = self.actions.flatten(0, 1)
         values = self.values.flatten(0, 1)
@@ -232,9 +528,11 @@ class RolloutStorage:
         if self.rnd_state_shape is not None:
             rnd_state = self.rnd_state.flatten(0, 1)
 
-        target_arm_torques = self.target_arm_torques.flatten(0, 1)
-        current_arm_dof_pos = self.current_arm_dof_pos.flatten(0, 1)
-        current_arm_dof_vel = self.current_arm_dof_vel.flatten(0, 1)
+        # For torque supervision
+        if self.torque_supervision:
+            target_arm_torques = self.target_arm_torques.flatten(0, 1)
+            current_arm_dof_pos = self.current_arm_dof_pos.flatten(0, 1)
+            current_arm_dof_vel = self.current_arm_dof_vel.flatten(0, 1)
 
         for epoch in range(num_epochs):
             for i in range(num_mini_batches):
@@ -245,17 +543,21 @@ class RolloutStorage:
 
                 # Create the mini-batch
                 # -- Core
-                obs_batch = observations[batch_idx]
-                privileged_observations_batch = privileged_observations[batch_idx]
-                actions_batch = actions[batch_idx]
+                # note: reduced-precision buffers are upcast after the gather (no-op for full precision)
+                obs_batch = self.gather_observations(batch_idx).float()
+                if privileged_observations is not None:
+                    privileged_observations_batch = privileged_observations[batch_idx].float()
+                else:
+                    privileged_observations_batch = obs_batch
+                actions_batch = actions[batch_idx].float()
 
                 # -- For PPO
                 target_values_batch = values[batch_idx]
                 returns_batch = returns[batch_idx]
                 old_actions_log_prob_batch = old_actions_log_prob[batch_idx]
                 advantages_batch = advantages[batch_idx]
-                old_mu_batch = old_mu[batch_idx]
-                old_sigma_batch = old_sigma[batch_idx]
+                old_mu_batch = old_mu[batch_idx].float()
+                old_sigma_batch = old_sigma[batch_idx].float()
 
                 # -- For RND
                 if self.rnd_state_shape is not None:
@@ -263,134 +565,207 @@ class RolloutStorage:
                 else:
                     rnd_state_batch = None
 
-                target_arm_torques_batch = target_arm_torques[batch_idx]
-                current_arm_dof_pos_batch = current_arm_dof_pos[batch_idx]
-                current_arm_dof_vel_batch = current_arm_dof_vel[batch_idx]
+                # -- For torque supervision
+                if self.torque_supervision:
+                    target_arm_torques_batch = target_arm_torques[batch_idx]
+                    current_arm_dof_pos_batch = current_arm_dof_pos[batch_idx]
+                    current_arm_dof_vel_batch = current_arm_dof_vel[batch_idx]
+                else:
+                    target_arm_torques_batch = current_arm_dof_pos_batch = current_arm_dof_vel_batch = None
 
                 # yield the mini-batch
                 yield obs_batch, privileged_observations_batch, actions_batch, target_values_batch, advantages_batch, returns_batch, \
                     old_actions_log_prob_batch, old_mu_batch, old_sigma_batch, target_arm_torques_batch, current_arm_dof_pos_batch, current_arm_dof_vel_batch, \
                     (None, None), None, rnd_state_batch
 
-    # for reinfrocement learning with recurrent networks
-    def recurrent_mini_batch_generator(self, num_mini_batches, num_epochs=8):
+    # for reinforcement learning with feedforward networks
+    def packed_mini_batch_generator(self, num_mini_batches, num_epochs=8):
+        """Mini-batch generator that gathers all the transition data with a single kernel per epoch.
+
+        All per-transition fields are packed column-wise into one contiguous ``[batch_size, num_features]`` block.
+        At every epoch, the rows of the block are permuted with a new random permutation into a second preallocated
+        block. The mini-batches are then row slices of that block and the yielded fields are column views of it,
+        so no data is copied per mini-batch. A global action std is not packed but broadcast to the mini-batches.
+
+        Note:
+            The yielded tensors are views into a buffer that is overwritten at the start of the next epoch.
+            Reduced-precision buffers are upcast to full precision when they are packed.
+        """
         if self.training_type != "rl":
             raise ValueError("This function is only available for reinforcement learning training.")
-        padded_obs_trajectories, trajectory_masks = split_and_pad_trajectories(self.observations, self.dones)
-        if self.privileged_observations is not None:
-            padded_privileged_obs_trajectories, _ = split_and_pad_trajectories(self.privileged_observations, self.dones)
-        else:
-            padded_privileged_obs_trajectories = padded_obs_trajectories
+        batch_size = self.num_envs * self.num_transitions_per_env
+        mini_batch_size = batch_size // num_mini_batches
 
-        if self.rnd_state_shape is not None:
-            padded_rnd_state_trajectories, _ = split_and_pad_trajectories(self.rnd_state, self.dones)
-        else:
-            padded_rnd_state_trajectories = None
+        # collect the fields in the order in which they are yielded (disabled fields are None)
+        fields = [
+            # -- single-frame observations are rebuilt per mini-batch instead of packed
+            self.observations if self.obs_history_shape is None else None,
+            self.privileged_observations,
+            self.actions,
+            self.values,
+            self.advantages,
+            self.returns,
+            self.actions_log_prob,
+            self.mu,
+            None if self.global_action_sigma else self.sigma,
+            self.target_arm_torques,
+            self.current_arm_dof_pos,
+            self.current_arm_dof_vel,
+            self.rnd_state,
+        ]
+        packed_fields = [field.flatten(0, 1).flatten(1) for field in fields if field is not None]
+        widths = [field.shape[1] for field in packed_fields]
+
+        # pack the fields into one block
+        if self.packed_transitions is None:
+            self.packed_transitions = torch.empty(batch_size, sum(widths), device=self.device)
+            self.shuffled_transitions = torch.empty_like(self.packed_transitions)
+        torch.cat(packed_fields, dim=1, out=self.packed_transitions)
+
+        for epoch in range(num_epochs):
+            # permute the rows once per epoch
+            indices = torch.randperm(batch_size, device=self.device)
+            torch.index_select(self.packed_transitions, 0, indices, out=self.shuffled_transitions)
 
-        mini_batch_size = self.num_envs // num_mini_batches
-        for ep in range(num_epochs):
-            first_traj = 0
             for i in range(num_mini_batches):
+                # Select the rows for the mini-batch and split them into the fields
                 start = i * mini_batch_size
-                stop = (i + 1) * mini_batch_size
+                end = (i + 1) * mini_batch_size
+                columns = iter(self.shuffled_transitions[start:end].split(widths, dim=1))
+                batch = [next(columns) if field is not None else None for field in fields]
+                if self.obs_history_shape is not None:
+                    batch[0] = self.gather_observations(indices[start:end]).float()
+                # -- the critic uses the policy observations if there are no privileged observations
+                if batch[1] is None:
+                    batch[1] = batch[0]
+                # -- the global action std is broadcast to the mini-batch
+                if self.global_action_sigma:
+                    batch[8] = self.sigma[0, 0].float().expand(end - start, -1)
 
-                dones = self.dones.squeeze(-1)
-                last_was_done = torch.zeros_like(dones, dtype=torch.bool)
-                last_was_done[1:] = dones[:-1]
-                last_was_done[0] = True
-                trajectories_batch_size = torch.sum(last_was_done[:, start:stop])
-                last_traj = first_traj + trajectories_batch_size
+                # yield the mini-batch
+                yield *batch[:12], (None, None), None, batch[12]
 
-                masks_batch = trajectory_masks[:, first_traj:last_traj]
-                obs_batch = padded_obs_trajectories[:, first_traj:last_traj]
-                privileged_obs_batch = padded_privileged_obs_trajectories[:, first_traj:last_traj]
+    # for reinforcement learning with recurrent networks
+    def recurrent_mini_batch_generator(self, num_mini_batches, num_epochs=8):
+        if self.training_type != "rl":
+            raise ValueError("This function is only available for reinforcement learning training.")
+        # segment the rollout into trajectories (only done once per rollout)
+        index = self.build_trajectory_index(num_mini_batches)
 
-                if padded_rnd_state_trajectories is not None:
-                    rnd_state_batch = padded_rnd_state_trajectories[:, first_traj:last_traj]
+        mini_batch_size = self.num_envs // num_mini_batches
+        for ep in range(num_epochs):
+            for i in range(num_mini_batches):
+                start = i * mini_batch_size
+                stop = (i + 1) * mini_batch_size
+                first_traj = index.mini_batch_offsets[i]
+                last_traj = index.mini_batch_offsets[i + 1]
+
+                # -- trajectories of the environments of the mini-batch
+                masks_batch = index.masks[:, first_traj:last_traj]
+                obs_batch = index.observations[:, first_traj:last_traj].float()
+                privileged_obs_batch = index.privileged_observations[:, first_traj:last_traj].float()
+                if index.rnd_state is not None:
+                    rnd_state_batch = index.rnd_state[:, first_traj:last_traj]
                 else:
                     rnd_state_batch = None
 
-                actions_batch = self.actions[:, start:stop]
-                old_mu_batch = self.mu[:, start:stop]
-                old_sigma_batch = self.sigma[:, start:stop]
+                # -- transitions of the environments of the mini-batch
+                actions_batch = self.actions[:, start:stop].float()
+                old_mu_batch = self.mu[:, start:stop].float()
+                old_sigma_batch = self.sigma[:, start:stop].float()
                 returns_batch = self.returns[:, start:stop]
                 advantages_batch = self.advantages[:, start:stop]
                 values_batch = self.values[:, start:stop]
                 old_actions_log_prob_batch = self.actions_log_prob[:, start:stop]
 
-                # reshape to [num_envs, time, num layers, hidden dim] (original shape: [time, num_layers, num_envs, hidden_dim])
-                # then take only time steps after dones (flattens num envs and time dimensions),
-                # take a batch of trajectories and finally reshape back to [num_layers, batch, hidden_dim]
-                last_was_done = last_was_done.permute(1, 0)
-                hid_a_batch = [
-                    saved_hidden_states.permute(2, 0, 1, 3)[last_was_done][first_traj:last_traj]
-                    .transpose(1, 0)
-                    .contiguous()
-                    for saved_hidden_states in self.saved_hidden_states_a
-                ]
-                hid_c_batch = [
-                    saved_hidden_states.permute(2, 0, 1, 3)[last_was_done][first_traj:last_traj]
-                    .transpose(1, 0)
-                    .contiguous()
-                    for saved_hidden_states in self.saved_hidden_states_c
-                ]
+                # -- For torque supervision
+                if self.torque_supervision:
+                    target_arm_torques_batch = self.target_arm_torques[:, start:stop]
+                    current_arm_dof_pos_batch = self.current_arm_dof_pos[:, start:stop]
+                    current_arm_dof_vel_batch = self.current_arm_dof_vel[:, start:stop]
+                else:
+                    target_arm_torques_batch = current_arm_dof_pos_batch = current_arm_dof_vel_batch = None
+
+                # -- hidden states at the start of the trajectories: [num_layers, batch, hidden_dim]
+                hid_a_batch = [hidden_states[:, first_traj:last_traj] for hidden_states in index.hidden_states_a]
+                hid_c_batch = [hidden_states[:, first_traj:last_traj] for hidden_states in index.hidden_states_c]
                 # remove the tuple for GRU
                 hid_a_batch = hid_a_batch[0] if len(hid_a_batch) == 1 else hid_a_batch
                 hid_c_batch = hid_c_batch[0] if len(hid_c_batch) == 1 else hid_c_batch
 
-                yield obs_batch, privileged_obs_batch, actions_batch, values_batch, advantages_batch, returns_batch, old_actions_log_prob_batch, old_mu_batch, old_sigma_batch, (
-                    hid_a_batch,
-                    hid_c_batch,
-                ), masks_batch, rnd_state_batch
-
-                first_traj = last_traj
-
-
-        padded_obs_trajectories, trajectory_masks = split_and_pad_trajectories(self.observations, self.dones)
-        if self.privileged_observations is not None: 
-            padded_critic_obs_trajectories, _ = split_and_pad_trajectories(self.privileged_observations, self.dones)
-        else: 
-            padded_critic_obs_trajectories = padded_obs_trajectories
-
+                yield obs_batch, privileged_obs_batch, actions_batch, values_batch, advantages_batch, returns_batch, \
+                    old_actions_log_prob_batch, old_mu_batch, old_sigma_batch, target_arm_torques_batch, \
+                    current_arm_dof_pos_batch, current_arm_dof_vel_batch, (hid_a_batch, hid_c_batch), masks_batch, \
+                    rnd_state_batch
+
+    def build_trajectory_index(self, num_mini_batches) -> TrajectoryIndex:
+        """Segment the rollout into trajectories for the recurrent mini-batch generator.
+
+        The index is built once per rollout and reused by all the epochs and mini-batches (and by successive
+        generators with the same number of mini-batches) until the storage is cleared.
+        """
+        index = self.trajectory_index
+        if index is not None and index.num_mini_batches == num_mini_batches:
+            return index
+
+        # a trajectory starts at the first step of the rollout and after every done
+        dones = self.dones.squeeze(-1)
+        last_was_done = torch.zeros_like(dones, dtype=torch.bool)
+        last_was_done[1:] = dones[:-1]
+        last_was_done[0] = True
+        # trajectories are ordered environment-major: [num_envs, time]
+        last_was_done = last_was_done.transpose(1, 0)
+
+        # offsets of the first trajectory of every mini-batch of environments
         mini_batch_size = self.num_envs // num_mini_batches
-        for ep in range(num_epochs):
-            first_traj = 0
-            for i in range(num_mini_batches):
-                start = i*mini_batch_size
-                stop = (i+1)*mini_batch_size
-
-                dones = self.dones.squeeze(-1)
-                last_was_done = torch.zeros_like(dones, dtype=torch.bool)
-                last_was_done[1:] = dones[:-1]
-                last_was_done[0] = True
-                trajectories_batch_size = torch.sum(last_was_done[:, start:stop])
-                last_traj = first_traj + trajectories_batch_size
-                
-                masks_batch = trajectory_masks[:, first_traj:last_traj]
-                obs_batch = padded_obs_trajectories[:, first_traj:last_traj]
-                critic_obs_batch = padded_critic_obs_trajectories[:, first_traj:last_traj]
-
-                actions_batch = self.actions[:, start:stop]
-                old_mu_batch = self.mu[:, start:stop]
-                old_sigma_batch = self.sigma[:, start:stop]
-                returns_batch = self.returns[:, start:stop]
-                advantages_batch = self.advantages[:, start:stop]
-                values_batch = self.values[:, start:stop]
-                old_actions_log_prob_batch = self.actions_log_prob[:, start:stop]
+        trajectories_per_env = last_was_done.sum(dim=1)
+        offsets = torch.cumsum(trajectories_per_env, dim=0)[mini_batch_size - 1 :: mini_batch_size][:num_mini_batches]
+        mini_batch_offsets = [0] + offsets.tolist()
+
+        # position of every transition in the padded trajectories (same layout as split_and_pad_trajectories)
+        starts = last_was_done.flatten()
+        trajectory_ids = torch.cumsum(starts, dim=0) - 1
+        start_indices = starts.nonzero().squeeze(-1)
+        positions = torch.arange(starts.numel(), device=self.device) - start_indices[trajectory_ids]
+        num_trajectories = start_indices.numel()
+        trajectory_lengths = torch.bincount(trajectory_ids, minlength=num_trajectories)
+        steps = torch.arange(0, self.num_transitions_per_env, device=self.device)
+        trajectory_masks = trajectory_lengths > steps.unsqueeze(1)
+
+        # scatter the transitions into the padded trajectories: [time, num_trajectories, ...]
+        def pad_trajectories(tensor):
+            padded = tensor.new_zeros(self.num_transitions_per_env, num_trajectories, *tensor.shape[2:])
+            padded[positions, trajectory_ids] = tensor.transpose(1, 0).flatten(0, 1)
+            return padded
+
+        padded_obs_trajectories = pad_trajectories(self.rollout_observations())
+        if self.privileged_observations is not None:
+            padded_privileged_obs_trajectories = pad_trajectories(self.privileged_observations)
+        else:
+            padded_privileged_obs_trajectories = padded_obs_trajectories
+        if self.rnd_state_shape is not None:
+            padded_rnd_state_trajectories = pad_trajectories(self.rnd_state)
+        else:
+            padded_rnd_state_trajectories = None
 
-                # reshape to [num_envs, time, num layers, hidden dim] (original shape: [time, num_layers, num_envs, hidden_dim])
-                # then take only time steps after dones (flattens num envs and time dimensions),
-                # take a batch of trajectories and finally reshape back to [num_layers, batch, hidden_dim]
-                last_was_done = last_was_done.permute(1, 0)
-                hid_a_batch = [ saved_hidden_states.permute(2, 0, 1, 3)[last_was_done][first_traj:last_traj].transpose(1, 0).contiguous()
-                                for saved_hidden_states in self.saved_hidden_states_a ] 
-                hid_c_batch = [ saved_hidden_states.permute(2, 0, 1, 3)[last_was_done][first_traj:last_traj].transpose(1, 0).contiguous()
-                                for saved_hidden_states in self.saved_hidden_states_c ]
-                # remove the tuple for GRU
-                hid_a_batch = hid_a_batch[0] if len(hid_a_batch)==1 else hid_a_batch
-                hid_c_batch = hid_c_batch[0] if len(hid_c_batch)==1 else hid_a_batch
+        # gather the hidden states at the start of the trajectories
+        # from [time, num_layers, num_envs, hidden_dim] to [num_layers, num_trajectories, hidden_dim]
+        def gather_hidden_states(saved_hidden_states):
+            if saved_hidden_states is None:
+                return []
+            return [
+                hidden_states.permute(2, 0, 1, 3)[last_was_done].transpose(1, 0).contiguous()
+                for hidden_states in saved_hidden_states
+            ]
 
-                yield obs_batch, critic_obs_batch, actions_batch, values_batch, advantages_batch, returns_batch, \
-                       old_actions_log_prob_batch, old_mu_batch, old_sigma_batch, (hid_a_batch, hid_c_batch), masks_batch
-                
-                first_traj = last_traj
\ No newline at end of file
+        self.trajectory_index = TrajectoryIndex(
+            num_mini_batches=num_mini_batches,
+            mini_batch_offsets=mini_batch_offsets,
+            masks=trajectory_masks,
+            observations=padded_obs_trajectories,
+            privileged_observations=padded_privileged_obs_trajectories,
+            rnd_state=padded_rnd_state_trajectories,
+            hidden_states_a=gather_hidden_states(self.saved_hidden_states_a),
+            hidden_states_c=gather_hidden_states(self.saved_hidden_states_c),
+        )
+        return self.trajectory_index
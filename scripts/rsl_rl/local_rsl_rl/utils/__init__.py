@@ -5,6 +5,14 @@
 
 """Helper functions."""
 
+from .checkpoint_writer import CheckpointWriter, snapshot_state
+from .distributed import GradientBucketReducer, broadcast_state, broadcast_tensors, distributed_backend
+from .elastic import ElasticGroup
+from .episode_statistics import EpisodeStatistics
+from .exporter import ExportedPolicy, export_policy
+from .metrics_writer import AsyncMetricsWriter, JsonlSummaryWriter
+from .obs_history import ObservationHistory, ObservationReorder
+from .phase_timer import PhaseTimer
 from .utils import (
     resolve_nn_activation,
     split_and_pad_trajectories,
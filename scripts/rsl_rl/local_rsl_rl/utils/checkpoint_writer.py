@@ -0,0 +1,123 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Writer of the training checkpoints."""
+
+from __future__ import annotations
+
+import os
+import queue
+import threading
+import torch
+from collections.abc import Callable
+
+
+def snapshot_state(state):
+    """Copy the tensors of a (nested) state dictionary to the CPU, so that training can keep updating the originals."""
+    if isinstance(state, torch.Tensor):
+        return state.detach().to("cpu", copy=True)
+    if isinstance(state, dict):
+        return type(state)((key, snapshot_state(value)) for key, value in state.items())
+    if isinstance(state, (list, tuple)):
+        return type(state)(snapshot_state(value) for value in state)
+    return state
+
+
+class CheckpointWriter:
+    """Writer of the checkpoints with atomic writes, optional upload and a retention policy.
+
+    A checkpoint is first written to a temporary file next to its destination and then renamed, so an interrupted
+    write never leaves a truncated checkpoint behind. After the write, the checkpoint is passed to the upload function
+    of the save call (e.g. ``writer.save_model`` of the W&B and Neptune writers).
+
+    The retention policy only prunes the checkpoints written by this writer: it keeps the ``keep_last`` most recent
+    checkpoints and the checkpoints of the iterations that are multiples of ``keep_every``. Without ``keep_last``, all
+    the checkpoints are kept.
+
+    In asynchronous mode, :meth:`save` copies the state to the CPU and returns; serialization, upload and pruning happen
+    in a writer thread. At most ``max_pending`` checkpoints wait for the writer thread before :meth:`save` blocks.
+    """
+
+    def __init__(
+        self,
+        asynchronous: bool = False,
+        keep_last: int | None = None,
+        keep_every: int | None = None,
+        max_pending: int = 2,
+    ):
+        self.asynchronous = asynchronous
+        self.keep_last = keep_last
+        self.keep_every = keep_every
+        # (iteration, path) of the checkpoints written by this writer, oldest first
+        self.checkpoints = []
+
+        self._error = None
+        if self.asynchronous:
+            self.queue = queue.Queue(maxsize=max_pending)
+            self._thread = threading.Thread(target=self._run, name="checkpoint-writer", daemon=True)
+            self._thread.start()
+
+    def save(self, state: dict, path: str, iteration: int, upload: Callable[[str, int], None] | None = None):
+        """Write a checkpoint.
+
+        Args:
+            state: The state dictionaries to save.
+            path: Destination of the checkpoint.
+            iteration: Learning iteration of the checkpoint (used by the retention policy).
+            upload: Function called with the path and the iteration once the checkpoint is written.
+        """
+        if self._error is not None:
+            raise RuntimeError("The checkpoint writer thread failed.") from self._error
+        if self.asynchronous:
+            self.queue.put((snapshot_state(state), path, iteration, upload))
+        else:
+            self._write(state, path, iteration, upload)
+
+    def flush(self):
+        """Block until the pending checkpoints are written."""
+        if self.asynchronous:
+            self.queue.join()
+        if self._error is not None:
+            raise RuntimeError("The checkpoint writer thread failed.") from self._error
+
+    """
+    Private methods.
+    """
+
+    def _run(self):
+        while True:
+            item = self.queue.get()
+            try:
+                if self._error is None:
+                    self._write(*item)
+            except Exception as e:
+                # surfaced to the training thread by the next save or flush
+                self._error = e
+            finally:
+                self.queue.task_done()
+
+    def _write(self, state: dict, path: str, iteration: int, upload: Callable[[str, int], None] | None):
+        tmp_path = path + ".tmp"
+        torch.save(state, tmp_path)
+        os.replace(tmp_path, path)
+        if upload is not None:
+            upload(path, iteration)
+
+        self.checkpoints = [checkpoint for checkpoint in self.checkpoints if checkpoint[1] != path]
+        self.checkpoints.append((iteration, path))
+        self._prune()
+
+    def _prune(self):
+        if self.keep_last is None:
+            return
+        kept = []
+        for i, (iteration, path) in enumerate(self.checkpoints):
+            recent = i >= len(self.checkpoints) - self.keep_last
+            milestone = self.keep_every is not None and iteration % self.keep_every == 0
+            if recent or milestone:
+                kept.append((iteration, path))
+            elif os.path.exists(path):
+                os.remove(path)
+        self.checkpoints = kept
@@ -0,0 +1,202 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Helpers of the data-parallel (multi-process) training."""
+
+from __future__ import annotations
+
+import torch
+import torch.distributed as dist
+from collections.abc import Iterable
+from typing import Any
+
+
+def distributed_backend(device: str) -> str:
+    """Return the backend of the collectives between the processes training on the device.
+
+    The processes on GPUs communicate with NCCL and the processes on the CPU with gloo (also across several hosts).
+    """
+    device_type = torch.device(device).type
+    if device_type == "cuda":
+        return "nccl"
+    if device_type == "cpu":
+        return "gloo"
+    raise ValueError(f"Distributed training is not supported on the device '{device}'.")
+
+
+def broadcast_tensors(tensors: Iterable[torch.Tensor], src: int = 0):
+    """Overwrite the tensors with those of the source process.
+
+    The tensors are packed into one flat buffer per data type and device, so the broadcast takes one collective per
+    buffer and no serialization. All the processes must pass tensors of the same shapes in the same order (e.g. the
+    values of the state dictionaries of the same modules).
+    """
+    groups = {}
+    for tensor in tensors:
+        groups.setdefault((tensor.dtype, tensor.device), []).append(tensor.detach())
+    for group in groups.values():
+        buffer = torch.cat([tensor.reshape(-1) for tensor in group])
+        dist.broadcast(buffer, src=src)
+        offset = 0
+        for tensor in group:
+            numel = tensor.numel()
+            tensor.copy_(buffer[offset : offset + numel].view_as(tensor))
+            offset += numel
+
+
+def broadcast_state(state: Any, src: int = 0, device: str = "cpu") -> Any:
+    """Return the state of the source process, in all the processes.
+
+    The state is a nested structure of dictionaries, lists and tuples (e.g. state dictionaries of modules and
+    optimizers). Its structure and non-tensor values are serialized, and its tensors are received in buffers allocated
+    by the other processes, with one collective per data type (see :func:`broadcast_tensors`). The other processes do
+    not need a state of the same structure, so a process that joins the training can receive the whole state.
+
+    Args:
+        state: The state of the source process (ignored in the other processes).
+        src: The rank of the source process.
+        device: The device of the tensors in the collectives (the device of the process group backend). The tensors
+            of the returned state are on this device.
+    """
+    tensors = []
+
+    def strip(value):
+        # replace the tensors with their shape and data type
+        if isinstance(value, torch.Tensor):
+            tensors.append(value.to(device))
+            return ("tensor", tuple(value.shape), value.dtype)
+        if isinstance(value, dict):
+            return {key: strip(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(strip(item) for item in value)
+        return value
+
+    skeleton = [strip(state) if dist.get_rank() == src else None]
+    dist.broadcast_object_list(skeleton, src=src)
+
+    def fill(value):
+        # allocate the tensors of the receiving processes
+        if isinstance(value, tuple) and len(value) == 3 and value[0] == "tensor" and isinstance(value[2], torch.dtype):
+            tensors.append(torch.empty(value[1], dtype=value[2], device=device))
+            return tensors[-1]
+        if isinstance(value, dict):
+            return {key: fill(item) for key, item in value.items()}
+        if isinstance(value, (list, tuple)):
+            return type(value)(fill(item) for item in value)
+        return value
+
+    if dist.get_rank() != src:
+        state = fill(skeleton[0])
+    broadcast_tensors(tensors, src=src)
+    return state
+
+
+class GradientBucketReducer:
+    """Average of the gradients across the processes, overlapped with the backward pass.
+
+    The parameters are split into buckets of about ``bucket_cap_mb`` megabytes, in the reverse order of the parameters
+    (the order in which the backward pass roughly produces their gradients: the heads of the critic before the actor).
+    A hook on each parameter copies its gradient into the flat buffer of its bucket, and a bucket whose gradients are
+    all ready is averaged with an asynchronous all-reduce while the backward pass goes on. The buckets are reduced in
+    order, so all the processes issue the same collectives.
+
+    :meth:`start` arms the hooks before the backward passes. :meth:`finish` reduces the remaining buckets (those with
+    parameters without gradients, e.g. the history encoder in the PPO update), waits for the reductions and copies the
+    averaged gradients back. Parameters without gradients keep no gradient.
+    """
+
+    def __init__(self, parameters: Iterable[torch.Tensor], world_size: int, bucket_cap_mb: float = 0.5):
+        self.world_size = world_size
+        parameters = [param for param in {id(param): param for param in parameters}.values() if param.requires_grad]
+
+        # split the parameters into buckets (of a single data type and device)
+        bucket_cap = bucket_cap_mb * 2**20
+        self.buckets: list[list[torch.Tensor]] = []
+        bucket_size = 0
+        for param in reversed(parameters):
+            param_size = param.numel() * param.element_size()
+            if (
+                not self.buckets
+                or bucket_size + param_size > bucket_cap
+                or (param.dtype, param.device) != (self.buckets[-1][0].dtype, self.buckets[-1][0].device)
+            ):
+                self.buckets.append([])
+                bucket_size = 0
+            self.buckets[-1].append(param)
+            bucket_size += param_size
+
+        # flat buffers of the buckets and the slot (bucket, offset) of each parameter
+        self.buffers = []
+        self.slots = {}
+        for index, bucket in enumerate(self.buckets):
+            offset = 0
+            for param in bucket:
+                self.slots[id(param)] = (index, offset)
+                offset += param.numel()
+            self.buffers.append(torch.zeros(offset, dtype=bucket[0].dtype, device=bucket[0].device))
+
+        self.enabled = False
+        self._reset()
+        self.hooks = [param.register_post_accumulate_grad_hook(self._on_grad) for param in parameters]
+
+    def start(self):
+        """Arm the hooks for the next backward passes."""
+        self._reset()
+        self.enabled = True
+
+    def finish(self):
+        """Reduce the remaining buckets, wait for all the reductions and write the averaged gradients back."""
+        self.enabled = False
+        # all the processes run the same backward passes, so they miss the same gradients
+        while self.next_bucket < len(self.buckets):
+            self._launch(self.next_bucket)
+        for work in self.works:
+            work.wait()
+        for param in self.ready.values():
+            index, offset = self.slots[id(param)]
+            param.grad.copy_(self.buffers[index][offset : offset + param.numel()].view_as(param.grad))
+        self._reset()
+
+    def reset(self, world_size: int | None = None):
+        """Drop the gradients in flight (e.g. after a failed collective) and optionally change the world size."""
+        self.enabled = False
+        self._reset()
+        if world_size is not None:
+            self.world_size = world_size
+
+    def remove(self):
+        """Remove the hooks from the parameters."""
+        for hook in self.hooks:
+            hook.remove()
+        self.hooks = []
+
+    def _reset(self):
+        # parameters whose gradient is in the buffers, number of ready parameters per bucket and pending reductions
+        self.ready = {}
+        self.num_ready = [0] * len(self.buckets)
+        self.next_bucket = 0
+        self.works = []
+
+    def _on_grad(self, param: torch.Tensor):
+        if not self.enabled:
+            return
+        index, offset = self.slots[id(param)]
+        if index < self.next_bucket:
+            raise RuntimeError("A gradient was accumulated into a bucket that is already reduced.")
+        self.buffers[index][offset : offset + param.numel()].copy_(param.grad.reshape(-1))
+        if id(param) not in self.ready:
+            self.ready[id(param)] = param
+            self.num_ready[index] += 1
+        # launch the complete buckets in order
+        while self.next_bucket < len(self.buckets) and self.num_ready[self.next_bucket] == len(
+            self.buckets[self.next_bucket]
+        ):
+            self._launch(self.next_bucket)
+
+    def _launch(self, index: int):
+        buffer = self.buffers[index]
+        buffer.div_(self.world_size)
+        self.works.append(dist.all_reduce(buffer, op=dist.ReduceOp.SUM, async_op=True))
+        self.next_bucket = index + 1
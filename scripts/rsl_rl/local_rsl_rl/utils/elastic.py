@@ -0,0 +1,165 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Membership of the elastic data-parallel training."""
+
+from __future__ import annotations
+
+import os
+import socket
+import time
+import torch
+import torch.distributed as dist
+import uuid
+from datetime import timedelta
+
+
+class ElasticGroup:
+    """Process group of an elastic data-parallel training, re-formed between iterations when processes join or leave.
+
+    The processes meet in a c10d key-value store hosted by the coordinator, which is always the rank 0 of the group
+    (and the source of the training state). The other processes are workers: a worker registers in the store and
+    waits until the coordinator admits it, which happens at the start of an iteration (:meth:`sync`). A worker can
+    leave at any time: the collectives of the other processes then fail (after ``timeout`` at most) and all of them
+    call :meth:`recover`, which re-forms the group with the processes that are still alive (and the waiting workers).
+
+    Each membership change creates a new generation of the process group, whose ranks are assigned by the
+    coordinator. The coordinator must stay alive during the whole training.
+    """
+
+    def __init__(
+        self,
+        host: str,
+        port: int,
+        is_coordinator: bool,
+        backend: str,
+        device: str,
+        timeout: float = 30.0,
+        join_timeout: float = 3600.0,
+    ):
+        self.is_coordinator = is_coordinator
+        self.backend = backend
+        self.device = device
+        self.timeout = timeout
+        self.join_timeout = join_timeout
+        self.worker_id = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self.store = dist.TCPStore(
+            host, port, is_master=is_coordinator, timeout=timedelta(seconds=join_timeout), wait_for_workers=False
+        )
+
+        # generation, rank and world size of the current process group (-1 before joining)
+        self.generation = -1
+        self.rank = 0 if is_coordinator else -1
+        self.world_size = 1
+        # number of assignments received by this process
+        self.num_assignments = 0
+        # whether the process joined since the start of the last iteration (it then receives the training state
+        # before its first iteration, in the same iteration as the members that admitted it)
+        self.joined = False
+        # whether the training state must be broadcast at the next sync (after joining or a recovery)
+        self.state_pending = False
+        # -- coordinator: worker ids of the members (rank order), assignments per member and processed join requests
+        self.members = [self.worker_id]
+        self.assignment_counts = {}
+        self.num_joins = 0
+
+    def join(self):
+        """Form the first group (coordinator) or wait to be admitted to the group (worker).
+
+        The training state is broadcast at the next :meth:`sync`, before the first iteration of the process.
+        """
+        if self.is_coordinator:
+            self._assign(num_lost=0)
+        else:
+            index = self.store.add("num_joins", 1)
+            self.store.set(f"join/{index}", self.worker_id)
+            self._wait_assignment(self.join_timeout)
+        self.joined = True
+        self.state_pending = True
+
+    def sync(self) -> bool:
+        """Admit the waiting workers at the start of an iteration (and after :meth:`join` or :meth:`recover`).
+
+        Returns:
+            Whether the group was re-formed (the training state must then be broadcast from the coordinator).
+        """
+        if self.state_pending:
+            self.state_pending = False
+            return True
+        if self.joined:
+            # the members that admitted this process already synchronized in their current iteration
+            self.joined = False
+            return False
+        pending = torch.zeros(1, device=self.device)
+        if self.is_coordinator:
+            pending[0] = float(self.store.add("num_joins", 0) > self.num_joins)
+        dist.broadcast(pending, src=0)
+        if pending.item() == 0:
+            return False
+        if self.is_coordinator:
+            self._assign(num_lost=0)
+        else:
+            self._wait_assignment(self.timeout)
+        return True
+
+    def recover(self) -> int:
+        """Re-form the group with the processes that are alive after a failed collective.
+
+        The training state is broadcast at the next :meth:`sync`.
+
+        Returns:
+            The number of processes that left the group.
+        """
+        failed_generation = self.generation
+        self.state_pending = True
+        if self.is_coordinator:
+            # the workers announce themselves after their own collectives failed (after the timeout at most)
+            workers = self.members[1:]
+            deadline = time.monotonic() + 2.0 * self.timeout
+            while time.monotonic() < deadline:
+                alive = [worker for worker in workers if self.store.check([f"alive/{failed_generation}/{worker}"])]
+                if len(alive) == len(workers):
+                    break
+                time.sleep(0.1)
+            self.members = [self.worker_id] + alive
+            return self._assign(num_lost=len(workers) - len(alive))
+        self.store.set(f"alive/{failed_generation}/{self.worker_id}", "1")
+        return self._wait_assignment(3.0 * self.timeout)
+
+    """
+    Helper functions.
+    """
+
+    def _assign(self, num_lost: int) -> int:
+        # admit the waiting workers and publish the ranks of the new generation
+        num_joins = self.store.add("num_joins", 0)
+        for index in range(self.num_joins + 1, num_joins + 1):
+            self.members.append(self.store.get(f"join/{index}").decode())
+        self.num_joins = num_joins
+        generation = self.generation + 1
+        for rank, member in enumerate(self.members):
+            count = self.assignment_counts.get(member, 0)
+            self.assignment_counts[member] = count + 1
+            self.store.set(f"assignment/{member}/{count}", f"{generation},{rank},{len(self.members)},{num_lost}")
+        return self._wait_assignment(self.timeout)
+
+    def _wait_assignment(self, timeout: float) -> int:
+        key = f"assignment/{self.worker_id}/{self.num_assignments}"
+        self.store.wait([key], timedelta(seconds=timeout))
+        self.num_assignments += 1
+        generation, rank, world_size, num_lost = (int(value) for value in self.store.get(key).decode().split(","))
+
+        # new process group of the generation
+        if dist.is_initialized():
+            dist.destroy_process_group()
+        self.generation, self.rank, self.world_size = generation, rank, world_size
+        dist.init_process_group(
+            backend=self.backend,
+            store=dist.PrefixStore(f"generation/{generation}", self.store),
+            rank=rank,
+            world_size=world_size,
+            timeout=timedelta(seconds=self.timeout),
+        )
+        return num_lost
@@ -0,0 +1,65 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Device-side bookkeeping of the completed episodes."""
+
+from __future__ import annotations
+
+import torch
+
+
+class EpisodeStatistics:
+    """Running sums of the current episodes and ring buffers of the last completed episodes.
+
+    The statistics replace the per-step ``nonzero`` and host copies of the deques used for logging: the completed
+    episodes are written with a scatter into fixed-size ring buffers that stay on the device, and the buffers are
+    copied to the host once per iteration by :meth:`completed`.
+
+    The ring buffers hold the last ``capacity`` completed episodes, like a ``deque(maxlen=capacity)`` extended with the
+    completed environments in index order.
+    """
+
+    def __init__(self, num_envs: int, keys: list[str], capacity: int = 100, device: str = "cpu"):
+        self.num_envs = num_envs
+        self.keys = keys
+        self.capacity = capacity
+        self.device = device
+
+        self.current = {key: torch.zeros(num_envs, device=device) for key in keys}
+        # the last slot collects the writes of the environments that are not done
+        self.buffers = torch.zeros(len(keys), capacity + 1, device=device)
+        self.num_completed = torch.zeros((), dtype=torch.long, device=device)
+
+    def add(self, dones: torch.Tensor, **values: torch.Tensor | float):
+        """Accumulate the values of a step and record the episodes that ended at this step.
+
+        Args:
+            dones: Environments that are done at this step. Shape: (num_envs,)
+            values: Increment of each key (tensors of shape (num_envs,) or scalars). Missing keys are not incremented.
+        """
+        for key, value in values.items():
+            self.current[key] += value
+
+        done = (dones > 0).view(-1)
+        done_long = done.long()
+        # position of each completed episode in the stream of completed episodes
+        position = self.num_completed + torch.cumsum(done_long, dim=0) - 1
+        num_done = done_long.sum()
+        # only the last `capacity` episodes of the step fit in the ring buffer
+        keep = done & (position >= self.num_completed + num_done - self.capacity)
+        slots = torch.where(keep, position % self.capacity, self.capacity)
+
+        current = torch.stack([self.current[key] for key in self.keys])
+        self.buffers.scatter_(1, slots.unsqueeze(0).expand_as(current), current)
+        self.num_completed += num_done
+        current.masked_fill_(done, 0.0)
+        for i, key in enumerate(self.keys):
+            self.current[key].copy_(current[i])
+
+    def completed(self) -> dict[str, list[float]]:
+        """Values of the last completed episodes (at most ``capacity``) of each key."""
+        buffers = self.buffers[:, : self.capacity].cpu()
+        num_completed = min(int(self.num_completed), self.capacity)
+        return {key: buffers[i, :num_completed].tolist() for i, key in enumerate(self.keys)}
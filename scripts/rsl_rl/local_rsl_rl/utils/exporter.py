@@ -0,0 +1,233 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Export of the policy (with its observation reorder and normalizer) as TorchScript and ONNX artifacts."""
+
+from __future__ import annotations
+
+import copy
+import hashlib
+import importlib.util
+import json
+import os
+import torch
+import torch.nn as nn
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from local_rsl_rl.modules import ActorCritic
+    from local_rsl_rl.utils import ObservationReorder
+
+# version of the exported graph, part of the cache key of the artifacts
+EXPORT_VERSION = 1
+
+
+class ExportedPolicy(nn.Module):
+    """Inference of :meth:`ActorCritic.act_inference` with ``hist_encoding=True`` on the observations of the manager.
+
+    The module takes the observations as emitted by the observation manager (terms one after the other, each with its
+    own history) and returns the actions:
+
+    - the reorder to the newest-first frames of the policy (see :class:`ObservationReorder`) is a single gather, which
+      also drops the privileged terms (not used by the history encoder),
+    - the empirical normalizer is folded into the first linear layers that read the frames: the projection of the
+      history encoder (one projection per frame, since the statistics differ per frame) and the first layer of the
+      actor backbone (for the newest frame),
+    - the leg and arm heads are grouped (see :class:`GroupedMLP`).
+    """
+
+    def __init__(self, policy: ActorCritic, indices: torch.Tensor, normalizer: nn.Module | None = None):
+        """Build the graph from a copy of the parameters of the policy.
+
+        Args:
+            policy: The policy.
+            indices: Positions of the newest-first frames in the observations of the manager.
+                Shape: (num_hist * num_prop,)
+            normalizer: The empirical normalizer of the reordered observations (an identity is ignored).
+
+        Raises:
+            ValueError: When the number of indices does not match the history of the policy.
+        """
+        from local_rsl_rl.networks import GroupedMLP
+
+        super().__init__()
+        actor = policy.actor
+        self.num_hist = actor.num_hist
+        self.num_prop = actor.num_prop
+        num_frames = self.num_hist * self.num_prop
+        if indices.numel() < num_frames:
+            raise ValueError(f"The reorder has {indices.numel()} values, expected at least {num_frames} (the frames).")
+        self.register_buffer("indices", indices[:num_frames].detach().clone().cpu())
+
+        # normalization of the frames: x_n = (x - mean) * scale
+        device = next(policy.parameters()).device
+        mean = torch.zeros(num_frames, device=device)
+        scale = torch.ones(num_frames, device=device)
+        if normalizer is not None and hasattr(normalizer, "_mean"):
+            mean = normalizer._mean.flatten()[:num_frames]
+            scale = 1.0 / (normalizer._std.flatten()[:num_frames] + normalizer.eps)
+        mean = mean.view(self.num_hist, self.num_prop)
+        scale = scale.view(self.num_hist, self.num_prop)
+
+        # projection of the history encoder with the normalizer of each frame folded in: (num_hist, num_prop, C)
+        encoder = actor.history_encoder
+        projection = encoder.encoder[0]
+        frame_weights = projection.weight.detach().unsqueeze(0) * scale.unsqueeze(1)
+        frame_biases = projection.bias.detach() - (frame_weights @ mean.unsqueeze(-1)).squeeze(-1)
+        self.register_buffer("frame_weights", frame_weights.transpose(1, 2).contiguous())
+        self.register_buffer("frame_biases", frame_biases.unsqueeze(1).contiguous())
+        self.projection_activation = copy.deepcopy(encoder.encoder[1])
+        self.conv_layers = copy.deepcopy(encoder.conv_layers)
+        self.linear_output = copy.deepcopy(encoder.linear_output)
+
+        # the newest frame is the first input of the backbone (or of the heads without backbone)
+        self.backbone = copy.deepcopy(actor.actor_backbone)
+        if actor.grouped_heads:
+            self.heads = copy.deepcopy(actor.control_heads)
+        else:
+            self.heads = GroupedMLP.from_sequentials([actor.actor_leg_control_head, actor.actor_arm_control_head])
+        first_layer = self.backbone[0] if isinstance(self.backbone, nn.Sequential) else None
+        with torch.no_grad():
+            if isinstance(first_layer, nn.Linear):
+                _fold_normalization(first_layer.weight, first_layer.bias, mean[0], scale[0])
+            else:
+                _fold_normalization(self.heads.weights[0], self.heads.biases[0], mean[0], scale[0])
+        self.requires_grad_(False)
+
+    def forward(self, obs: torch.Tensor) -> torch.Tensor:
+        """Compute the actions. Shape: (batch_size, num_obs) -> (batch_size, num_actions)"""
+        frames = torch.index_select(obs, 1, self.indices).view(-1, self.num_hist, self.num_prop)
+        # projection of all the frames as one batched product over the frames: (num_hist, batch_size, C)
+        projection = torch.baddbmm(self.frame_biases, frames.transpose(0, 1), self.frame_weights)
+        projection = self.projection_activation(projection)
+        latent = self.linear_output(self.conv_layers(projection.permute(1, 2, 0)))
+        backbone_output = self.backbone(torch.cat([frames[:, 0], latent], dim=1))
+        return self.heads(backbone_output)
+
+
+def export_policy(
+    policy: ActorCritic,
+    obs_reorder: ObservationReorder,
+    path: str,
+    normalizer: nn.Module | None = None,
+    checkpoint_path: str | None = None,
+    filename: str = "policy",
+    export_onnx: bool = True,
+    num_samples: int = 64,
+    atol: float = 1e-4,
+    rtol: float = 1e-4,
+) -> dict[str, str]:
+    """Export the policy as TorchScript (``{filename}.pt``) and ONNX (``{filename}.onnx``) artifacts.
+
+    The artifacts compute the actions of :meth:`ActorCritic.act_inference` with ``hist_encoding=True`` from the
+    observations of the observation manager (see :class:`ExportedPolicy`). Before they are kept, their actions are
+    compared with the ones of the policy on random observations (the ONNX artifact is only checked if ``onnxruntime``
+    is installed, and only exported if ``onnx`` is installed).
+
+    With a checkpoint, the artifacts are cached: the hash of the checkpoint and of the reorder is written to
+    ``{filename}.json`` and the export is skipped while they match.
+
+    Args:
+        policy: The policy.
+        obs_reorder: The reorder of the observations of the manager to the layout of the policy.
+        path: The directory of the artifacts.
+        normalizer: The empirical normalizer of the reordered observations (an identity is ignored).
+        checkpoint_path: The checkpoint of the policy (the key of the cache). Defaults to None (always exported).
+        filename: The name of the artifacts, without extension.
+        export_onnx: Whether to export the ONNX artifact.
+        num_samples: Number of random observations of the equivalence check.
+        atol: Absolute tolerance of the equivalence check.
+        rtol: Relative tolerance of the equivalence check.
+
+    Returns:
+        The paths of the artifacts, by format ("jit" and "onnx").
+
+    Raises:
+        RuntimeError: When the actions of an artifact differ from the ones of the policy.
+    """
+    os.makedirs(path, exist_ok=True)
+    paths = {"jit": os.path.join(path, f"{filename}.pt")}
+    if export_onnx:
+        if importlib.util.find_spec("onnx") is None:
+            print("[INFO] onnx is not installed, the policy is only exported as TorchScript.")
+        else:
+            paths["onnx"] = os.path.join(path, f"{filename}.onnx")
+
+    # cache key: checkpoint, layout of the observations and exported formats
+    metadata_path = os.path.join(path, f"{filename}.json")
+    key = None
+    if checkpoint_path is not None:
+        digest = hashlib.sha256()
+        with open(checkpoint_path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        digest.update(obs_reorder.indices.cpu().numpy().tobytes())
+        digest.update(f"{EXPORT_VERSION}:{obs_reorder.num_obs}:{sorted(paths)}".encode())
+        key = digest.hexdigest()
+        if os.path.isfile(metadata_path) and all(os.path.isfile(p) for p in paths.values()):
+            with open(metadata_path) as f:
+                if json.load(f).get("key") == key:
+                    print(f"[INFO] The exported policy is up to date: {path}")
+                    return paths
+
+    exported = ExportedPolicy(policy, obs_reorder.indices, normalizer).cpu().eval()
+    # random observations of the manager and the actions of the policy on them
+    generator = torch.Generator().manual_seed(0)
+    obs = torch.randn(num_samples, obs_reorder.num_obs, generator=generator)
+    with torch.inference_mode():
+        frames = obs[:, exported.indices.cpu()].to(next(policy.parameters()).device)
+        if normalizer is not None and hasattr(normalizer, "_mean"):
+            num_frames = frames.shape[1]
+            frames = (frames - normalizer._mean[:, :num_frames]) / (normalizer._std[:, :num_frames] + normalizer.eps)
+        expected = policy.act_inference(frames, hist_encoding=True).cpu()
+
+    # TorchScript: the graph is traced (the batch size stays dynamic)
+    traced = torch.jit.trace(exported, obs[:1])
+    traced.save(paths["jit"])
+    errors = {"jit": _check_actions(torch.jit.load(paths["jit"])(obs), expected, atol, rtol, "TorchScript")}
+
+    if "onnx" in paths:
+        torch.onnx.export(
+            exported,
+            (obs[:1],),
+            paths["onnx"],
+            dynamo=False,
+            opset_version=17,
+            input_names=["obs"],
+            output_names=["actions"],
+            dynamic_axes={"obs": {0: "batch"}, "actions": {0: "batch"}},
+        )
+        if importlib.util.find_spec("onnxruntime") is not None:
+            import onnxruntime
+
+            session = onnxruntime.InferenceSession(paths["onnx"], providers=["CPUExecutionProvider"])
+            actions = torch.from_numpy(session.run(None, {"obs": obs.numpy()})[0])
+            errors["onnx"] = _check_actions(actions, expected, atol, rtol, "ONNX")
+
+    with open(metadata_path, "w") as f:
+        json.dump({"key": key, "checkpoint": checkpoint_path, "max_abs_error": errors}, f, indent=2)
+    print(f"[INFO] Exported the policy to: {', '.join(paths.values())}")
+    return paths
+
+
+"""
+Helper functions.
+"""
+
+
+def _fold_normalization(weight: torch.Tensor, bias: torch.Tensor, mean: torch.Tensor, scale: torch.Tensor):
+    """Fold the normalization of the first inputs of a (stacked) linear layer into its weight and bias (in place)."""
+    num_inputs = mean.numel()
+    folded = weight[..., :num_inputs] * scale
+    bias -= (folded @ mean.unsqueeze(-1)).squeeze(-1)
+    weight[..., :num_inputs] = folded
+
+
+def _check_actions(actions: torch.Tensor, expected: torch.Tensor, atol: float, rtol: float, name: str) -> float:
+    """Return the largest difference of the actions of an artifact to the ones of the policy."""
+    error = (actions - expected).abs()
+    if not torch.all(error <= atol + rtol * expected.abs()):
+        raise RuntimeError(f"The {name} policy differs from the policy (max abs error: {error.max().item():.3e}).")
+    return error.max().item()
@@ -0,0 +1,164 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Writers of the training metrics."""
+
+from __future__ import annotations
+
+import json
+import os
+import queue
+import threading
+import time
+import torch
+from collections.abc import Callable
+
+
+class JsonlSummaryWriter:
+    """Summary writer that appends the scalars to a local JSON Lines file (``metrics.jsonl`` in the log directory)."""
+
+    def __init__(self, log_dir: str, flush_secs: int = 10):
+        os.makedirs(log_dir, exist_ok=True)
+        self.path = os.path.join(log_dir, "metrics.jsonl")
+        self.flush_secs = flush_secs
+        self.file = open(self.path, "a")
+        self.last_flush = time.time()
+
+    def add_scalar(self, tag, scalar_value, global_step=None, walltime=None, new_style=False):
+        walltime = time.time() if walltime is None else walltime
+        record = {"tag": tag, "value": float(scalar_value), "step": global_step, "walltime": walltime}
+        self.file.write(json.dumps(record) + "\n")
+        if walltime - self.last_flush > self.flush_secs:
+            self.flush()
+
+    def flush(self):
+        self.file.flush()
+        self.last_flush = time.time()
+
+    def close(self):
+        self.file.close()
+
+
+class AsyncMetricsWriter:
+    """Writer that moves the calls to a summary writer to a background thread.
+
+    The training thread collects the scalars and console messages of an iteration into a record with
+    :meth:`add_scalar` and :meth:`print`, and pushes it to a bounded queue with :meth:`commit`. The writer thread
+    converts the values to floats (tensors are synchronized there, not in the training loop), fans them out to the
+    wrapped writer (TensorBoard, W&B, Neptune or JSON Lines) and flushes it once per batch of records.
+
+    If the writer thread falls behind, the oldest record in the queue is dropped to keep the training loop from
+    blocking. :meth:`close` writes all the queued records before returning.
+    """
+
+    def __init__(self, writer, max_queue_size: int = 100, batch_size: int = 16):
+        """Start the writer thread.
+
+        Args:
+            writer: Summary writer receiving the scalars (``add_scalar``, and optionally ``flush``).
+            max_queue_size: Maximum number of records waiting to be written.
+            batch_size: Maximum number of records written between two flushes of the writer.
+        """
+        self.writer = writer
+        self.batch_size = batch_size
+        self.queue = queue.Queue(maxsize=max_queue_size)
+        self.num_dropped = 0
+
+        self._scalars = []
+        self._messages = []
+        self._error = None
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="metrics-writer", daemon=True)
+        self._thread.start()
+
+    def add_scalar(self, tag: str, scalar_value, global_step: int | None = None):
+        """Add a scalar to the current record. Tensors are converted in the writer thread."""
+        if isinstance(scalar_value, torch.Tensor):
+            scalar_value = scalar_value.detach()
+        self._scalars.append((tag, scalar_value, global_step, time.time()))
+
+    def print(self, message: str | Callable[[], str]):
+        """Add a console message to the current record. Callables are formatted in the writer thread."""
+        self._messages.append(message)
+
+    def commit(self):
+        """Push the current record to the writer thread, dropping the oldest queued record if the queue is full."""
+        if self._error is not None:
+            raise RuntimeError("The metrics writer thread failed.") from self._error
+        record = (self._scalars, self._messages)
+        self._scalars, self._messages = [], []
+        while True:
+            try:
+                self.queue.put_nowait(record)
+                return
+            except queue.Full:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.task_done()
+                    self.num_dropped += 1
+                except queue.Empty:
+                    pass
+
+    def flush(self):
+        """Block until the committed records are written."""
+        self.queue.join()
+        if hasattr(self.writer, "flush"):
+            self.writer.flush()
+
+    def close(self):
+        """Write the pending records and stop the writer thread."""
+        if self._closed:
+            return
+        if self._scalars or self._messages:
+            self.commit()
+        self.queue.put(None)
+        self._thread.join()
+        self._closed = True
+        if hasattr(self.writer, "flush"):
+            self.writer.flush()
+
+    def save_model(self, model_path, iter):
+        self.writer.save_model(model_path, iter)
+
+    def save_file(self, path, iter=None):
+        self.writer.save_file(path, iter)
+
+    """
+    Private methods.
+    """
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self.queue.get_nowait())
+                except queue.Empty:
+                    break
+            stop = False
+            for record in batch:
+                if record is None:
+                    stop = True
+                elif self._error is None:
+                    try:
+                        self._write(record)
+                    except Exception as e:
+                        # surfaced to the training thread by the next commit
+                        self._error = e
+            if hasattr(self.writer, "flush"):
+                self.writer.flush()
+            for _ in batch:
+                self.queue.task_done()
+            if stop:
+                return
+
+    def _write(self, record):
+        scalars, messages = record
+        for tag, value, global_step, walltime in scalars:
+            if isinstance(value, torch.Tensor):
+                value = value.item()
+            self.writer.add_scalar(tag, value, global_step=global_step, walltime=walltime)
+        for message in messages:
+            print(message() if callable(message) else message)
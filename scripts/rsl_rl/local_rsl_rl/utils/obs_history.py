@@ -0,0 +1,178 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""History reconstruction and reordering of the proprioceptive frames of the policy observations."""
+
+from __future__ import annotations
+
+import torch
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from local_rsl_rl.modules import EmpiricalNormalization
+
+
+class ObservationHistory:
+    """Per-environment ring buffer of proprioceptive frames.
+
+    The environment emits observations of the form ``[frame, extra]`` where ``frame`` is the newest proprioceptive
+    frame (``num_prop`` values, terms in configuration order) and ``extra`` are the non-historical (privileged) terms.
+    The buffer rebuilds the observations the policy expects, i.e. the layout produced by
+    :meth:`OnPolicyRunner.change_obs_order`::
+
+        [frame_t, frame_t-1, ..., frame_t-num_hist+1, extra]
+
+    Like the history buffers of the observation manager, the history of an environment is filled with its first frame
+    after a reset.
+
+    The ring is stored twice along the time axis, so the window of the last ``num_hist`` frames (newest first) is
+    always a strided view of the buffer.
+    """
+
+    def __init__(self, num_envs: int, num_hist: int, num_prop: int, device: str = "cpu"):
+        self.num_envs = num_envs
+        self.num_hist = num_hist
+        self.num_prop = num_prop
+        self.device = device
+
+        self.buffer = torch.zeros(num_envs, 2 * num_hist, num_prop, device=device)
+        # position of the newest frame in the first half of the buffer
+        self.pointer = 0
+
+    @property
+    def window(self) -> torch.Tensor:
+        """History of the last frames, newest first. Shape: (num_envs, num_hist, num_prop)"""
+        return self.buffer[:, self.pointer : self.pointer + self.num_hist]
+
+    def reset(self, obs: torch.Tensor) -> torch.Tensor:
+        """Fill the history of all the environments with their current frame and return the full observations."""
+        self.pointer = 0
+        self.buffer.copy_(obs[:, : self.num_prop].unsqueeze(1).expand_as(self.buffer))
+        return self.compose(obs)
+
+    def append(self, obs: torch.Tensor, dones: torch.Tensor | None = None) -> torch.Tensor:
+        """Push the newest frames and return the full observations.
+
+        Args:
+            obs: Single-frame observations. Shape: (num_envs, num_prop + num_extra)
+            dones: Environments that were reset at this step (their history is filled with the new frame).
+                Shape: (num_envs,)
+        """
+        frames = obs[:, : self.num_prop]
+        self.pointer = (self.pointer - 1) % self.num_hist
+        self.buffer[:, self.pointer] = frames
+        self.buffer[:, self.pointer + self.num_hist] = frames
+        if dones is not None:
+            # avoid a host synchronization by selecting instead of indexing the reset environments
+            reset = dones.view(-1, 1, 1).bool()
+            torch.where(reset, frames.unsqueeze(1), self.buffer, out=self.buffer)
+        return self.compose(obs)
+
+    def compose(self, obs: torch.Tensor) -> torch.Tensor:
+        """Concatenate the history window with the non-historical terms of the single-frame observations."""
+        return torch.cat([self.window.flatten(1), obs[:, self.num_prop :]], dim=-1)
+
+
+class ObservationReorder:
+    """Gather that brings history observations of the observation manager to the newest-first frame layout.
+
+    The observation manager concatenates the terms one after the other, each with its own history (oldest frame
+    first). The policy expects the frames one after the other instead, newest first, followed by the non-historical
+    (privileged) terms::
+
+        [frame_t, frame_t-1, ..., frame_t-num_hist+1, extra]
+
+    The permutation is built once from the term layout and applied with a single :func:`torch.index_select` into
+    preallocated output buffers. The output buffers alternate between calls, so the returned observations stay valid
+    until the next call but one (the runner stores the observations of a step after computing the next ones).
+
+    An empirical normalizer can be fused into the gather, in which case the observations are normalized in place.
+    """
+
+    def __init__(
+        self,
+        term_names: list[str],
+        term_lengths: list[int],
+        num_envs: int,
+        num_hist: int,
+        num_prop: int,
+        num_obs: int | None = None,
+        keep_extra: bool = True,
+        normalizer: EmpiricalNormalization | None = None,
+        device: str = "cpu",
+    ):
+        """Build the permutation of the observations.
+
+        Args:
+            term_names: Names of the observation terms in the order of the observation manager.
+            term_lengths: Number of values of each term (all the frames of its history).
+            num_envs: Number of environments.
+            num_hist: Number of frames in the history of the proprioceptive terms.
+            num_prop: Number of values of one proprioceptive frame.
+            num_obs: Number of values of the observations. Defaults to the sum of the term lengths.
+            keep_extra: Whether to append the non-historical terms (``obs[:, num_prop * num_hist:]``) to the frames.
+            normalizer: Empirical normalizer applied to the reordered observations.
+            device: Device of the permutation and output buffers.
+        """
+        self.num_envs = num_envs
+        self.num_hist = num_hist
+        self.num_prop = num_prop
+        self.num_obs = sum(term_lengths) if num_obs is None else num_obs
+        self.normalizer = normalizer
+        self.device = device
+
+        # newest frame of each proprioceptive term (the privileged terms come after the history)
+        newest_frames = []
+        offset = 0
+        for name, length in zip(term_names, term_lengths):
+            if not name.startswith("policy-priv_"):
+                frame_length = length // num_hist
+                newest_frames.append(torch.arange(offset + length - frame_length, offset + length))
+            offset += length
+        newest_frame = torch.cat(newest_frames)
+        if newest_frame.numel() != num_prop:
+            raise ValueError(
+                f"The proprioceptive terms have {newest_frame.numel()} values per frame, expected {num_prop}."
+            )
+        frame_lengths = torch.cat([torch.full((len(frame),), len(frame)) for frame in newest_frames])
+
+        # frame i back in time of each term is i frames of that term before its newest frame
+        frames = [newest_frame - i * frame_lengths for i in range(num_hist)]
+        if keep_extra:
+            frames.append(torch.arange(num_prop * num_hist, self.num_obs))
+        self.indices = torch.cat(frames).to(device)
+
+        self.buffers = [torch.empty(num_envs, self.indices.numel(), device=device) for _ in range(2)]
+        self.buffer_id = 0
+
+    @classmethod
+    def from_env(cls, env, **kwargs) -> ObservationReorder:
+        """Build the permutation from the observation terms of an environment wrapped with ``RslRlVecEnvWrapper``."""
+        term_names, term_lengths = env.get_obs_list_length()
+        kwargs.setdefault("device", env.device)
+        return cls(term_names, term_lengths, env.num_envs, env.num_history, env.num_prop, **kwargs)
+
+    @property
+    def num_output(self) -> int:
+        """Number of values of the reordered observations."""
+        return self.indices.numel()
+
+    def __call__(self, obs: torch.Tensor) -> torch.Tensor:
+        """Reorder (and normalize) the observations.
+
+        Args:
+            obs: Observations of the observation manager. Shape: (num_envs, num_obs)
+
+        Returns:
+            The reordered observations. Shape: (num_envs, num_output)
+        """
+        out = self.buffers[self.buffer_id]
+        self.buffer_id ^= 1
+        torch.index_select(obs.to(self.device), 1, self.indices, out=out)
+        if self.normalizer is not None:
+            if self.normalizer.training:
+                self.normalizer.update(out)
+            out.sub_(self.normalizer._mean).div_(self.normalizer._std + self.normalizer.eps)
+        return out
@@ -0,0 +1,167 @@
+# Copyright (c) 2021-2025, ETH Zurich and NVIDIA CORPORATION
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Timing of the phases of the training loop."""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+import torch
+from collections.abc import Iterable, Iterator
+from contextlib import contextmanager
+
+
+class PhaseTimer:
+    """Named timers around the phases of the training loop, aggregated per iteration.
+
+    A phase is timed between :meth:`start` and :meth:`stop` (or with the :meth:`phase` context manager). On CUDA
+    devices, the phases are timed with CUDA events, so timing does not synchronize the device; the events are resolved
+    once per iteration by :meth:`end_iteration`. On the CPU, the phases are timed with :func:`time.perf_counter_ns`.
+    The phases can be timed from several threads (e.g. the update worker of the pipelined mode).
+
+    The spans of the iterations in ``trace_window`` are also written to ``trace_path`` in the Chrome trace format
+    (viewable in ``chrome://tracing`` and Perfetto).
+
+    A disabled timer only costs a function call and an attribute check per phase.
+    """
+
+    def __init__(
+        self,
+        device: str = "cpu",
+        enabled: bool = True,
+        trace_path: str | None = None,
+        trace_window: tuple[int, int] | list[int] | None = None,
+    ):
+        """Initialize the timer.
+
+        Args:
+            device: Device of the timed work. CUDA events are used on CUDA devices.
+            enabled: Whether the phases are timed.
+            trace_path: Path of the Chrome trace. Defaults to None (no trace).
+            trace_window: First and last iteration (inclusive) of the trace.
+        """
+        self.enabled = enabled
+        self.use_cuda_events = torch.device(device).type == "cuda"
+        self.trace_path = trace_path
+        self.trace_window = tuple(trace_window) if trace_window is not None and trace_path is not None else None
+
+        self.lock = threading.Lock()
+        # start of the running phases, per thread and name
+        self.running = {}
+        # (name, thread id, start, end) of the phases completed in the current iteration
+        self.spans = []
+        self.trace_events = []
+        self.origin_ns = time.perf_counter_ns()
+        self._anchor()
+
+    def start(self, name: str):
+        """Start timing a phase."""
+        if not self.enabled:
+            return
+        self.running[(threading.get_ident(), name)] = self._now()
+
+    def stop(self, name: str):
+        """Stop timing a phase."""
+        if not self.enabled:
+            return
+        end = self._now()
+        thread_id = threading.get_ident()
+        start = self.running.pop((thread_id, name))
+        with self.lock:
+            self.spans.append((name, thread_id, start, end))
+
+    @contextmanager
+    def phase(self, name: str):
+        """Time the enclosed block as a phase."""
+        self.start(name)
+        try:
+            yield
+        finally:
+            self.stop(name)
+
+    def iterate(self, name: str, iterable: Iterable) -> Iterator:
+        """Iterate over an iterable, timing the production of each item (e.g. the mini-batches of a generator)."""
+        if not self.enabled:
+            yield from iterable
+            return
+        iterator = iter(iterable)
+        while True:
+            self.start(name)
+            try:
+                item = next(iterator)
+            except StopIteration:
+                self.stop(name)
+                return
+            self.stop(name)
+            yield item
+
+    def end_iteration(self, iteration: int) -> dict[str, float]:
+        """Resolve the phases completed during the iteration.
+
+        Returns:
+            The total time of each phase during the iteration in milliseconds.
+        """
+        if not self.enabled:
+            return {}
+        with self.lock:
+            spans, self.spans = self.spans, []
+        if self.use_cuda_events:
+            torch.cuda.synchronize()
+
+        totals = {}
+        trace = self.trace_window is not None and self.trace_window[0] <= iteration <= self.trace_window[1]
+        for name, thread_id, start, end in spans:
+            start_us, end_us = self._to_us(start), self._to_us(end)
+            totals[name] = totals.get(name, 0.0) + (end_us - start_us) * 1e-3
+            if trace:
+                self.trace_events.append({
+                    "name": name,
+                    "ph": "X",
+                    "ts": start_us,
+                    "dur": end_us - start_us,
+                    "pid": os.getpid(),
+                    "tid": thread_id,
+                    "args": {"iteration": iteration},
+                })
+        if trace and iteration == self.trace_window[1]:
+            self.write_trace()
+        self._anchor()
+        return totals
+
+    def write_trace(self):
+        """Write the spans of the traced iterations to the trace file."""
+        if self.trace_path is None or not self.trace_events:
+            return
+        os.makedirs(os.path.dirname(os.path.abspath(self.trace_path)), exist_ok=True)
+        with open(self.trace_path, "w") as f:
+            json.dump({"traceEvents": self.trace_events, "displayTimeUnit": "ms"}, f)
+        self.trace_events = []
+
+    """
+    Private methods.
+    """
+
+    def _anchor(self):
+        # reference point of the CUDA events of the next iteration on the host clock
+        if self.enabled and self.use_cuda_events:
+            self.anchor_event = torch.cuda.Event(enable_timing=True)
+            self.anchor_event.record()
+            self.anchor_us = (time.perf_counter_ns() - self.origin_ns) * 1e-3
+
+    def _now(self):
+        if self.use_cuda_events:
+            event = torch.cuda.Event(enable_timing=True)
+            event.record()
+            return event
+        return time.perf_counter_ns()
+
+    def _to_us(self, stamp) -> float:
+        """Time of a stamp in microseconds since the creation of the timer."""
+        if self.use_cuda_events:
+            return self.anchor_us + self.anchor_event.elapsed_time(stamp) * 1e3
+        return (stamp - self.origin_ns) * 1e-3
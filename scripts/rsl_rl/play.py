@@ -33,6 +33,15 @@ parser.add_argument(
     help="Use the pre-trained checkpoint from Nucleus.",
 )
 parser.add_argument("--real-time", action="store_true", default=False, help="Run in real-time, if possible.")
+parser.add_argument(
+    "--streaming_history",
+    action="store_true",
+    default=False,
+    help=(
+        "Encode the history step by step from the newest frame (same actions, less compute per step). Not available"
+        " with the empirical normalization, whose statistics differ per frame of the history."
+    ),
+)
 # append RSL-RL cli arguments
 cli_args.add_rsl_rl_args(parser)
 # append AppLauncher cli args
@@ -57,7 +66,9 @@ import os
 import time
 import torch
 
+from local_rsl_rl.modules import StreamingHistoryEncoder
 from local_rsl_rl.runners import OnPolicyRunner
+from local_rsl_rl.utils import ObservationReorder, export_policy
 
 from isaaclab.envs import (
     DirectMARLEnv,
@@ -70,7 +81,6 @@ from isaaclab.utils.assets import retrieve_file_path
 from isaaclab.utils.dict import print_dict
 from isaaclab.utils.pretrained_checkpoint import get_published_pretrained_checkpoint
 
-from isaaclab_rl.rsl_rl import export_policy_as_jit  # onnx not avaliable
 
 #TODO:
 from local_rsl_rl.wrappers import RslRlVecEnvWrapper
@@ -79,104 +89,10 @@ from Go2Arm_Lab.tasks.manager_based.go2arm_lab.config.agents import Go2ArmRslRlO
 import isaaclab_tasks  # noqa: F401
 from isaaclab_tasks.utils import get_checkpoint_path
 from isaaclab_tasks.utils.hydra import hydra_task_config
-import numpy as np
 
 import Go2Arm_Lab.tasks  # noqa: F401
 
 
-def prepare_obs(env):
-    """
-        Modify the order of observations containing historical information for easier network reading. Try to avoid modifications if possible!
-
-        Args:
-            env: The environment
-            agent_cfg: Agent configuration
-
-        Returns:
-            total(num_history, num_prop): Indices of the modified observation order
-            obs_new(num_envs, num_prop * num_history): Modified observation order indices corresponding to the observations
-        Notes:
-            Try to avoid modifications if possible!
-
-        Example:
-            In env.step, the original observation follows right-to-left order, after modification it becomes left-to-right
-
-            For example, the original observation is:
-                obs = ang_vel(3) * 10(num_history) + joint_pos(18) * 10(num_history) + joint_vel(18) * 10(num_history)
-            After env.step, the observation (obs) becomes structured as follows:
-                obs_old = ang_vel_timestep_10 -> ang_vel_timestep_1, joint_pos_timestep_10 -> joint_pos_timestep_1, joint_vel_timestep_10 -> joint_vel_timestep_1
-            We need to modify the observation order to:
-                obs_new = ang_vel_timestep_1, joint_pos_timestep_1, joint_vel_timestep_1 -> ang_vel_timestep_10, joint_pos_timestep_10, joint_vel_timestep_10
-    """
-    total = np.zeros((env.num_history, env.num_prop)) 
-    obs_new = torch.zeros(env.num_envs, env.num_prop * env.num_history).to(env.device)
-    
-    lst, length = env.get_obs_list_length()
-    lst = [item for item in lst if not item.startswith("policy-priv_")]
-
-    result_dict = {}
-    for i in range(len(lst)):
-        c = np.array(list(range( sum(length[: i + 1 ]) - int(length[i] / env.num_history), sum(length[: i + 1]) )))
-        result_dict[lst[i]] = c
-
-    key_list = list(result_dict.keys())
-    a1_list = []
-    for i in range(env.num_history):
-        for j in range(len(lst)):
-            a1 = np.concatenate([
-                result_dict[key_list[j]] - (i) * result_dict[key_list[j]].shape[0]])
-            a1_list.append(a1)
-            if j == len(lst) - 1:
-                a1_list = np.concatenate(a1_list)
-                total[i, :] = a1_list
-                a1_list = []
-    return total, obs_new
-
-def change_obs_order(obs, obs_new, total, env):
-
-    """
-        Modify the order of observations containing historical information for easier network reading. Try to avoid modifications if possible!
-
-        Args:
-            obs(num_envs, num_prop * num_history): The input to the actor and critic network
-            obs_new(num_envs, num_prop * num_history): Modified observation order indices corresponding to the observations
-            total(num_history, num_prop): Indices of the modified observation order
-            env: The environment
-            agent_cfg: Agent configuration
-
-        Returns:
-            obs(num_envs, num_prop * num_history): The input to the actor and critic network
-            obs_new(num_envs, num_prop * num_history): Modified observation order indices corresponding to the observations(need to reset)
-
-        Notes:
-            Try to avoid modifications if possible!
-
-        Example:
-            In env.step, the original observation follows right-to-left order, after modification it becomes left-to-right
-
-            For example, the original observation is:
-                obs = ang_vel(3) * 10(num_history) + joint_pos(18) * 10(num_history) + joint_vel(18) * 10(num_history)
-            After env.step, the observation (obs) becomes structured as follows:
-                obs_old = ang_vel_timestep_10 -> ang_vel_timestep_1, joint_pos_timestep_10 -> joint_pos_timestep_1, joint_vel_timestep_10 -> joint_vel_timestep_1
-            We need to modify the observation order to:
-                obs_new = ang_vel_timestep_1, joint_pos_timestep_1, joint_vel_timestep_1 -> ang_vel_timestep_10, joint_pos_timestep_10, joint_vel_timestep_10
-    """
-    for i in range(10):
-        obs_1 = obs[:, total[i, :]].to(env.device)
-        obs_new = torch.cat([obs_new, obs_1], dim = -1)
-
-    # only prop obs:    
-    obs = obs_new[:, env.num_prop  * env.num_history:] 
-    
-    # prop and priv obs:
-    # obs = torch.cat([obs_new[:, env.num_prop  * env.num_history :], 
-    #                  obs[:, env.num_prop  * env.num_history :]], dim=-1)  
-    
-    obs_new = torch.zeros(env.num_envs, env.num_prop * env.num_history).to(env.device)
-    return obs, obs_new
-
-
-
 @hydra_task_config(args_cli.task, args_cli.agent)
 def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agent_cfg: Go2ArmRslRlOnPolicyRunnerCfg):
     """Play with RSL-RL agent."""
@@ -236,8 +152,8 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
     ppo_runner = OnPolicyRunner(env, agent_cfg.to_dict(), log_dir=None, device=agent_cfg.device)
     ppo_runner.load(resume_path)
 
-    # obtain the trained policy for inference
-    policy = ppo_runner.get_inference_policy(device=env.unwrapped.device)
+    # switch the trained policy to inference (the actions are computed with the network, see below)
+    ppo_runner.get_inference_policy(device=env.unwrapped.device)
 
     # extract the neural network module
     # we do this in a try-except to maintain backwards compatibility.
@@ -248,20 +164,30 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
         # version 2.2 and below
         policy_nn = ppo_runner.alg.actor_critic
 
-    # export policy to onnx/jit
+    # only prop obs: the policy is called with the history encoder and does not use the priv obs
+    obs_reorder = ObservationReorder.from_env(env, keep_extra=False)
+
+    # export policy to jit/onnx (the reorder and the normalizer are part of the exported graph)
     export_model_dir = os.path.join(os.path.dirname(resume_path), "exported")
-    export_policy_as_jit(policy_nn, ppo_runner.obs_normalizer, path=export_model_dir, filename="policy.pt")
-    
-    # onnx not avaliable
-    # export_policy_as_onnx(
-    #     policy_nn, normalizer=ppo_runner.obs_normalizer, path=export_model_dir, filename="policy.onnx"
-    # )
+    export_policy(
+        policy_nn, obs_reorder, export_model_dir, normalizer=ppo_runner.obs_normalizer, checkpoint_path=resume_path
+    )
 
     dt = env.unwrapped.step_dt
 
     # reset environment
     obs, _ = env.get_observations()
-    total, obs_new = prepare_obs(env)
+    # the policy acts on the normalized observations (the normalizer also covers the priv obs, which are dropped)
+    normalizer = ppo_runner.obs_normalizer if ppo_runner.empirical_normalization else None
+    num_frames = obs_reorder.num_output
+    # the streaming encoder only projects the newest frame of each step (the history of the others is cached)
+    history_encoder = None
+    if args_cli.streaming_history:
+        if normalizer is not None:
+            # each frame of the history is normalized with the statistics of its slot, while the streaming encoder
+            # keeps the encoding of a frame from the step it was the newest
+            raise ValueError("The streaming history is not available with the empirical normalization.")
+        history_encoder = StreamingHistoryEncoder(policy_nn.actor.history_encoder, env.num_envs)
     
     timestep = 0
     # simulate environment
@@ -270,11 +196,21 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
         # run everything in inference mode
         with torch.inference_mode():
             # agent stepping
-            obs, obs_new = change_obs_order(obs, obs_new, total, env)
-
-            actions = policy(obs,hist_encoding=True) #no priv obs
+            obs = obs_reorder(obs)
+            if normalizer is not None:
+                obs = (obs - normalizer._mean[:, :num_frames]) / (normalizer._std[:, :num_frames] + normalizer.eps)
+
+            if history_encoder is not None:
+                # the streaming encoder is fed the normalized newest frame, like the history encoder of the policy
+                latent = history_encoder(obs[:, : policy_nn.actor.num_prop])
+                actions = policy_nn.act_inference(obs, latent=latent)
+            else:
+                actions = policy_nn.act_inference(obs, hist_encoding=True)  # no priv obs
             # env stepping
-            obs, _, _, _,_ = env.step(actions)
+            obs, _, _, dones, _ = env.step(actions)
+            if history_encoder is not None:
+                # the observations of the reset environments start a new history
+                history_encoder.reset(dones)
         if args_cli.video:
             timestep += 1
             # Exit the play loop after recording one video
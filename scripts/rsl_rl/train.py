@@ -86,6 +86,7 @@ from isaaclab.envs import (
     ManagerBasedRLEnvCfg,
     multi_agent_to_single_agent,
 )
+from isaaclab.managers import ObservationTermCfg as ObsTerm
 from isaaclab.utils.dict import print_dict
 from isaaclab.utils.io import dump_yaml
 
@@ -123,13 +124,24 @@ def main(env_cfg: ManagerBasedRLEnvCfg | DirectRLEnvCfg | DirectMARLEnvCfg, agen
     env_cfg.seed = agent_cfg.seed
     env_cfg.sim.device = args_cli.device if args_cli.device is not None else env_cfg.sim.device
 
+    # single-frame observations: the runner rebuilds the history of the proprioceptive terms
+    if agent_cfg.obs_history_length is not None:
+        for term_name, term_cfg in vars(env_cfg.observations.policy).items():
+            if isinstance(term_cfg, ObsTerm) and not term_name.startswith("priv_"):
+                term_cfg.history_length = 0
+
     # multi-gpu training configuration
     if args_cli.distributed:
-        env_cfg.sim.device = f"cuda:{app_launcher.local_rank}"
-        agent_cfg.device = f"cuda:{app_launcher.local_rank}"
-
-        # set seed to have diversity in different threads
-        seed = agent_cfg.seed + app_launcher.local_rank
+        if args_cli.device == "cpu":
+            # processes on the CPU (gloo backend), possibly on several hosts
+            env_cfg.sim.device = "cpu"
+            agent_cfg.device = "cpu"
+        else:
+            env_cfg.sim.device = f"cuda:{app_launcher.local_rank}"
+            agent_cfg.device = f"cuda:{app_launcher.local_rank}"
+
+        # set seed to have diversity in different threads (the global rank is unique across hosts)
+        seed = agent_cfg.seed + app_launcher.global_rank
         env_cfg.seed = seed
         agent_cfg.seed = seed
 
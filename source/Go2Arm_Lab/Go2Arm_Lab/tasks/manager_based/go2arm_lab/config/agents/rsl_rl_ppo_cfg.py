@@ -32,6 +32,13 @@ class Go2ArmRslRlPpoActorCriticCfg(RslRlPpoActorCriticCfg):
 
     init_noise_std : float = MISSING
 
+    grouped_heads : bool = False
+    """Whether to evaluate the leg and arm heads of the actor (and of the critic) with one matrix product per layer.
+
+    The heads are stacked in a single module instead of two ``nn.Sequential``. Checkpoints of both layouts load into
+    either of them, but the optimizer state is only loaded for a checkpoint of the same layout.
+    """
+
 @configclass
 class Go2ArmRslRlPpoAlgorithmCfg(RslRlPpoAlgorithmCfg):
     dagger_update_freq : int = MISSING
@@ -46,6 +53,58 @@ class Go2ArmRslRlPpoAlgorithmCfg(RslRlPpoAlgorithmCfg):
     eps : float = MISSING
     """The epsilon value for numerical stability."""
 
+    packed_mini_batches : bool = False
+    """Whether to pack the rollout into a single block that is permuted once per epoch to build the mini-batches."""
+
+    vtrace_rho_clip : float = 1.0
+    """The truncation of the importance weights of the TD errors in the V-trace correction.
+
+    The correction is used by the pipelined mode and by the fused adaptation update.
+    """
+
+    vtrace_c_clip : float = 1.0
+    """The truncation of the importance weights of the traces in the V-trace correction.
+
+    The correction is used by the pipelined mode and by the fused adaptation update.
+    """
+
+    compile_update : bool = False
+    """Whether to compile the forward pass and the losses of the mini-batches with ``torch.compile``.
+
+    The loss is compiled for the shape of the first mini-batch, and mini-batches of other shapes use the eager loss.
+    Not available for recurrent policies.
+    """
+
+    compile_cache_dir : str | None = None
+    """The directory of the compilation caches, kept across restarts. Defaults to None (the default inductor cache)."""
+
+    sync_free_adaptive_lr : bool = False
+    """Whether to adapt the learning rate on the device, without reading the KL divergence of each mini-batch.
+
+    The learning rate is a tensor shared with the optimizer and is read once per update (for logging). The schedule
+    is the same as the default one. Only used with the "adaptive" schedule.
+    """
+
+    fused_adaptation_update : bool = False
+    """Whether to train the history encoder in every PPO update instead of in separate DAgger updates.
+
+    The history latent is regressed on the detached privileged latent of the actor pass of each mini-batch, and the
+    history encoder is only stepped by its own optimizer. The rollouts are still collected with the history latent
+    every :attr:`dagger_update_freq` iterations, but all the rollouts train the policy.
+
+    The rollouts collected with the history latent are off-policy for the update, which acts with the privileged
+    latent. Before their update, their action distributions, log-probabilities and values are re-evaluated with the
+    privileged latent, and their returns and advantages are corrected with V-trace (see :attr:`vtrace_rho_clip`
+    and :attr:`vtrace_c_clip`). Not available for recurrent policies.
+    """
+
+    grad_bucket_cap_mb : float = 0.5
+    """The size of the buckets of gradients averaged during the backward pass in multi-GPU training (in megabytes).
+
+    The buckets follow the reverse order of the parameters, so the gradients of the critic heads are reduced while the
+    backward pass goes through the actor.
+    """
+
 
 @configclass
 class Go2ArmRslRlOnPolicyRunnerCfg(RslRlOnPolicyRunnerCfg):
@@ -55,6 +114,103 @@ class Go2ArmRslRlOnPolicyRunnerCfg(RslRlOnPolicyRunnerCfg):
     algorithm: Go2ArmRslRlPpoAlgorithmCfg = MISSING
     """The algorithm configuration."""
 
+    storage_dtype: Literal["float32", "float16", "bfloat16"] = "float32"
+    """The precision of the observations, actions and action distribution parameters in the rollout storage.
+
+    Values, returns and advantages are always stored in float32. The reduced-precision buffers are upcast to float32
+    when the mini-batches are built. Note that float16 saturates at 65504, so "bfloat16" is the safer choice when the
+    observations are not normalized.
+    """
+
+    obs_history_length: int | None = None
+    """The length of the proprioceptive history rebuilt by the runner. Defaults to None (history from the environment).
+
+    If set, the history of the non-privileged policy terms is removed from the environment configuration, so the
+    environment only emits the newest proprioceptive frame. The runner and the rollout storage keep the history of
+    each environment and rebuild the same observations as with the history computed by the environment.
+
+    With the empirical normalization, every frame of the history is normalized with the statistics of the step it is
+    acted on. The rollout storage then keeps the raw frames and the statistics of every step, so the mini-batches
+    hold the observations the policy acted on.
+
+    When the environment still emits the history (e.g. in ``play.py``), the runner uses it as it is, so the checkpoints
+    of the training can be loaded.
+    """
+
+    logger: Literal["tensorboard", "neptune", "wandb", "jsonl"] = "tensorboard"
+    """The logger to use. Default is tensorboard.
+
+    "jsonl" appends the scalars to ``metrics.jsonl`` in the log directory.
+    """
+
+    async_logging: bool = False
+    """Whether to write the metrics and the console output from a background thread. Default is False.
+
+    The training loop only pushes a record per iteration to a bounded queue (the oldest records are dropped if the
+    writer falls behind), and the queued records are written before the end of training.
+    """
+
+    async_checkpointing: bool = False
+    """Whether to write the checkpoints from a background thread. Default is False.
+
+    The training loop only copies the state dictionaries to the CPU. Serialization, upload and pruning of the old
+    checkpoints happen in the background.
+    """
+
+    keep_last_checkpoints: int | None = None
+    """The number of most recent checkpoints kept in the log directory. Defaults to None (all checkpoints are kept)."""
+
+    keep_checkpoint_every: int | None = None
+    """Keep the checkpoints of the iterations that are multiples of this value on top of the most recent ones.
+
+    Defaults to None. Only used when ``keep_last_checkpoints`` is set.
+    """
+
+    pipelined_updates: bool = False
+    """Whether to update the policy on a rollout while the next rollout is collected. Default is False.
+
+    The next rollout is collected with the parameters from before the update, so the data lags the learner by one
+    update. The learner re-evaluates each rollout with its current parameters and corrects the returns and advantages
+    with V-trace (see ``vtrace_rho_clip`` and ``vtrace_c_clip`` of the algorithm). Not available for recurrent
+    policies and random network distillation.
+    """
+
+    phase_timing: bool = False
+    """Whether to time the phases of the training loop. Default is False.
+
+    The time spent per iteration in the collection phases (action sampling, environment step, observation reordering,
+    storage and bookkeeping), the computation of the returns and the update phases (mini-batch assembly, forward,
+    backward, all-reduce and optimizer step) is logged under ``Perf/phase/``. On CUDA devices, the phases are timed
+    with CUDA events.
+    """
+
+    phase_trace_iterations: list[int] | None = None
+    """The first and last iteration (inclusive) written to ``phase_trace.json`` in the log directory.
+
+    Defaults to None (no trace). The trace is in the Chrome trace format (viewable in Perfetto). Setting it enables
+    :attr:`phase_timing`.
+    """
+
+    distributed_backend: Literal["nccl", "gloo"] | None = None
+    """The backend of the distributed training. Defaults to None (NCCL on GPUs, gloo on the CPU).
+
+    On the CPU, all the processes of a host share the device, and the seeds of the environments are offset by the global
+    rank of the processes.
+    """
+
+    elastic_training: bool = False
+    """Whether processes can join and leave the distributed training between iterations. Default is False.
+
+    The processes meet at ``MASTER_ADDR:MASTER_PORT``. The process with ``RANK`` 0 is the coordinator and must stay
+    alive; the other processes (with distinct positive ``RANK`` values) can be started and stopped at any time. A new
+    process joins at the start of the next iteration and receives the parameters, the optimizer states and the
+    normalizers from the coordinator. When a process leaves, the rollout of the current iteration is dropped and the
+    training goes on with the remaining processes. Not available with :attr:`pipelined_updates`.
+    """
+
+    elastic_timeout: float = 30.0
+    """The timeout of the collectives in the elastic training (in seconds), after which a silent process is removed."""
+
 
 @configclass
 class Go2ArmFlatPPORunnerCfg(Go2ArmRslRlOnPolicyRunnerCfg):
@@ -28,6 +28,26 @@ PLAY = False
 
 # ================================================================================================================================
 
+# joints of the joint observations, in the order of the observations (the legs, then the arm with either the D1 or the
+# ARX5 joint names)
+LEG_JOINT_NAMES = ["FR_hip_joint", "FR_thigh_joint", "FR_calf_joint",
+                   "FL_hip_joint", "FL_thigh_joint", "FL_calf_joint",
+                   "RR_hip_joint", "RR_thigh_joint", "RR_calf_joint",
+                   "RL_hip_joint", "RL_thigh_joint", "RL_calf_joint"]
+D1_ARM_JOINT_NAMES = ["arm_joint1", "arm_joint2", "arm_joint3",
+                      "arm_joint4", "arm_joint5", "arm_joint6"]
+ARX5_ARM_JOINT_NAMES = ["joint1", "joint2", "joint3",
+                        "joint4", "joint5", "joint6"]
+
+
+def observed_joint_ids(asset: Articulation) -> tuple[list[int], list[str]]:
+    """The ids and names of the joints of the joint observations (D1 arm naming first, then ARX5 naming)."""
+    try:
+        return asset.find_joints(LEG_JOINT_NAMES + D1_ARM_JOINT_NAMES, preserve_order=True)
+    except ValueError:
+        return asset.find_joints(LEG_JOINT_NAMES + ARX5_ARM_JOINT_NAMES, preserve_order=True)
+
+
 def base_ang_vel(env: ManagerBasedEnv, asset_cfg: SceneEntityCfg = SceneEntityCfg("robot")) -> torch.Tensor:
     """Root angular velocity in the asset's root frame."""
     # extract the used quantities (to enable type-hinting)
@@ -43,24 +63,7 @@ def joint_pos_rel(env: ManagerBasedEnv, asset_cfg: SceneEntityCfg = SceneEntityC
     # extract the used quantities (to enable type-hinting)
     asset: Articulation = env.scene[asset_cfg.name]
 
-    # Try to find arm joints with either naming convention (D1 arm: arm_joint1-6, ARX5: joint1-6)
-    leg_joints = ["FR_hip_joint", "FR_thigh_joint", "FR_calf_joint",
-                  "FL_hip_joint", "FL_thigh_joint", "FL_calf_joint",
-                  "RR_hip_joint", "RR_thigh_joint", "RR_calf_joint",
-                  "RL_hip_joint", "RL_thigh_joint", "RL_calf_joint"]
-    
-    # Try D1 arm naming first
-    arm_joints_d1 = ["arm_joint1", "arm_joint2", "arm_joint3", 
-                     "arm_joint4", "arm_joint5", "arm_joint6"]
-    # Try ARX5 naming
-    arm_joints_arx5 = ["joint1", "joint2", "joint3", 
-                       "joint4", "joint5", "joint6"]
-    
-    try:
-        joint_ids, _ = asset.find_joints(leg_joints + arm_joints_d1, preserve_order=True)
-    except:
-        joint_ids, _ = asset.find_joints(leg_joints + arm_joints_arx5, preserve_order=True)
-
+    joint_ids, _ = observed_joint_ids(asset)
     return asset.data.joint_pos[:, joint_ids] - asset.data.default_joint_pos[:, joint_ids]
 
 
@@ -72,24 +75,7 @@ def joint_vel_rel(env: ManagerBasedEnv, asset_cfg: SceneEntityCfg = SceneEntityC
     # extract the used quantities (to enable type-hinting)
     asset: Articulation = env.scene[asset_cfg.name]
     
-    # Try to find arm joints with either naming convention (D1 arm: arm_joint1-6, ARX5: joint1-6)
-    leg_joints = ["FR_hip_joint", "FR_thigh_joint", "FR_calf_joint",
-                  "FL_hip_joint", "FL_thigh_joint", "FL_calf_joint",
-                  "RR_hip_joint", "RR_thigh_joint", "RR_calf_joint",
-                  "RL_hip_joint", "RL_thigh_joint", "RL_calf_joint"]
-    
-    # Try D1 arm naming first
-    arm_joints_d1 = ["arm_joint1", "arm_joint2", "arm_joint3", 
-                     "arm_joint4", "arm_joint5", "arm_joint6"]
-    # Try ARX5 naming
-    arm_joints_arx5 = ["joint1", "joint2", "joint3", 
-                       "joint4", "joint5", "joint6"]
-    
-    try:
-        joint_ids, _ = asset.find_joints(leg_joints + arm_joints_d1, preserve_order=True)
-    except:
-        joint_ids, _ = asset.find_joints(leg_joints + arm_joints_arx5, preserve_order=True)
-
+    joint_ids, _ = observed_joint_ids(asset)
     return asset.data.joint_vel[:, joint_ids] - asset.data.default_joint_vel[:, joint_ids]
 
 
@@ -164,22 +150,7 @@ def get_joints_torques(env: ManagerBasedRLEnv, asset_cfg: SceneEntityCfg = Scene
     """Get applied torques for all robot joints with dual naming support for D1/ARX5 arms."""
     asset: Articulation = env.scene[asset_cfg.name]
     
-    leg_joints = ["FR_hip_joint", "FR_thigh_joint", "FR_calf_joint",
-                  "FL_hip_joint", "FL_thigh_joint", "FL_calf_joint",
-                  "RR_hip_joint", "RR_thigh_joint", "RR_calf_joint",
-                  "RL_hip_joint", "RL_thigh_joint", "RL_calf_joint"]
-    
-    # Try D1 arm naming first (arm_joint1-6), fall back to ARX5 naming (joint1-6)
-    arm_joints_d1 = ["arm_joint1", "arm_joint2", "arm_joint3",
-                     "arm_joint4", "arm_joint5", "arm_joint6"]
-    arm_joints_arx5 = ["joint1", "joint2", "joint3",
-                       "joint4", "joint5", "joint6"]
-    
-    try:
-        joint_ids, _ = asset.find_joints(leg_joints + arm_joints_d1, preserve_order=True)
-    except:
-        joint_ids, _ = asset.find_joints(leg_joints + arm_joints_arx5, preserve_order=True)
-    
+    joint_ids, _ = observed_joint_ids(asset)
     return asset.data.applied_torque[:, joint_ids]
 
 
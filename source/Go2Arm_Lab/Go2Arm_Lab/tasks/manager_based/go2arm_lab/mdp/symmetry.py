@@ -0,0 +1,310 @@
+# Copyright (c) 2022-2025, The Isaac Lab Project Developers (https://github.com/isaac-sim/IsaacLab/blob/main/CONTRIBUTORS.md).
+# All rights reserved.
+#
+# SPDX-License-Identifier: BSD-3-Clause
+
+"""Left/right mirror symmetry of the Go2Arm observations and actions.
+
+The mirror is the reflection about the sagittal (x-z) plane of the base. It swaps the left and right legs (FR with FL
+and RR with RL), flips the joints that rotate about the x or z axis of the base (the hip abduction and the yaw and roll
+joints of the arm) and flips the lateral components of the vectors and commands.
+
+:func:`compute_symmetric_states` is the ``data_augmentation_func`` of the symmetry configuration of PPO:
+
+.. code-block:: python
+
+    symmetry_cfg = RslRlSymmetryCfg(
+        use_data_augmentation=True,
+        data_augmentation_func="Go2Arm_Lab.tasks.manager_based.go2arm_lab.mdp.symmetry:compute_symmetric_states",
+    )
+
+Note that the empirical normalization of the observations breaks the sign flips (the mean is not mirrored), so the
+symmetry is meant to be used without it.
+"""
+
+from __future__ import annotations
+
+import re
+import torch
+import weakref
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from local_rsl_rl.wrappers import RslRlVecEnvWrapper
+
+# left/right pairs of the legs (prefixes of the joint and body names)
+MIRRORED_LEGS = {"FR": "FL", "FL": "FR", "RR": "RL", "RL": "RR"}
+
+# sign of the joints in the mirrored robot: the joints about the x or z axis flip, the joints about the y axis do not
+JOINT_MIRROR_SIGNS = {
+    # legs: hip abduction (x), thigh and calf (y)
+    ".*_hip_joint": -1.0,
+    ".*_thigh_joint": 1.0,
+    ".*_calf_joint": 1.0,
+    # D1 arm: base yaw, shoulder pitch, elbow pitch, forearm roll, wrist pitch, wrist roll
+    "arm_joint1": -1.0,
+    "arm_joint2": 1.0,
+    "arm_joint3": 1.0,
+    "arm_joint4": -1.0,
+    "arm_joint5": 1.0,
+    "arm_joint6": -1.0,
+    # ARX5 arm: base yaw, shoulder pitch, elbow pitch, wrist pitch, wrist yaw, wrist roll
+    "joint1": -1.0,
+    "joint2": 1.0,
+    "joint3": 1.0,
+    "joint4": 1.0,
+    "joint5": -1.0,
+    "joint6": -1.0,
+}
+
+# signs of the vector terms in the mirrored robot (one value per component of a frame)
+VECTOR_TERM_SIGNS = {
+    # angular velocity (pseudo-vector): the roll and yaw rates flip
+    "base_ang_vel": [-1.0, 1.0, -1.0],
+    "projected_gravity": [1.0, -1.0, 1.0],
+    # linear velocity x, lateral velocity y and yaw rate z
+    "velocity_commands": [1.0, -1.0, -1.0],
+    # position (x, y, z) and orientation (w, x, y, z) of the end-effector in the base frame
+    "Go2_pose_command": [1.0, -1.0, 1.0, 1.0, -1.0, 1.0, -1.0],
+    "priv_mass_base": [1.0],
+    "priv_mass_ee": [1.0],
+    "priv_base_lin_vel": [1.0, -1.0, 1.0],
+}
+# terms with one value per joint of the joint observations or of the actions, and per foot
+OBSERVED_JOINT_TERMS = ["joint_pos", "joint_vel", "priv_joint_torques"]
+ACTION_JOINT_TERMS = ["actions"]
+FEET_TERMS = ["priv_feet_contact"]
+
+
+class Go2ArmMirror:
+    """Mirror of the Go2Arm policy observations and actions as a gather and a multiplication.
+
+    The permutations and signs are built once, per proprioceptive frame and for the privileged terms, from the term
+    layout of the observation manager (see ``get_obs_list_length``) and the joint orders. They are applied to the
+    observations of the policy, in the layout of ``OnPolicyRunner.change_obs_order``::
+
+        [frame_t, frame_t-1, ..., frame_t-num_hist+1, privileged terms]
+
+    with a single :func:`torch.index_select` followed by a multiplication with the signs. The number of frames is
+    deduced from the size of the observations, so the observations with the history rebuilt by the runner (see
+    ``obs_history_length``) are mirrored as well.
+    """
+
+    def __init__(
+        self,
+        term_names: list[str],
+        term_lengths: list[int],
+        num_history: int,
+        observed_joint_names: list[str],
+        action_joint_names: list[str],
+        feet_names: list[str],
+        device: str = "cpu",
+    ):
+        """Build the permutations and signs of the mirror.
+
+        Args:
+            term_names: Names of the policy observation terms in the order of the observation manager (with or
+                without the ``policy-`` prefix).
+            term_lengths: Number of values of each term (all the frames of its history).
+            num_history: Number of frames in the history of the proprioceptive terms of the observation manager.
+            observed_joint_names: Joints of the joint observations, in the order of the observations.
+            action_joint_names: Joints of the actions, in the order of the action terms.
+            feet_names: Feet of the contact observations, in the order of the observations.
+            device: Device of the permutations and signs.
+
+        Raises:
+            ValueError: When a term has no mirror transform or a joint has no mirror sign.
+        """
+        self.device = device
+        joint_transforms = {
+            "observed": _mirror_names(observed_joint_names, JOINT_MIRROR_SIGNS),
+            "action": _mirror_names(action_joint_names, JOINT_MIRROR_SIGNS),
+        }
+        feet_transform = _mirror_names(feet_names)
+
+        # transforms of one proprioceptive frame and of the privileged terms
+        frame_transforms, privileged_transforms = [], []
+        for name, length in zip(term_names, term_lengths):
+            name = name.removeprefix("policy-")
+            if name.startswith("priv_"):
+                transforms, frame_length = privileged_transforms, length
+            else:
+                transforms, frame_length = frame_transforms, length // max(num_history, 1)
+            if name in VECTOR_TERM_SIGNS:
+                signs = VECTOR_TERM_SIGNS[name]
+                transform = (list(range(len(signs))), signs)
+            elif name in OBSERVED_JOINT_TERMS:
+                transform = joint_transforms["observed"]
+            elif name in ACTION_JOINT_TERMS:
+                transform = joint_transforms["action"]
+            elif name in FEET_TERMS:
+                transform = feet_transform
+            else:
+                raise ValueError(f"The observation term '{name}' has no mirror transform.")
+            if len(transform[0]) != frame_length:
+                raise ValueError(
+                    f"The mirror transform of the observation term '{name}' has {len(transform[0])} values,"
+                    f" expected {frame_length}."
+                )
+            transforms.append(transform)
+        self.frame_index, self.frame_sign = _concatenate(frame_transforms)
+        self.privileged_index, self.privileged_sign = _concatenate(privileged_transforms)
+        self.num_prop = len(self.frame_index)
+        self.num_priv = len(self.privileged_index)
+        self.action_index = torch.tensor(joint_transforms["action"][0], dtype=torch.long, device=device)
+        self.action_sign = torch.tensor(joint_transforms["action"][1], device=device)
+
+        # gathers of the observations, per number of values
+        self.obs_transforms: dict[int, tuple[torch.Tensor, torch.Tensor]] = {}
+
+    @classmethod
+    def from_env(cls, env: RslRlVecEnvWrapper) -> Go2ArmMirror:
+        """Build the mirror of a Go2Arm environment wrapped with ``RslRlVecEnvWrapper``."""
+        from .observations import observed_joint_ids
+
+        term_names, term_lengths = env.get_obs_list_length()
+        unwrapped = env.unwrapped
+        robot = unwrapped.scene["robot"]
+        # joints of the joint observations and of the action terms (in the order of the action manager)
+        _, observed_joint_names = observed_joint_ids(robot)
+        action_joint_names = []
+        for term_name in unwrapped.action_manager.active_terms:
+            term_cfg = unwrapped.action_manager.get_term(term_name).cfg
+            _, joint_names = robot.find_joints(term_cfg.joint_names, preserve_order=term_cfg.preserve_order)
+            action_joint_names += joint_names
+        # feet of the contact observations (in the order of the contact sensor)
+        feet_names = []
+        feet_term = getattr(unwrapped.cfg.observations.policy, FEET_TERMS[0], None)
+        if feet_term is not None:
+            sensor_cfg = feet_term.params["sensor_cfg"]
+            sensor = unwrapped.scene.sensors[sensor_cfg.name]
+            _, feet_names = sensor.find_bodies(sensor_cfg.body_names, preserve_order=sensor_cfg.preserve_order)
+        return cls(
+            term_names,
+            term_lengths,
+            env.num_history,
+            observed_joint_names,
+            action_joint_names,
+            feet_names,
+            device=env.device,
+        )
+
+    def mirror_obs(self, obs: torch.Tensor) -> torch.Tensor:
+        """Return the mirror image of the policy observations. Shape: (batch_size, num_obs)"""
+        index, sign = self._obs_transform(obs.shape[-1], obs.device)
+        return torch.index_select(obs, -1, index) * sign
+
+    def mirror_actions(self, actions: torch.Tensor) -> torch.Tensor:
+        """Return the mirror image of the actions. Shape: (batch_size, num_actions)"""
+        index, sign = self._action_transform(actions.device)
+        return torch.index_select(actions, -1, index) * sign
+
+    def augment_obs(self, obs: torch.Tensor) -> torch.Tensor:
+        """Return the policy observations followed by their mirror image. Shape: (2 * batch_size, num_obs)"""
+        return _augment(obs, *self._obs_transform(obs.shape[-1], obs.device))
+
+    def augment_actions(self, actions: torch.Tensor) -> torch.Tensor:
+        """Return the actions followed by their mirror image. Shape: (2 * batch_size, num_actions)"""
+        return _augment(actions, *self._action_transform(actions.device))
+
+    def _action_transform(self, device: torch.device) -> tuple[torch.Tensor, torch.Tensor]:
+        if self.action_index.device != device:
+            self.action_index, self.action_sign = self.action_index.to(device), self.action_sign.to(device)
+        return self.action_index, self.action_sign
+
+    def _obs_transform(self, num_obs: int, device: torch.device) -> tuple[torch.Tensor, torch.Tensor]:
+        transform = self.obs_transforms.get(num_obs)
+        if transform is None or transform[0].device != device:
+            num_hist, remainder = divmod(num_obs - self.num_priv, self.num_prop)
+            if remainder != 0 or num_hist < 1:
+                raise ValueError(
+                    f"The observations have {num_obs} values, expected frames of {self.num_prop} values followed by"
+                    f" {self.num_priv} privileged values."
+                )
+            # the same frame permutation for all the frames, then the privileged terms
+            offsets = torch.arange(num_hist).repeat_interleave(self.num_prop) * self.num_prop
+            index = torch.cat(
+                [self.frame_index.repeat(num_hist) + offsets, self.privileged_index + num_hist * self.num_prop]
+            )
+            sign = torch.cat([self.frame_sign.repeat(num_hist), self.privileged_sign])
+            transform = (index.to(device), sign.to(device))
+            self.obs_transforms[num_obs] = transform
+        return transform
+
+
+# mirrors of the wrapped environments, built at the first augmentation
+_MIRRORS: weakref.WeakKeyDictionary = weakref.WeakKeyDictionary()
+
+
+def compute_symmetric_states(
+    env: RslRlVecEnvWrapper,
+    obs: torch.Tensor | None = None,
+    actions: torch.Tensor | None = None,
+    obs_type: str = "policy",
+) -> tuple[torch.Tensor | None, torch.Tensor | None]:
+    """Augment the observations and actions with their left/right mirror images.
+
+    The critic observations of the task are the policy observations, so both observation types have the same mirror.
+
+    Args:
+        env: The wrapped environment (the mirror is built from it once).
+        obs: The observations. Shape: (batch_size, num_obs)
+        actions: The actions. Shape: (batch_size, num_actions)
+        obs_type: The type of the observations ("policy" or "critic").
+
+    Returns:
+        The observations and the actions followed by their mirror images (None for None inputs).
+        Shape: (2 * batch_size, num_obs) and (2 * batch_size, num_actions)
+    """
+    mirror = _MIRRORS.get(env)
+    if mirror is None:
+        mirror = _MIRRORS[env] = Go2ArmMirror.from_env(env)
+    obs_aug = None if obs is None else mirror.augment_obs(obs)
+    actions_aug = None if actions is None else mirror.augment_actions(actions)
+    return obs_aug, actions_aug
+
+
+"""
+Helper functions.
+"""
+
+
+def _mirror_names(names: list[str], signs: dict[str, float] | None = None) -> tuple[list[int], list[float]]:
+    """Permutation (index of the mirrored counterpart) and signs of named values (joints or bodies)."""
+    index, sign = [], []
+    for name in names:
+        prefix = name.split("_", 1)[0]
+        mirrored_name = MIRRORED_LEGS[prefix] + name[len(prefix) :] if prefix in MIRRORED_LEGS else name
+        if mirrored_name not in names:
+            raise ValueError(f"The mirror '{mirrored_name}' of '{name}' is missing.")
+        index.append(names.index(mirrored_name))
+        if signs is None:
+            sign.append(1.0)
+            continue
+        matches = [value for pattern, value in signs.items() if re.fullmatch(pattern, name)]
+        if not matches:
+            raise ValueError(f"The joint '{name}' has no mirror sign.")
+        sign.append(matches[0])
+    return index, sign
+
+
+def _augment(values: torch.Tensor, index: torch.Tensor, sign: torch.Tensor) -> torch.Tensor:
+    """Concatenate the values and their mirror image, gathered and multiplied into the second half of the output."""
+    if values.requires_grad:
+        # the outputs of out= operations do not support autograd
+        return torch.cat([values, torch.index_select(values, -1, index) * sign])
+    batch_size = values.shape[0]
+    out = values.new_empty(2 * batch_size, values.shape[-1])
+    out[:batch_size] = values
+    torch.mul(torch.index_select(values, -1, index), sign, out=out[batch_size:])
+    return out
+
+
+def _concatenate(transforms: list[tuple[list[int], list[float]]]) -> tuple[torch.Tensor, torch.Tensor]:
+    """Concatenate the transforms of consecutive terms into a permutation and signs."""
+    index, sign, offset = [], [], 0
+    for term_index, term_sign in transforms:
+        index += [offset + i for i in term_index]
+        sign += term_sign
+        offset += len(term_index)
+    return torch.tensor(index, dtype=torch.long), torch.tensor(sign)